@@ -0,0 +1,60 @@
+"""Compares the JSON decoders on API responses of realistic size.
+
+Run from the repository root with the package installed (pip install -e .):
+
+    python benchmarks/bench_decoder.py --repeat 20
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import time
+from typing import Any, Callable
+
+import requests
+from payloads import OPTION_QUOTE, ORDER, many, option_chain
+
+from iqtrade.decoder import available_decoders, get_decoder
+
+
+def response_json(data: bytes) -> Any:
+    """What the client did before: requests' Response.json(), which decodes the body to text first."""
+    response = requests.Response()
+    response._content = data
+    response.headers["Content-Type"] = "application/json"
+    return response.json()
+
+
+def best_ms(function: Callable[[bytes], Any], data: bytes, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function(data)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="runs per case, the best one is reported")
+    args = parser.parse_args()
+
+    fixtures = {
+        "orders (5,000)": {"orders": many(ORDER, 5000)},
+        "option chain (20x200)": {"optionChain": [option_chain(20, 200) for _ in range(20)]},
+        "option quotes (1,000)": {"optionQuotes": many(OPTION_QUOTE, 1000)},
+    }
+    decoders: dict[str, Callable[[bytes], Any]] = {"Response.json()": response_json}
+    decoders.update({name: get_decoder(name) for name in available_decoders()})
+
+    print(f"{'fixture':<24}{'size':>10}" + "".join(f"{name:>18}" for name in decoders))
+    for fixture, payload in fixtures.items():
+        data = json.dumps(payload).encode("utf-8")
+        timings = "".join(f"{best_ms(decoder, data, args.repeat):>15.2f} ms" for decoder in decoders.values())
+        print(f"{fixture:<24}{len(data) / 1e6:>8.2f}MB{timings}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Measures the shared decoding tables of iqtrade.api against the plain Enum and datetime calls they replace.
+
+Run from the repository root with the package installed (pip install -e .):
+
+    python benchmarks/bench_decoding.py --count 200000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime as dt
+from typing import Any, Callable
+
+from payloads import EXECUTION, ORDER, many
+
+import iqtrade.api as iq
+from iqtrade.candles import CandleSeries
+
+
+def per_call_ns(function: Callable[[Any], Any], values: list[Any]) -> float:
+    start = time.perf_counter()
+    for value in values:
+        function(value)
+    return (time.perf_counter() - start) / len(values) * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200000, help="calls per case")
+    args = parser.parse_args()
+
+    sides = [("Buy", "Sell", "Short")[index % 3] for index in range(args.count)]
+    account_types = [("Individual", "Joint", "Informal Trust", "Corporation")[i % 4] for i in range(args.count)]
+    # Executions of a day share a few hundred distinct timestamps
+    timestamps = [f"2014-03-31T13:{index % 60:02d}:{index // 60 % 10:02d}.000000-04:00" for index in range(args.count)]
+
+    cases: list[tuple[str, Callable[[Any], Any], list[Any]]] = [
+        ("OrderSide[name]", lambda name: iq.OrderSide[name], sides),
+        ("_ORDER_SIDES[name]", lambda name: iq._ORDER_SIDES[name], sides),
+        ("ClientAccountType.from_string", iq.ClientAccountType.from_string, account_types),
+        ("dt.fromisoformat", dt.fromisoformat, timestamps),
+        ("_parse_datetime (memoized)", iq._parse_datetime, timestamps),
+    ]
+    print(f"{'case':<32}{'ns/call':>10}")
+    for name, function, values in cases:
+        print(f"{name:<32}{per_call_ns(function, values):>10.0f}")
+
+    print()
+    print(f"{'model':<32}{'objects/s':>14}")
+    executions = many(EXECUTION, args.count // 4)
+    for index, execution in enumerate(executions):
+        execution["timestamp"] = timestamps[index]
+    orders = many(ORDER, args.count // 4)
+    candles = [
+        {
+            "start": f"2021-01-{1 + index // 1440 % 28:02d}T{index // 60 % 24:02d}:{index % 60:02d}:00.000000-05:00",
+            "end": f"2021-01-{1 + index // 1440 % 28:02d}T{index // 60 % 24:02d}:{index % 60:02d}:59.000000-05:00",
+            "open": 1.0,
+            "high": 2.0,
+            "low": 0.5,
+            "close": 1.5,
+            "volume": 100,
+            "VWAP": 1.2,
+        }
+        for index in range(args.count // 4)
+    ]
+    for name, factory, payloads in (
+        ("Execution", iq.Execution, executions),
+        ("Order", iq.Order, orders),
+    ):
+        rate = 1e9 / per_call_ns(factory, payloads)
+        print(f"{name:<32}{rate:>14,.0f}")
+    start = time.perf_counter()
+    CandleSeries.from_raw(candles)
+    print(f"{'CandleSeries.from_raw (candles)':<32}{len(candles) / (time.perf_counter() - start):>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Compares eager and lazy decoding of TickerDetails and Order for bulk fetches.
+
+Run from the repository root with the package installed (pip install -e .):
+
+    python benchmarks/bench_lazy.py --count 100000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any, Callable
+
+from payloads import ORDER, TICKER_DETAILS, many
+
+import iqtrade.api as iq
+
+
+def per_object_us(function: Callable[[dict[str, Any]], Any], payloads: list[dict[str, Any]]) -> float:
+    start = time.perf_counter()
+    for payload in payloads:
+        function(payload)
+    return (time.perf_counter() - start) / len(payloads) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000, help="objects per case")
+    args = parser.parse_args()
+
+    def read_all(model: iq.LazyModel) -> None:
+        for name in type(model)._LAZY_FIELDS:
+            getattr(model, name)
+
+    cases: list[tuple[str, Callable[[dict[str, Any]], Any], dict[str, Any]]] = [
+        ("TickerDetails eager", lambda data: iq.TickerDetails(data), TICKER_DETAILS),
+        ("TickerDetails lazy", lambda data: iq.TickerDetails(data, lazy=True), TICKER_DETAILS),
+        (
+            "  + symbol_id, currency",
+            lambda data: (lambda ticker: (ticker.symbol_id, ticker.currency))(iq.TickerDetails(data, lazy=True)),
+            TICKER_DETAILS,
+        ),
+        ("  + every field", lambda data: read_all(iq.TickerDetails(data, lazy=True)), TICKER_DETAILS),
+        ("Order eager", lambda data: iq.Order(data), ORDER),
+        ("Order lazy", lambda data: iq.Order(data, lazy=True), ORDER),
+        (
+            "  + order_id, order_state",
+            lambda data: (lambda order: (order.order_id, order.order_state))(iq.Order(data, lazy=True)),
+            ORDER,
+        ),
+        ("  + every field", lambda data: read_all(iq.Order(data, lazy=True)), ORDER),
+    ]
+
+    print(f"{'case':<28}{'us/object':>12}")
+    for name, function, payload in cases:
+        print(f"{name:<28}{per_object_us(function, many(payload, args.count)):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
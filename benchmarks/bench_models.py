@@ -0,0 +1,70 @@
+"""Measures the memory footprint and construction throughput of the iqtrade.api models.
+
+Run from the repository root with the package installed (pip install -e .):
+
+    python benchmarks/bench_models.py --count 100000
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from payloads import ACTIVITY, EXECUTION, OPTION_QUOTE, ORDER, POSITION, QUOTE, TICKER_DETAILS, many, option_chain
+
+import iqtrade.api as iq
+
+MODELS: list[tuple[str, Callable[[dict[str, Any]], Any], dict[str, Any]]] = [
+    ("Order", iq.Order, ORDER),
+    ("TickerDetails", iq.TickerDetails, TICKER_DETAILS),
+    ("Level1Quote", iq.Level1Quote, QUOTE),
+    ("Level1OptionData", iq.Level1OptionData, OPTION_QUOTE),
+    ("Execution", iq.Execution, EXECUTION),
+    ("Position", iq.Position, POSITION),
+    ("AccountActivity", iq.AccountActivity, ACTIVITY),
+]
+
+
+def bytes_per_object(factory: Callable[[dict[str, Any]], Any], payloads: list[dict[str, Any]]) -> float:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        objects = [factory(payload) for payload in payloads]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    # The list holding the objects is not part of the objects
+    return (after - before - objects.__sizeof__()) / len(objects)
+
+
+def objects_per_second(factory: Callable[[dict[str, Any]], Any], payloads: list[dict[str, Any]]) -> float:
+    gc.collect()
+    start = time.perf_counter()
+    for payload in payloads:
+        factory(payload)
+    return len(payloads) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000, help="objects per model")
+    args = parser.parse_args()
+
+    print(f"{'model':<20}{'bytes/object':>14}{'objects/s':>14}")
+    for name, factory, payload in MODELS:
+        payloads = many(payload, args.count)
+        size = bytes_per_object(factory, payloads)
+        rate = objects_per_second(factory, payloads)
+        print(f"{name:<20}{size:>14,.0f}{rate:>14,.0f}")
+
+    chains = [option_chain() for _ in range(max(1, args.count // 1000))]
+    size = bytes_per_object(iq.ChainPerExpiryDate, chains)
+    rate = objects_per_second(iq.ChainPerExpiryDate, chains)
+    print(f"{'ChainPerExpiryDate':<20}{size:>14,.0f}{rate:>14,.0f}  (100 strikes each)")
+
+
+if __name__ == "__main__":
+    main()
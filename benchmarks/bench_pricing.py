@@ -0,0 +1,114 @@
+"""Times local implied volatilities and Greeks of option quotes and compares them with the values of the API.
+
+The quotes are synthetic American options: their API volatility and Greeks are the model values rounded to the
+precision the API returns, and their bid and ask prices are 1% around the model price.
+
+Run from the repository root with the package installed (pip install -e .):
+
+    python benchmarks/bench_pricing.py --count 10000
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+
+from payloads import OPTION_QUOTE, TICKER_DETAILS
+
+import iqtrade.api as iq
+from iqtrade.columns import column_to_list, has_numpy
+from iqtrade.options import EXPIRY_TIME
+from iqtrade.pricing import GREEKS, black_scholes_greeks, black_scholes_price, price_option_quotes
+
+NOW = datetime(2015, 1, 2, 15, tzinfo=timezone.utc)
+SPOT = 100.0
+RATE = 0.03
+
+
+def make_chain(count: int) -> tuple[list[iq.Level1OptionData], list[iq.TickerDetails]]:
+    """Returns count option quotes with API volatilities and Greeks, and the TickerDetails of their options."""
+    rng = random.Random(1)
+    types, strikes, times, volatilities = [], [], [], []
+    details = []
+    for index in range(count):
+        option_type = iq.OptionType.Call if index % 2 == 0 else iq.OptionType.Put
+        strike = round(SPOT * rng.uniform(0.7, 1.3), 1)
+        days = rng.randint(7, 720)
+        expiry = NOW + timedelta(days=days) - EXPIRY_TIME
+        types.append(option_type)
+        strikes.append(strike)
+        times.append(days / 365)
+        volatilities.append(20 + 15 * abs(strike / SPOT - 1) * 10)
+        details.append(
+            iq.TickerDetails(
+                dict(
+                    TICKER_DETAILS,
+                    symbolId=index,
+                    securityType="Option",
+                    optionType=option_type.name,
+                    optionExerciseType="American",
+                    optionStrikePrice=strike,
+                    optionExpiryDate=expiry.isoformat(),
+                )
+            )
+        )
+    prices = column_to_list(
+        black_scholes_price(types, SPOT, strikes, times, volatilities, RATE, american=True, use_numpy=False)
+    )
+    greeks = black_scholes_greeks(types, SPOT, strikes, times, volatilities, RATE, american=True, use_numpy=False)
+    quotes = []
+    for index, price in enumerate(prices):
+        quote = dict(OPTION_QUOTE, symbolId=index, bidPrice=price * 0.99, askPrice=price * 1.01, lastTradePrice=price)
+        quote["volatility"] = round(volatilities[index], 6)
+        quote.update({name: round(float(greeks[name][index]), 6) for name in GREEKS})
+        quotes.append(iq.Level1OptionData(quote))
+    return quotes, details
+
+
+def best_ms(function: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000, help="option quotes")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per case, the best one is reported")
+    args = parser.parse_args()
+
+    quotes, details = make_chain(args.count)
+    underlying = SPOT
+    cases = {"pure Python": False}
+    if has_numpy():
+        cases["NumPy"] = True
+
+    names = ("volatility",) + GREEKS
+    header = f"{'engine':<14}{'ms':>10}{'us/option':>11}{'unpriced':>10}"
+    print(header + "".join(f"{'max |d' + name + '|':>19}" for name in names))
+    for engine, use_numpy in cases.items():
+
+        def run() -> Any:
+            return price_option_quotes(quotes, details, underlying, rate=RATE, now=NOW, use_numpy=use_numpy)
+
+        elapsed = best_ms(run, args.repeat)
+        values = run().to_lists()
+        priced = [index for index, volatility in enumerate(values["volatility"]) if not math.isnan(volatility)]
+        errors = [
+            max((abs(values[name][index] - float(getattr(quotes[index], name))) for index in priced), default=0.0)
+            for name in names
+        ]
+        print(
+            f"{engine:<14}{elapsed:>10.1f}{elapsed * 1000 / args.count:>11.2f}{args.count - len(priced):>10}"
+            + "".join(f"{error:>19.2e}" for error in errors)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Synthetic Questrade API payloads shared by the benchmarks."""
+from __future__ import annotations
+
+import copy
+from typing import Any
+
+ORDER: dict[str, Any] = {
+    "id": 173577870,
+    "symbol": "AAPL",
+    "symbolId": 8049,
+    "totalQuantity": 100,
+    "openQuantity": 100,
+    "filledQuantity": 0,
+    "canceledQuantity": 0,
+    "side": "Buy",
+    "orderType": "Limit",
+    "limitPrice": 500.95,
+    "stopPrice": None,
+    "isAllOrNone": False,
+    "isAnonymous": False,
+    "icebergQty": None,
+    "minQuantity": None,
+    "avgExecPrice": None,
+    "lastExecPrice": None,
+    "source": "TradingAPI",
+    "timeInForce": "Day",
+    "gtdDate": None,
+    "state": "Canceled",
+    "clientReasonStr": "",
+    "chainId": 173577870,
+    "creationTime": "2014-10-23T20:03:41.636000-04:00",
+    "updateTime": "2014-10-23T20:03:42.890000-04:00",
+    "notes": "",
+    "primaryRoute": "AUTO",
+    "secondaryRoute": "",
+    "orderRoute": "LAMP",
+    "venueHoldingOrder": "",
+    "comissionCharged": 0,
+    "exchangeOrderId": "XS173577870",
+    "isSignificantShareHolder": False,
+    "isInsider": False,
+    "isLimitOffsetInDollar": False,
+    "userId": 3000124,
+    "placementCommission": None,
+    "legs": [],
+    "strategyType": "SingleLeg",
+    "triggerStopPrice": None,
+    "orderGroupId": 0,
+    "orderClass": None,
+    "mainChainId": 0,
+}
+
+TICKER_DETAILS: dict[str, Any] = {
+    "symbol": "AAPL",
+    "currency": "USD",
+    "symbolId": 8049,
+    "prevDayClosePrice": 102.5,
+    "highPrice52": 102.9,
+    "lowPrice52": 63.89,
+    "averageVol3Months": 43769680,
+    "averageVol20Days": 12860370,
+    "outstandingShares": 5987867000,
+    "eps": 6.2,
+    "pe": 16.54,
+    "dividend": 0.47,
+    "yield": 1.84,
+    "exDate": "2014-08-07T00:00:00.000000-04:00",
+    "marketCap": 613756367500,
+    "tradeUnit": 1,
+    "optionType": None,
+    "optionDurationType": None,
+    "optionRoot": "",
+    "optionContractDeliverables": {"underlyings": [], "cashInLieu": 0},
+    "optionExerciseType": None,
+    "listingExchange": "NASDAQ",
+    "description": "APPLE INC",
+    "securityType": "Stock",
+    "optionExpiryDate": None,
+    "dividendDate": "2014-08-14T00:00:00.000000-04:00",
+    "optionStrikePrice": None,
+    "isTradable": True,
+    "isQuotable": True,
+    "hasOptions": True,
+    "minTicks": [{"pivot": 0, "minTick": 0.0001}, {"pivot": 1, "minTick": 0.01}],
+    "industrySector": "BasicMaterials",
+    "industryGroup": "Steel",
+    "industrySubgroup": "Steel",
+}
+
+QUOTE: dict[str, Any] = {
+    "symbol": "AAPL",
+    "symbolId": 8049,
+    "tier": " ",
+    "bidPrice": 101.4,
+    "bidSize": 6500,
+    "askPrice": 102.3,
+    "askSize": 9100,
+    "lastTradePriceTrHrs": 101.9,
+    "lastTradePrice": 101.90,
+    "lastTradeSize": 3100,
+    "lastTradeTick": "Equal",
+    "lastTradeTime": "2014-10-24T20:06:40.131000-04:00",
+    "volume": 80483500,
+    "openPrice": 101.1,
+    "highPrice": 102.7,
+    "lowPrice": 101.05,
+    "delay": 0,
+    "isHalted": False,
+}
+
+OPTION_QUOTE: dict[str, Any] = {
+    **QUOTE,
+    "underlying": "MSFT",
+    "underlyingId": 27426,
+    "symbol": "MSFT20Jan17C70.00",
+    "symbolId": 7413503,
+    "volatility": 52.374257,
+    "delta": 0.06985,
+    "gamma": 0.01038,
+    "theta": -0.001406,
+    "vega": 0.074554,
+    "rho": 0.04153,
+    "openInterest": 2292,
+    "VWAP": 0,
+}
+
+EXECUTION: dict[str, Any] = {
+    "symbol": "AAPL",
+    "symbolId": 8049,
+    "quantity": 10,
+    "side": "Buy",
+    "price": 536.87,
+    "id": 53817310,
+    "orderId": 177106005,
+    "orderChainId": 17710600,
+    "exchangeExecId": "XS1771060050147",
+    "timestamp": "2014-03-31T13:38:29.000000-04:00",
+    "notes": "",
+    "venue": "LAMP",
+    "totalCost": 5368.7,
+    "orderPlacementCommission": 0,
+    "commission": 4.95,
+    "executionFee": 0,
+    "secFee": 0,
+    "canadianExecutionFee": 0,
+    "parentId": 0,
+}
+
+POSITION: dict[str, Any] = {
+    "symbol": "THI.TO",
+    "symbolId": 38738,
+    "openQuantity": 100,
+    "closedQuantity": 0,
+    "currentMarketValue": 6017,
+    "currentPrice": 60.17,
+    "averageEntryPrice": 60.23,
+    "closedPnl": 0,
+    "openPnl": -6,
+    "dayPnl": 0,
+    "totalCost": 6023.00,
+    "isRealTime": True,
+    "isUnderReorg": False,
+}
+
+ACTIVITY: dict[str, Any] = {
+    "tradeDate": "2011-02-16T00:00:00.000000-05:00",
+    "transactionDate": "2011-02-16T00:00:00.000000-05:00",
+    "settlementDate": "2011-02-16T00:00:00.000000-05:00",
+    "action": "Buy",
+    "symbol": "AAPL",
+    "symbolId": 8049,
+    "description": "APPLE INC",
+    "currency": "USD",
+    "quantity": 10,
+    "price": 101.5,
+    "grossAmount": -1015.0,
+    "commission": -4.95,
+    "netAmount": -1019.95,
+    "type": "Trades",
+}
+
+
+def option_chain(expiries: int = 20, strikes: int = 100) -> dict[str, Any]:
+    """Returns an option chain payload with the given number of expiry dates and strikes per expiry."""
+    return {
+        "expiryDate": "2015-01-17T00:00:00.000000-05:00",
+        "description": "BANK OF MONTREAL",
+        "listingExchange": "MX",
+        "optionExerciseType": "American",
+        "chainPerRoot": [
+            {
+                "optionRoot": "BMO",
+                "chainPerStrikePrice": [
+                    {
+                        "strikePrice": 10 + strike,
+                        "callSymbolId": 6100000 + expiries * strike * 2,
+                        "putSymbolId": 6100001 + expiries * strike * 2,
+                    }
+                    for strike in range(strikes)
+                ],
+                "multiplier": 100,
+            }
+        ],
+    }
+
+
+def many(payload: dict[str, Any], count: int) -> list[dict[str, Any]]:
+    """Returns count independent copies of payload with distinct ids, like a decoded API response."""
+    result = []
+    for index in range(count):
+        item = copy.deepcopy(payload)
+        if "id" in item:
+            item["id"] += index
+        if "symbolId" in item:
+            item["symbolId"] += index
+        result.append(item)
+    return result
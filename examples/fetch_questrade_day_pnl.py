@@ -2,17 +2,15 @@ import iqtrade.api as iq
 
 
 def print_accounts_pnl(qt: iq.QuestradeIQ) -> None:
-    accounts = qt.get_accounts()
-    account_positions = [qt.get_positions(account.number) for account in accounts]
-    ticker_set = {position.symbol_id for positions in account_positions for position in positions}
-    ticker_map = {symbol.ticker: symbol for symbol in qt.get_tickers(ticker_set)}
+    snapshot = qt.get_portfolio_snapshot()
 
     total_pnl = {iq.Currency.CAD: 0.0, iq.Currency.USD: 0.0}
-    for account, positions in zip(accounts, account_positions):
+    for account_snapshot in snapshot.accounts:
+        account = account_snapshot.account
         print(account.number, account.type.name)
         day_pnl = {iq.Currency.CAD: 0.0, iq.Currency.USD: 0.0}
-        for position in sorted(positions):
-            ticker = ticker_map[position.ticker]
+        for position in sorted(account_snapshot.positions):
+            ticker = snapshot.symbols[position.symbol_id]
             currency = ticker.currency
             position_day_pnl = position.day_pnl
             day_pnl[currency] += position_day_pnl
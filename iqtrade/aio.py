@@ -0,0 +1,735 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import time
+from datetime import datetime as dt
+from types import TracebackType
+from typing import Any, AsyncIterator, Literal, Optional, Sequence, Union, overload
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None  # type: ignore
+
+from .api import (
+    AccountActivity,
+    AccountInfo,
+    AccountSnapshot,
+    Balances,
+    Candle,
+    ChainPerExpiryDate,
+    Execution,
+    Granularity,
+    Level1OptionData,
+    Level1Quote,
+    OptionIdFilter,
+    Order,
+    OrderStateFilter,
+    PortfolioSnapshot,
+    Position,
+    QuestradeIQBase,
+    SocketMode,
+    StrategyVariantQuote,
+    StrategyVariantRequest,
+    Ticker,
+    TickerDetails,
+    _cached_symbol_ids,
+    _candle_windows,
+    _chunks,
+    _match_strategy_quotes,
+    _merge_candle_windows,
+    _numbered_strategy_query,
+    _option_quote_bodies,
+    _option_quotes_query,
+    _order_symbols,
+    _request_key,
+    _resolved_symbol_ids,
+    _single_ticker,
+    _snapshot_symbol_ids,
+    _strategy_quotes_query,
+    _streaming_quotes_query,
+    _symbols_query,
+    _ticker_list,
+    _time_range_query,
+    _unique_quotes,
+)
+from .broker import FileLock, TokenBroker
+from .cache import OptionChainCache, QuoteCache, SymbolCache
+from .candles import CandleSeries
+from .decoder import JsonDecoder, decode_object
+from .options import OptionChainIndex, OptionQuoteTable
+from .ratelimit import RateLimiter, throttled_delay
+from .storage import ConfigWriter
+
+
+def _lock_and_load(broker: TokenBroker, lock: FileLock) -> dict[str, Any]:
+    """Waits for the broker lock and reads the shared config, run in an executor thread."""
+    lock.acquire()
+    return broker.load()
+
+
+def _release_when_locked(lock: FileLock, locked: asyncio.Future[dict[str, Any]]) -> None:
+    """Releases the lock taken by _lock_and_load() for a task cancelled while waiting for it."""
+    if not locked.cancelled() and locked.exception() is None:
+        lock.release()
+
+
+def _save_and_release(writer: Optional[ConfigWriter], config: dict[str, Any], lock: Optional[FileLock]) -> None:
+    """Saves the config, then releases the broker lock if any, run in an executor thread."""
+    try:
+        if writer is not None:
+            writer.write(config, sync=lock is not None)
+    finally:
+        if lock is not None:
+            lock.release()
+
+
+class QuestradeIQAsync(QuestradeIQBase):
+    """asyncio flavour of QuestradeIQ.
+
+    Every public method of QuestradeIQ is available as a coroutine and returns the same model classes. All requests
+    share one pooled aiohttp connection, so a single event loop can keep many requests in flight, e.g. with
+    asyncio.gather().
+
+    The constructor does not perform any network I/O. The access token is obtained on first use, or explicitly with
+    login(). Use the client as an async context manager, or call close(), to release the connection pool.
+    """
+
+    def __init__(
+        self,
+        config: Union[str, dict[str, Any]] = "secrets.json",
+        save_config: bool = True,
+        *,
+        connection_limit: int = 100,
+        timeout: float = 30,
+        rate_limiter: Union[RateLimiter, bool] = True,
+        token_broker: Union[TokenBroker, bool] = True,
+        save_delay: Optional[float] = None,
+        json_decoder: Union[str, JsonDecoder, None] = None,
+        symbol_cache: Union[SymbolCache, bool] = False,
+        quote_cache: Union[QuoteCache, bool] = True,
+        option_chain_cache: Union[OptionChainCache, bool] = False,
+        coalesce_requests: bool = True,
+    ):
+        """Constructor
+
+        Parameters
+        ----------
+        config : Union[str, dict], optional
+            Config filename or dictionary.
+                If a dict, key/value pairs for configuration, by default "secrets.json"
+        connection_limit : int, optional
+            Maximum number of simultaneous connections in the pool, by default 100
+        timeout : float, optional
+            Total timeout for a single request in seconds, by default 30
+        rate_limiter : Union[RateLimiter, bool], optional
+            Rate limiter to share with other clients, True for a private one or False to disable rate limiting,
+                by default True
+        token_broker : Union[TokenBroker, bool], optional
+            Coordinates token refreshes with other processes using the same config file. True to lock next to the
+                config file (only when config is a filename and save_config is True) or False to disable,
+                by default True. The default creates a persistent "<config>.lock" file next to the config, and a
+                refresh raises TimeoutError when another process holds that lock for more than 30 seconds
+        save_delay : Optional[float], optional
+            If set, config changes are saved by a background thread at most once per save_delay seconds instead of
+                before the request that caused them returns, by default None. Refreshed tokens are still saved before
+                returning when a token broker is used, as other processes wait for them on the lock
+        json_decoder : Union[str, Callable[[bytes], Any], None], optional
+            Function decoding response bodies, or the name of one in iqtrade.decoder.DECODERS ("json", "orjson"),
+                by default None for orjson when it is installed and the standard library otherwise
+        symbol_cache : Union[SymbolCache, bool], optional
+            Cache of symbol details used by get_tickers() and to resolve symbol names, True for a private in-memory
+                one, by default False
+        quote_cache : Union[QuoteCache, bool], optional
+            Cache of received quotes, answering get_quote() and get_option_quotes() calls given a max_age. True for a
+                private one created the first time a max_age is given, or False to disable, by default True
+        option_chain_cache : Union[OptionChainCache, bool], optional
+            Cache of option chains used by get_option_chain(), True for a private in-memory one, by default False
+        coalesce_requests : bool, optional
+            Share the response of a GET request with identical GET requests made while it is in flight instead of
+                sending them too, each caller still gets objects of its own, by default True
+        """
+        if aiohttp is None:
+            raise ImportError("QuestradeIQAsync requires aiohttp, install it with 'pip install iqtrade[async]'")
+        super().__init__(
+            config,
+            save_config,
+            rate_limiter=rate_limiter,
+            token_broker=token_broker,
+            save_delay=save_delay,
+            json_decoder=json_decoder,
+            symbol_cache=symbol_cache,
+            quote_cache=quote_cache,
+            option_chain_cache=option_chain_cache,
+            coalesce_requests=coalesce_requests,
+        )
+        self._connection_limit = connection_limit
+        self._timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._token_lock: Optional[asyncio.Lock] = None
+        self._in_flight: dict[tuple[str, tuple[tuple[str, str], ...]], asyncio.Future[bytes]] = {}
+
+    async def __aenter__(self) -> QuestradeIQAsync:
+        try:
+            await self.login()
+        except BaseException:
+            await self.close()
+            raise
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Saves pending config and cache changes and closes the connection pool."""
+        loop = asyncio.get_running_loop()
+        try:
+            # Saving writes files, it runs in an executor thread like the token saves
+            if self._config_writer is not None:
+                await loop.run_in_executor(None, self._config_writer.flush)
+            if self._symbol_cache is not None:
+                await loop.run_in_executor(None, self._symbol_cache.flush)
+        finally:
+            if self._session is not None:
+                await self._session.close()
+                self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._connection_limit)
+            timeout = aiohttp.ClientTimeout(total=self._timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+
+    async def login(self) -> None:
+        """Obtains an access token if the client does not have one yet."""
+        if not self._access_token:
+            await self._refresh_access_token(self._token_generation)
+
+    async def _refresh_access_token(self, stale_generation: int) -> None:
+        """Refreshes the access token, once for all tasks that saw the same stale token generation."""
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        async with self._token_lock:
+            if stale_generation != self._token_generation:
+                return  # another task already refreshed the token
+            if self._token_broker is None:
+                await self._get_access_token()
+                await self._save_config_and_release()
+                return
+            # Waiting for another process' refresh and reading the shared config must not block the event loop
+            lock = self._token_broker.lock()
+            locked = asyncio.get_running_loop().run_in_executor(None, _lock_and_load, self._token_broker, lock)
+            try:
+                shared_config = await asyncio.shield(locked)
+            except asyncio.CancelledError:
+                # The executor thread still takes the lock, it is released as soon as it is held
+                locked.add_done_callback(functools.partial(_release_when_locked, lock))
+                raise
+            try:
+                adopted = self._adopt_shared_access_token(shared_config)
+                if not adopted:
+                    await self._get_access_token()
+            except BaseException:
+                lock.release()
+                raise
+            if adopted:
+                lock.release()
+            else:
+                # Other processes wait on the lock for the new tokens, they are saved before it is released
+                await self._save_config_and_release(lock)
+
+    async def _save_config_and_release(self, lock: Optional[FileLock] = None) -> None:
+        """Saves the config and then releases lock in an executor thread, even if the calling task is cancelled."""
+        if self._config_writer is None and lock is None:
+            return
+        loop = asyncio.get_running_loop()
+        await asyncio.shield(
+            loop.run_in_executor(None, _save_and_release, self._config_writer, dict(self._config), lock)
+        )
+
+    async def _get_access_token(self) -> None:
+        session = self._get_session()
+        async with session.get(self._get_refresh_token_url(), timeout=aiohttp.ClientTimeout(total=10)) as response:
+            response.raise_for_status()
+            text = await response.text()
+            access_token_data = await response.json(content_type=None)
+        self._set_access_token(access_token_data, text, save=False)
+
+    async def _make_request(
+        self,
+        request_path: str,
+        *,
+        method: str = "GET",
+        params: Optional[dict[str, Any]] = None,
+        json: Optional[dict[str, Any]] = None,
+    ) -> dict[str, Any]:
+        if method != "GET" or json is not None or not self._coalesce_requests:
+            data = await self._make_raw_request(request_path, method=method, params=params, json=json)
+            return decode_object(self._json_decoder, data)
+        key = _request_key(request_path, params)
+        fetch = self._in_flight.get(key)
+        if fetch is None:
+            fetch = self._in_flight[key] = asyncio.ensure_future(self._fetch_coalesced(key, request_path, params))
+        else:
+            self._coalesced_requests += 1
+        # The request runs in its own task, cancelling any of the tasks waiting for it does not cancel it for the others
+        # The response body is shared, every caller decodes its own objects and may modify them
+        return decode_object(self._json_decoder, await asyncio.shield(fetch))
+
+    async def _fetch_coalesced(
+        self, key: tuple[str, tuple[tuple[str, str], ...]], request_path: str, params: Optional[dict[str, Any]]
+    ) -> bytes:
+        try:
+            return await self._make_raw_request(request_path, params=params)
+        finally:
+            del self._in_flight[key]
+
+    async def _make_raw_request(
+        self,
+        request_path: str,
+        *,
+        method: str = "GET",
+        params: Optional[dict[str, Any]] = None,
+        json: Optional[dict[str, Any]] = None,
+    ) -> bytes:
+        """Sends an API request and returns the undecoded response body."""
+        if self._token_needs_refresh():
+            await self._refresh_access_token(self._token_generation)
+        session = self._get_session()
+        throttled = 0
+        reauthenticated = False
+        while True:
+            generation = self._token_generation
+            request_url = f"{self._api_server}/v1/{request_path}"
+            if self._rate_limiter is not None:
+                await self._rate_limiter.acquire_async(request_path)
+            async with session.request(
+                method, request_url, params=params, json=json, headers=self._get_auth_headers()
+            ) as response:
+                if self._rate_limiter is not None:
+                    self._rate_limiter.update(request_path, response.status, response.headers)
+                if response.status == 401 and not reauthenticated:
+                    reauthenticated = True
+                elif response.status == 429 and throttled < self.MAX_THROTTLED_RETRIES:
+                    if self._rate_limiter is None:
+                        await asyncio.sleep(throttled_delay(response.headers, throttled))
+                    throttled += 1
+                    continue
+                else:
+                    response.raise_for_status()
+                    data = await response.read()
+                    break
+            await self._refresh_access_token(generation)
+        return data
+
+    async def get_time(self) -> dt:
+        """Retrieves current server time. See QuestradeIQ.get_time()."""
+        response = await self._make_request("time")
+        if "time" not in response:
+            raise RuntimeError("Invalid respose received")
+        return dt.fromisoformat(response["time"])
+
+    async def get_accounts(self) -> list[AccountInfo]:
+        """Retrieves the accounts of the authorized user. See QuestradeIQ.get_accounts()."""
+        response = await self._make_request("accounts")
+        if "accounts" not in response:
+            raise RuntimeError("Invalid respose received")
+        return [AccountInfo(account) for account in response["accounts"]]
+
+    async def get_activities(
+        self, account_id: Union[str, AccountInfo], start_time: dt, end_time: dt
+    ) -> list[AccountActivity]:
+        """Retrieves activities for a specific account. See QuestradeIQ.get_activities()."""
+        query = {"startTime": start_time.isoformat(), "endTime": end_time.isoformat()}
+        response = await self._make_request(
+            f"accounts/{AccountInfo.get_account_number(account_id)}/activities", params=query
+        )
+        if "activities" not in response:
+            raise RuntimeError("Invalid respose received")
+        return [AccountActivity(activity) for activity in response["activities"]]
+
+    async def get_balances(self, account_id: Union[str, AccountInfo]) -> Balances:
+        """Retrieves per-currency and combined balances for an account. See QuestradeIQ.get_balances()."""
+        response = await self._make_request(f"accounts/{AccountInfo.get_account_number(account_id)}/balances")
+        if (
+            "perCurrencyBalances" not in response
+            or "combinedBalances" not in response
+            or "sodPerCurrencyBalances" not in response
+            or "sodCombinedBalances" not in response
+        ):
+            raise RuntimeError("Invalid respose received")
+        return Balances(response)
+
+    async def get_positions(self, account_id: Union[str, AccountInfo]) -> list[Position]:
+        """Retrieves positions in a specified account. See QuestradeIQ.get_positions()."""
+        response = await self._make_request(f"accounts/{AccountInfo.get_account_number(account_id)}/positions")
+        if "positions" not in response:
+            raise RuntimeError("Invalid respose received")
+        return [Position(position) for position in response["positions"]]
+
+    async def get_orders(
+        self,
+        account_id: Union[str, AccountInfo],
+        *,
+        start_time: Optional[dt] = None,
+        end_time: Optional[dt] = None,
+        state_filter: Optional[OrderStateFilter] = None,
+        lazy: bool = False,
+    ) -> list[Order]:
+        """Retrieves orders for specified account. See QuestradeIQ.get_orders()."""
+        query = _time_range_query(start_time, end_time)
+        if state_filter:
+            if not isinstance(state_filter, OrderStateFilter):
+                raise TypeError("Type of 'state_filter' must be OrderStateFilter")  # pragma: no cover
+            query["stateFilter"] = state_filter.name
+        response = await self._make_request(
+            f"accounts/{AccountInfo.get_account_number(account_id)}/orders", params=query
+        )
+        if "orders" not in response:
+            raise RuntimeError("Invalid respose received")
+        return [Order(order, lazy) for order in response["orders"]]
+
+    async def get_order(self, account_id: Union[str, AccountInfo], orderId: Union[str, int]) -> list[Order]:
+        """Retrieves a specific order for specified account. See QuestradeIQ.get_order()."""
+        response = await self._make_request(f"accounts/{AccountInfo.get_account_number(account_id)}/orders/{orderId}")
+        if "orders" not in response:
+            raise RuntimeError("Invalid respose received")
+        return [Order(order) for order in response["orders"]]
+
+    async def get_executions(
+        self,
+        account_id: Union[str, AccountInfo],
+        *,
+        start_time: Optional[dt] = None,
+        end_time: Optional[dt] = None,
+    ) -> list[Execution]:
+        """Retrieves executions for a specific account. See QuestradeIQ.get_executions()."""
+        query = _time_range_query(start_time, end_time)
+        response = await self._make_request(
+            f"accounts/{AccountInfo.get_account_number(account_id)}/executions", params=query
+        )
+        if "executions" not in response:
+            raise RuntimeError("Invalid respose received")
+        return [Execution(execution) for execution in response["executions"]]
+
+    async def get_portfolio_snapshot(self) -> PortfolioSnapshot:
+        """Retrieves all accounts with their symbols. See QuestradeIQ.get_portfolio_snapshot()."""
+        started = time.perf_counter()
+        snapshot_time = dt.now().astimezone()
+        accounts = await self.get_accounts()
+        accounts_done = time.perf_counter()
+        positions, balances, orders = await asyncio.gather(
+            asyncio.gather(*[self.get_positions(account) for account in accounts]),
+            asyncio.gather(*[self.get_balances(account) for account in accounts]),
+            asyncio.gather(*[self.get_orders(account, state_filter=OrderStateFilter.Open) for account in accounts]),
+        )
+        account_data = list(zip(positions, balances, orders))
+        account_data_done = time.perf_counter()
+
+        symbol_ids = _snapshot_symbol_ids(account_data)
+        symbols = {symbol.symbol_id: symbol for symbol in await self.get_tickers(symbol_ids)} if symbol_ids else {}
+        finished = time.perf_counter()
+        return PortfolioSnapshot(
+            snapshot_time,
+            [AccountSnapshot(account, *data) for account, data in zip(accounts, account_data)],
+            symbols,
+            {
+                "accounts": accounts_done - started,
+                "account_data": account_data_done - accounts_done,
+                "symbols": finished - account_data_done,
+                "total": finished - started,
+            },
+        )
+
+    async def get_tickers(
+        self,
+        tickers: Union[
+            list[str], set[str], str, list[Ticker], Ticker, list[TickerDetails], TickerDetails, list[int], set[int], int
+        ],
+        lazy: bool = False,
+    ) -> list[TickerDetails]:
+        """Retrieves detailed information about the given symbols. See QuestradeIQ.get_tickers()."""
+        symbols = await self._get_symbols(_ticker_list(tickers))
+        return [TickerDetails(symbol, lazy) for symbol in symbols]
+
+    async def _request_symbols(self, tickers: Sequence[Union[int, str]]) -> list[dict[str, Any]]:
+        async def request_chunk(chunk: list[Union[int, str]]) -> list[dict[str, Any]]:
+            response = await self._make_request("symbols", params=_symbols_query(chunk))
+            if "symbols" not in response:
+                raise RuntimeError("Invalid respose received")
+            symbols: list[dict[str, Any]] = response["symbols"]
+            return symbols
+
+        chunks = await asyncio.gather(*[request_chunk(chunk) for chunk in _chunks(tickers, self.MAX_IDS_PER_REQUEST)])
+        return [symbol for chunk in chunks for symbol in chunk]
+
+    async def _get_symbols(self, tickers: list[Union[int, str]]) -> list[dict[str, Any]]:
+        if self._symbol_cache is None:
+            return await self._request_symbols(tickers)
+        found, missing = self._symbol_cache.lookup(tickers)
+        fetched: list[dict[str, Any]] = []
+        if missing:
+            fetched = await self._request_symbols(missing)
+            self._symbol_cache.put(fetched)
+        return _order_symbols(tickers, found, fetched)
+
+    async def _resolve_symbol_ids(self, tickers: list[Union[int, str]]) -> list[int]:
+        resolved, unresolved = _cached_symbol_ids(tickers, self._symbol_cache)
+        fetched: list[dict[str, Any]] = []
+        if unresolved:
+            fetched = await self._request_symbols(unresolved)
+            if self._symbol_cache is not None:
+                self._symbol_cache.put(fetched)
+        return _resolved_symbol_ids(tickers, resolved, fetched)
+
+    async def search_for_symbols(self, prefix: str, offset: Optional[int] = None) -> list[Ticker]:
+        """Retrieves symbol(s) using several search criteria. See QuestradeIQ.search_for_symbols()."""
+        query = {"prefix": prefix}
+        if offset is not None:
+            query["offset"] = str(offset)
+        response = await self._make_request("symbols/search", params=query)
+        if "symbols" not in response:
+            raise RuntimeError("Invalid respose received")
+        return [Ticker(symbol) for symbol in response["symbols"]]
+
+    async def get_option_chain(self, ticker: Union[str, Ticker, TickerDetails, int]) -> dict[dt, ChainPerExpiryDate]:
+        """Retrieves an option chain for a particular underlying symbol. See QuestradeIQ.get_option_chain()."""
+        symbol_id = _single_ticker(ticker)
+        if isinstance(symbol_id, str):
+            symbol_id = (await self._resolve_symbol_ids([symbol_id]))[0]
+        if self._option_chain_cache is not None:
+            cached = self._option_chain_cache.get(symbol_id)
+            if cached is not None:
+                return cached
+        response = await self._make_request(f"symbols/{symbol_id}/options")
+        if "optionChain" not in response:
+            raise RuntimeError("Invalid respose received")
+        chain = {chain.expiry_date: chain for chain in [ChainPerExpiryDate(chain) for chain in response["optionChain"]]}
+        if self._option_chain_cache is not None:
+            self._option_chain_cache.put(symbol_id, chain)
+        return chain
+
+    async def get_quote(
+        self,
+        tickers: Union[
+            list[str], set[str], str, list[Ticker], Ticker, list[TickerDetails], TickerDetails, list[int], set[int], int
+        ],
+        *,
+        max_age: Optional[float] = None,
+    ) -> list[Level1Quote]:
+        """Retrieves a single Level 1 market data quote for one or more symbols. See QuestradeIQ.get_quote()."""
+        symbol_ids = await self._resolve_symbol_ids(_ticker_list(tickers))
+        found, missing = self._cached_quotes("quote", symbol_ids, max_age)
+
+        async def request_chunk(chunk: list[str]) -> list[dict[str, Any]]:
+            query: dict[str, str] = {}
+            if len(chunk):
+                query["ids"] = ",".join(chunk)
+            response = await self._make_request("markets/quotes", params=query)
+            if "quotes" not in response:
+                raise RuntimeError("Invalid respose received")
+            quotes: list[dict[str, Any]] = response["quotes"]
+            return quotes
+
+        fetched: list[dict[str, Any]] = []
+        if missing or not found:
+            id_chunks: list[list[str]] = _chunks([str(id) for id in missing], self.MAX_IDS_PER_REQUEST) or [[]]
+            chunks = await asyncio.gather(*[request_chunk(chunk) for chunk in id_chunks])
+            fetched = [quote for chunk in chunks for quote in chunk]
+        return [Level1Quote(quote) for quote in self._merge_quotes("quote", symbol_ids, found, fetched)]
+
+    async def _request_option_quotes(
+        self, ids: Union[int, list[int]], filters: Optional[list[OptionIdFilter]], max_age: Optional[float]
+    ) -> list[dict[str, Any]]:
+        query = _option_quotes_query(ids, filters)
+        if query is None:
+            return []
+        option_ids: list[int] = query["optionIds"]
+        found, missing = self._cached_quotes("option", option_ids, None if filters else max_age)
+
+        async def request_quotes(body: dict[str, Any]) -> list[dict[str, Any]]:
+            response = await self._make_request("markets/quotes/options", method="POST", json=body)
+            if "optionQuotes" not in response:
+                raise RuntimeError("Invalid respose received")
+            quotes: list[dict[str, Any]] = response["optionQuotes"]
+            return quotes
+
+        bodies = _option_quote_bodies(
+            missing, query.get("filters", []), self.MAX_IDS_PER_REQUEST, self.MAX_FILTERS_PER_REQUEST
+        )
+        fetched = [
+            quote for quotes in await asyncio.gather(*[request_quotes(body) for body in bodies]) for quote in quotes
+        ]
+        return _unique_quotes(self._merge_quotes("option", option_ids, found, fetched))
+
+    async def get_option_quotes(
+        self,
+        ids: Union[int, list[int]],
+        *,
+        filters: Optional[list[OptionIdFilter]] = None,
+        max_age: Optional[float] = None,
+    ) -> list[Level1OptionData]:
+        """Retrieves Level 1 quotes and Greeks for option symbols. See QuestradeIQ.get_option_quotes()."""
+        return [Level1OptionData(quote) for quote in await self._request_option_quotes(ids, filters, max_age)]
+
+    async def get_option_quotes_by_id(
+        self,
+        ids: Union[int, list[int]],
+        *,
+        filters: Optional[list[OptionIdFilter]] = None,
+        max_age: Optional[float] = None,
+    ) -> dict[int, Level1OptionData]:
+        """Retrieves option quotes keyed by option symbol id. See QuestradeIQ.get_option_quotes_by_id()."""
+        quotes = await self.get_option_quotes(ids, filters=filters, max_age=max_age)
+        return {quote.symbol_id: quote for quote in quotes}
+
+    async def get_chain_quotes(
+        self,
+        underlying: Union[str, Ticker, TickerDetails, int],
+        expiries: Union[int, list[dt], None] = None,
+        strike_range: Optional[tuple[float, float]] = None,
+        *,
+        use_numpy: bool = True,
+    ) -> OptionQuoteTable:
+        """Retrieves the quotes of an option chain as a columnar table. See QuestradeIQ.get_chain_quotes()."""
+        symbol_id = (await self._resolve_symbol_ids([_single_ticker(underlying)]))[0]
+        chain = await self.get_option_chain(symbol_id)
+        index = self._option_chain_cache.get_index(symbol_id) if self._option_chain_cache is not None else None
+        if index is None:
+            index = OptionChainIndex(chain)
+        selected = index.next_expiries(expiries) if isinstance(expiries, int) else expiries
+        low, high = (None, None) if strike_range is None else strike_range
+        filters = index.quote_filters(symbol_id, low, high, expiries=selected)
+        quotes = await self._request_option_quotes([], filters, None)
+        return OptionQuoteTable.from_raw(quotes, index.contracts(low, high, expiries=selected), use_numpy=use_numpy)
+
+    async def _request_strategy_quotes(self, query: dict[str, Any]) -> list[dict[str, Any]]:
+        response = await self._make_request("markets/quotes/strategies", method="POST", json=query)
+        if "strategyQuotes" not in response:
+            raise RuntimeError("Invalid respose received")
+        quotes: list[dict[str, Any]] = response["strategyQuotes"]
+        return quotes
+
+    async def _quote_strategy_batch(
+        self, variants: list[StrategyVariantRequest]
+    ) -> list[tuple[StrategyVariantRequest, Optional[StrategyVariantQuote]]]:
+        return _match_strategy_quotes(variants, await self._request_strategy_quotes(_numbered_strategy_query(variants)))
+
+    async def get_strategy_quotes(self, variants: list[StrategyVariantRequest]) -> list[StrategyVariantQuote]:
+        """Retrieves L1 quotes for multi-leg strategies. See QuestradeIQ.get_strategy_quotes()."""
+        query = _strategy_quotes_query(variants)
+        bodies = [{"variants": chunk} for chunk in _chunks(query["variants"], self.MAX_VARIANTS_PER_REQUEST)]
+        quotes = await asyncio.gather(*[self._request_strategy_quotes(body) for body in bodies])
+        return [StrategyVariantQuote(quote) for chunk in quotes for quote in chunk]
+
+    async def get_strategy_quotes_by_request(
+        self, variants: list[StrategyVariantRequest]
+    ) -> list[Optional[StrategyVariantQuote]]:
+        """Retrieves strategy quotes in the order of the variants. See QuestradeIQ.get_strategy_quotes_by_request()."""
+        _strategy_quotes_query(variants)
+        batches = await asyncio.gather(
+            *[self._quote_strategy_batch(batch) for batch in _chunks(variants, self.MAX_VARIANTS_PER_REQUEST)]
+        )
+        return [quote for batch in batches for _, quote in batch]
+
+    async def stream_strategy_quotes(
+        self, variants: list[StrategyVariantRequest]
+    ) -> AsyncIterator[tuple[StrategyVariantRequest, Optional[StrategyVariantQuote]]]:
+        """Yields strategy quotes as each request completes. See QuestradeIQ.stream_strategy_quotes()."""
+        _strategy_quotes_query(variants)
+        tasks = [
+            asyncio.ensure_future(self._quote_strategy_batch(batch))
+            for batch in _chunks(variants, self.MAX_VARIANTS_PER_REQUEST)
+        ]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                for pair in await completed:
+                    yield pair
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @overload
+    async def get_candles(
+        self,
+        ticker: Union[str, Ticker, TickerDetails, int],
+        interval: Granularity,
+        start_time: dt,
+        end_time: dt,
+        raw_data: bool = ...,
+        as_series: Literal[False] = ...,
+    ) -> Union[list[Candle], list[dict[str, Any]]]:
+        ...
+
+    @overload
+    async def get_candles(
+        self,
+        ticker: Union[str, Ticker, TickerDetails, int],
+        interval: Granularity,
+        start_time: dt,
+        end_time: dt,
+        raw_data: bool = ...,
+        *,
+        as_series: Literal[True],
+    ) -> CandleSeries:
+        ...
+
+    async def get_candles(
+        self,
+        ticker: Union[str, Ticker, TickerDetails, int],
+        interval: Granularity,
+        start_time: dt,
+        end_time: dt,
+        raw_data: bool = False,
+        as_series: bool = False,
+    ) -> Union[list[Candle], list[dict[str, Any]], CandleSeries]:
+        """Retrieves historical OHLC candlesticks for a specified symbol. See QuestradeIQ.get_candles()."""
+        id = _single_ticker(ticker)
+        if isinstance(id, str):
+            id = (await self._resolve_symbol_ids([id]))[0]
+
+        async def get_window(window: tuple[dt, dt]) -> list[dict[str, Any]]:
+            query = {
+                "startTime": window[0].isoformat(),
+                "endTime": window[1].isoformat(),
+                "interval": interval.name,
+            }
+            response = await self._make_request(f"markets/candles/{id}", params=query)
+            if "candles" not in response:
+                raise RuntimeError("Invalid respose received")  # pragma: no cover
+            candles: list[dict[str, Any]] = response["candles"]
+            return candles
+
+        windows = _candle_windows(start_time, end_time, interval, self.MAX_CANDLES_PER_REQUEST)
+        candles = _merge_candle_windows(list(await asyncio.gather(*[get_window(window) for window in windows])))
+        if as_series:
+            return CandleSeries.from_raw(candles)
+        return candles if raw_data else [Candle(candle) for candle in candles]
+
+    async def setup_streaming_notifications(self, socket_mode: SocketMode) -> int:
+        """Retrieves the port number used for notification streaming."""
+        query = {"mode": socket_mode.name}
+        response = await self._make_request("notifications", params=query)
+        if "streamPort" not in response:
+            raise RuntimeError("Invalid respose received")  # pragma: no cover
+        return int(response["streamPort"])
+
+    async def setup_streaming_quotes(self, ids: list[int], socket_mode: SocketMode) -> int:
+        """Retrieves the port number used for L1 quote streaming. See QuestradeIQ.setup_streaming_quotes()."""
+        query = _streaming_quotes_query(ids, socket_mode, self.MAX_IDS_PER_REQUEST)
+        response = await self._make_request("markets/quotes", params=query)
+        if "streamPort" not in response:
+            raise RuntimeError("Invalid respose received")  # pragma: no cover
+        return int(response["streamPort"])
+
+    async def setup_streaming_quotes_batched(self, ids: list[int], socket_mode: SocketMode) -> list[int]:
+        """Retrieves one L1 quote streaming port per chunk of ids. See QuestradeIQ.setup_streaming_quotes_batched()."""
+        chunks = _chunks(ids, self.MAX_IDS_PER_REQUEST)
+        return list(await asyncio.gather(*[self.setup_streaming_quotes(chunk, socket_mode) for chunk in chunks]))
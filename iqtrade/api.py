@@ -1,13 +1,51 @@
 from __future__ import annotations
 
 import json
+import logging
+import math
 import re
+import threading
+import time
 import urllib.parse
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from datetime import datetime as dt
+from datetime import timedelta
 from enum import Enum
-from typing import Any, Optional, Union
+from functools import lru_cache
+from operator import itemgetter
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ClassVar,
+    Generator,
+    Iterator,
+    Literal,
+    Optional,
+    Sequence,
+    TypeVar,
+    Union,
+    overload,
+)
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from .broker import TokenBroker
+from .cache import OptionChainCache, QuoteCache, SymbolCache
+from .decoder import JsonDecoder, decode_object, get_decoder
+from .ratelimit import RateLimitCategory, RateLimiter, RateLimitStatus, throttled_delay
+from .storage import ConfigWriter
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .candles import CandleSeries
+    from .options import OptionQuoteTable
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
 
 
 class Currency(Enum):
@@ -63,30 +101,9 @@ class ClientAccountType(Enum):
     @staticmethod
     def from_string(account_type: str) -> ClientAccountType:
         account_type = account_type.replace(" ", "").lower()
-        if account_type == "individual":
-            return ClientAccountType.Individual
-        elif account_type == "joint":
-            return ClientAccountType.Joint
-        elif account_type == "informaltrust":
-            return ClientAccountType.InformalTrust
-        elif account_type == "corporation":
-            return ClientAccountType.Corporation
-        elif account_type == "investmentclub":
-            return ClientAccountType.InvestmentClub
-        elif account_type == "formaltrust":
-            return ClientAccountType.FormalTrust
-        elif account_type == "partnership":
-            return ClientAccountType.Partnership
-        elif account_type == "soleproprietorship":
-            return ClientAccountType.SoleProprietorship
-        elif account_type == "family":
-            return ClientAccountType.Family
-        elif account_type == "jointandinformaltrust":
-            return ClientAccountType.JointAndInformalTrust
-        elif account_type == "institution":
-            return ClientAccountType.Institution
-        else:
+        if account_type not in _CLIENT_ACCOUNT_TYPES:
             raise ValueError('Unknown account_type "' + account_type + '"')  # pragma: no cover
+        return _CLIENT_ACCOUNT_TYPES[account_type]
 
 
 class TickType(Enum):
@@ -209,6 +226,30 @@ class Granularity(Enum):
     OneMonth = 15
     OneYear = 16
 
+    def min_duration(self) -> timedelta:
+        """Returns the shortest time span a single candle of this granularity can cover."""
+        return _GRANULARITY_MIN_DURATION[self]
+
+
+_GRANULARITY_MIN_DURATION = {
+    Granularity.OneMinute: timedelta(minutes=1),
+    Granularity.TwoMinutes: timedelta(minutes=2),
+    Granularity.ThreeMinutes: timedelta(minutes=3),
+    Granularity.FourMinutes: timedelta(minutes=4),
+    Granularity.FiveMinutes: timedelta(minutes=5),
+    Granularity.TenMinutes: timedelta(minutes=10),
+    Granularity.FifteenMinutes: timedelta(minutes=15),
+    Granularity.TwentyMinutes: timedelta(minutes=20),
+    Granularity.HalfHour: timedelta(minutes=30),
+    Granularity.OneHour: timedelta(hours=1),
+    Granularity.TwoHours: timedelta(hours=2),
+    Granularity.FourHours: timedelta(hours=4),
+    Granularity.OneDay: timedelta(days=1),
+    Granularity.OneWeek: timedelta(weeks=1),
+    Granularity.OneMonth: timedelta(days=28),
+    Granularity.OneYear: timedelta(days=365),
+}
+
 
 class OrderClass(Enum):
     Invalid = 0
@@ -242,10 +283,85 @@ class SocketMode(Enum):
     WebSocket = 1
 
 
+E = TypeVar("E", bound=Enum)
+
+
+def _enum_names(enum_type: type[E]) -> dict[Optional[str], E]:
+    """Maps the names of the members of enum_type to the members, and None to the Invalid member if there is one.
+
+    Looking up a dict is several times faster than Enum.__getitem__, which goes through the metaclass.
+    """
+    names: dict[Optional[str], E] = {member.name: member for member in enum_type}
+    if "Invalid" in names:
+        names[None] = names["Invalid"]
+    return names
+
+
+_CURRENCIES = _enum_names(Currency)
+_LISTING_EXCHANGES = _enum_names(ListingExchange)
+_ACCOUNT_TYPES = _enum_names(AccountType)
+_CLIENT_ACCOUNT_TYPES = {member.name.lower(): member for member in ClientAccountType}
+_TICK_TYPES = _enum_names(TickType)
+_OPTION_TYPES = _enum_names(OptionType)
+_OPTION_DURATION_TYPES = _enum_names(OptionDurationType)
+_OPTION_EXERCISE_TYPES = _enum_names(OptionExerciseType)
+_SECURITY_TYPES = _enum_names(SecurityType)
+_ORDER_SIDES = _enum_names(OrderSide)
+_ORDER_TYPES = _enum_names(OrderType)
+_ORDER_TIMES_IN_FORCE = _enum_names(OrderTimeInForce)
+_ORDER_STATES = _enum_names(OrderState)
+_ORDER_CLASSES = _enum_names(OrderClass)
+_STRATEGY_TYPES = _enum_names(StrategyType)
+
+
+@lru_cache(maxsize=4096)
+def _parse_datetime(value: str) -> dt:
+    """Parses an ISO 8601 timestamp.
+
+    Responses repeat the same timestamps (trade dates, candle boundaries, expiry dates), so the parsed values are
+    memoized. datetime objects are immutable, sharing them between models is safe.
+    """
+    return dt.fromisoformat(value)
+
+
+def _optional_datetime(value: Optional[str]) -> Optional[dt]:
+    return None if value is None else _parse_datetime(value)
+
+
+class LazyModel:
+    """Base of the models that can be built in lazy mode.
+
+    A model built with lazy=True only keeps a reference to the API payload. Each attribute is decoded by the
+    function _LAZY_FIELDS maps it to the first time it is read and is then stored like in an eagerly built model.
+    Lazy models are much cheaper to build when only a few attributes of each are read, e.g. the symbol ids and
+    currencies of a bulk symbol fetch; reading every attribute of a lazy model costs more than eager decoding.
+    """
+
+    __slots__ = ("_iq_data",)
+
+    _LAZY_FIELDS: ClassVar[dict[str, Callable[[dict[str, Any]], Any]]] = {}
+
+    if not TYPE_CHECKING:
+
+        def __getattr__(self, name: str) -> Any:
+            # Only called for attributes not set yet
+            decode = self._LAZY_FIELDS.get(name)
+            if decode is None:
+                raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+            value = decode(self._iq_data)
+            setattr(self, name, value)
+            return value
+
+    def is_lazy(self) -> bool:
+        return hasattr(self, "_iq_data")
+
+
 class AccountInfo:
+    __slots__ = ("number", "type", "status", "is_rimary", "is_billing", "client_account_type")
+
     def __init__(self, iq_data: dict[str, Any]):
         self.number: str = iq_data["number"]
-        self.type: AccountType = AccountType[iq_data["type"]]
+        self.type: AccountType = _ACCOUNT_TYPES[iq_data["type"]]
         self.status: str = iq_data["status"]
         self.is_rimary: bool = iq_data["isPrimary"]
         self.is_billing: bool = iq_data["isBilling"]
@@ -270,15 +386,32 @@ class AccountInfo:
 
 
 class AccountActivity:
+    __slots__ = (
+        "trade_date",
+        "transaction_date",
+        "settlement_date",
+        "action",
+        "ticker",
+        "symbol_id",
+        "description",
+        "currency",
+        "quantity",
+        "price",
+        "gross_amount",
+        "commission",
+        "net_amount",
+        "activity_type",
+    )
+
     def __init__(self, iq_data: dict[str, Any]):
-        self.trade_date: dt = dt.fromisoformat(iq_data["tradeDate"])
-        self.transaction_date: dt = dt.fromisoformat(iq_data["transactionDate"])
-        self.settlement_date: dt = dt.fromisoformat(iq_data["settlementDate"])
+        self.trade_date: dt = _parse_datetime(iq_data["tradeDate"])
+        self.transaction_date: dt = _parse_datetime(iq_data["transactionDate"])
+        self.settlement_date: dt = _parse_datetime(iq_data["settlementDate"])
         self.action: str = iq_data["action"]
         self.ticker: str = iq_data["symbol"]
         self.symbol_id: int = iq_data["symbolId"]
         self.description: str = iq_data["description"]
-        self.currency: Currency = Currency[iq_data["currency"]]
+        self.currency: Currency = _CURRENCIES[iq_data["currency"]]
         self.quantity: float = iq_data["quantity"]
         self.price: float = iq_data["price"]
         self.gross_amount: float = iq_data["grossAmount"]
@@ -311,8 +444,18 @@ class AccountActivity:
 
 
 class Balance:
+    __slots__ = (
+        "currency",
+        "cash",
+        "market_value",
+        "total_equity",
+        "buying_power",
+        "maintenance_excess",
+        "is_real_time",
+    )
+
     def __init__(self, iq_data: dict[str, Any]):
-        self.currency: Currency = Currency[iq_data["currency"]]
+        self.currency: Currency = _CURRENCIES[iq_data["currency"]]
         self.cash: float = iq_data["cash"]
         self.market_value: float = iq_data["marketValue"]
         self.total_equity: float = iq_data["totalEquity"]
@@ -328,6 +471,8 @@ class Balance:
 
 
 class Balances:
+    __slots__ = ("combined_balances", "per_currency_balances", "sod_per_currency_balances", "sod_combined_balances")
+
     def __init__(self, iq_data: dict[str, list[dict[str, Any]]]):
         self.combined_balances = [Balance(x) for x in iq_data["combinedBalances"]]
         self.per_currency_balances = [Balance(x) for x in iq_data["perCurrencyBalances"]]
@@ -342,6 +487,22 @@ class Balances:
 
 
 class Position:
+    __slots__ = (
+        "ticker",
+        "symbol_id",
+        "open_quantity",
+        "closed_quantity",
+        "current_market_value",
+        "current_price",
+        "average_entry_price",
+        "closed_pnl",
+        "open_pnl",
+        "day_pnl",
+        "total_cost",
+        "is_real_time",
+        "is_under_reorg",
+    )
+
     def __init__(self, iq_data: dict[str, Any]):
         self.ticker: str = iq_data["symbol"]
         self.symbol_id: int = iq_data["symbolId"]
@@ -372,6 +533,8 @@ class Position:
 
 
 class UnderlyingMultiplierPair:
+    __slots__ = ("multiplier", "underlying_symbol", "underlying_symbol_id")
+
     def __init__(self, iq_data: dict[str, Any]):
         self.multiplier: int = iq_data["multiplier"]
         self.underlying_symbol: str = iq_data["underlyingSymbol"]
@@ -379,6 +542,8 @@ class UnderlyingMultiplierPair:
 
 
 class OptionContractDeliverables:
+    __slots__ = ("underlyings", "cash_in_lieu")
+
     def __init__(self, iq_data: dict[str, Any]):
         self.underlyings: list[UnderlyingMultiplierPair] = [
             UnderlyingMultiplierPair(pair) for pair in iq_data["underlyings"]
@@ -387,13 +552,96 @@ class OptionContractDeliverables:
 
 
 class MinTickData:
+    __slots__ = ("pivot", "min_tick")
+
     def __init__(self, iq_data: dict[str, Any]):
         self.pivot: float = iq_data["pivot"]
         self.min_tick: float = iq_data["minTick"]
 
 
-class TickerDetails:
-    def __init__(self, iq_data: dict[str, Any]):
+class TickerDetails(LazyModel):
+    __slots__ = (
+        "ticker",
+        "symbol_id",
+        "prev_day_close_price",
+        "high_price_52",
+        "low_price_52",
+        "average_vol_3_months",
+        "average_vol_20_days",
+        "outstanding_shares",
+        "eps",
+        "pe",
+        "dividend",
+        "div_yield",
+        "ex_date",
+        "market_cap",
+        "option_type",
+        "option_durationType",
+        "option_root",
+        "option_contract_deliverables",
+        "min_ticks",
+        "option_exercise_type",
+        "listing_exchange",
+        "description",
+        "security_type",
+        "option_expiry_date",
+        "dividend_date",
+        "option_strike_price",
+        "is_quotable",
+        "has_options",
+        "currency",
+        "industry_sector",
+        "industry_group",
+        "industry_subgroup",
+    )
+
+    _LAZY_FIELDS = {
+        "ticker": itemgetter("symbol"),
+        "symbol_id": itemgetter("symbolId"),
+        "prev_day_close_price": itemgetter("prevDayClosePrice"),
+        "high_price_52": itemgetter("highPrice52"),
+        "low_price_52": itemgetter("lowPrice52"),
+        "average_vol_3_months": itemgetter("averageVol3Months"),
+        "average_vol_20_days": itemgetter("averageVol20Days"),
+        "outstanding_shares": itemgetter("outstandingShares"),
+        "eps": itemgetter("eps"),
+        "pe": itemgetter("pe"),
+        "dividend": itemgetter("dividend"),
+        "div_yield": itemgetter("yield"),
+        "ex_date": lambda iq_data: _optional_datetime(iq_data["exDate"]),
+        "market_cap": itemgetter("marketCap"),
+        "option_type": lambda iq_data: _OPTION_TYPES[iq_data["optionType"]],
+        "option_durationType": lambda iq_data: _OPTION_DURATION_TYPES[iq_data["optionDurationType"]],
+        "option_root": itemgetter("optionRoot"),
+        "option_contract_deliverables": lambda iq_data: OptionContractDeliverables(
+            iq_data["optionContractDeliverables"]
+        ),
+        "min_ticks": lambda iq_data: [MinTickData(x) for x in iq_data["minTicks"]],
+        "option_exercise_type": lambda iq_data: _OPTION_EXERCISE_TYPES[iq_data["optionExerciseType"]],
+        "listing_exchange": lambda iq_data: _LISTING_EXCHANGES[iq_data["listingExchange"]],
+        "description": itemgetter("description"),
+        "security_type": lambda iq_data: _SECURITY_TYPES[iq_data["securityType"]],
+        "option_expiry_date": lambda iq_data: _optional_datetime(iq_data["optionExpiryDate"]),
+        "dividend_date": lambda iq_data: _optional_datetime(iq_data["dividendDate"]),
+        "option_strike_price": itemgetter("optionStrikePrice"),
+        "is_quotable": itemgetter("isQuotable"),
+        "has_options": itemgetter("hasOptions"),
+        "currency": lambda iq_data: _CURRENCIES[iq_data["currency"]],
+        "industry_sector": itemgetter("industrySector"),
+        "industry_group": itemgetter("industryGroup"),
+        "industry_subgroup": itemgetter("industrySubgroup"),
+    }
+
+    def __init__(self, iq_data: dict[str, Any], lazy: bool = False):
+        """Constructor
+
+        Args:
+            iq_data: Symbol as received from the API.
+            lazy: Decode each attribute the first time it is read instead of all of them now.
+        """
+        if lazy:
+            self._iq_data = iq_data
+            return
         self.ticker: str = iq_data["symbol"]
         self.symbol_id: int = iq_data["symbolId"]
         self.prev_day_close_price: float = iq_data["prevDayClosePrice"]
@@ -406,37 +654,25 @@ class TickerDetails:
         self.pe: float = iq_data["pe"]
         self.dividend: float = iq_data["dividend"]
         self.div_yield: float = iq_data["yield"]
-        self.ex_date: Optional[dt] = None
-        if not iq_data["exDate"] is None:
-            self.ex_date = dt.fromisoformat(iq_data["exDate"])
+        self.ex_date: Optional[dt] = _optional_datetime(iq_data["exDate"])
         self.market_cap: float = iq_data["marketCap"]
-        self.option_type: OptionType = OptionType.Invalid
-        if iq_data["optionType"] is not None:
-            self.option_type = OptionType[iq_data["optionType"]]
-        self.option_durationType: OptionDurationType = OptionDurationType.Invalid
-        if iq_data["optionDurationType"] is not None:
-            self.option_durationType = OptionDurationType[iq_data["optionDurationType"]]
+        self.option_type: OptionType = _OPTION_TYPES[iq_data["optionType"]]
+        self.option_durationType: OptionDurationType = _OPTION_DURATION_TYPES[iq_data["optionDurationType"]]
         self.option_root: str = iq_data["optionRoot"]
         self.option_contract_deliverables: OptionContractDeliverables = OptionContractDeliverables(
             iq_data["optionContractDeliverables"]
         )
         self.min_ticks: list[MinTickData] = [MinTickData(x) for x in iq_data["minTicks"]]
-        self.option_exercise_type: OptionExerciseType = OptionExerciseType.Invalid
-        if iq_data["optionExerciseType"] is not None:
-            self.option_exercise_type = OptionExerciseType[iq_data["optionExerciseType"]]
-        self.listing_exchange: ListingExchange = ListingExchange[iq_data["listingExchange"]]
+        self.option_exercise_type: OptionExerciseType = _OPTION_EXERCISE_TYPES[iq_data["optionExerciseType"]]
+        self.listing_exchange: ListingExchange = _LISTING_EXCHANGES[iq_data["listingExchange"]]
         self.description: str = iq_data["description"]
-        self.security_type: SecurityType = SecurityType[iq_data["securityType"]]
-        self.option_expiry_date: Optional[dt] = None
-        if not iq_data["optionExpiryDate"] is None:
-            self.option_expiry_date = dt.fromisoformat(iq_data["optionExpiryDate"])
-        self.dividend_date: Optional[dt] = None
-        if not iq_data["dividendDate"] is None:
-            self.dividend_date = dt.fromisoformat(iq_data["dividendDate"])
+        self.security_type: SecurityType = _SECURITY_TYPES[iq_data["securityType"]]
+        self.option_expiry_date: Optional[dt] = _optional_datetime(iq_data["optionExpiryDate"])
+        self.dividend_date: Optional[dt] = _optional_datetime(iq_data["dividendDate"])
         self.option_strike_price: float = iq_data["optionStrikePrice"]
         self.is_quotable: bool = iq_data["isQuotable"]
         self.has_options: bool = iq_data["hasOptions"]
-        self.currency: Currency = Currency[iq_data["currency"]]
+        self.currency: Currency = _CURRENCIES[iq_data["currency"]]
         self.industry_sector: str = iq_data["industrySector"]
         self.industry_group: str = iq_data["industryGroup"]
         self.industry_subgroup: str = iq_data["industrySubgroup"]
@@ -466,12 +702,14 @@ class TickerDetails:
 
 
 class OrderLeg:
+    __slots__ = ("leg_id", "ticker", "symbol_id", "leg_ratio_quantity", "side", "avg_exec_price", "last_exec_price")
+
     def __init__(self, iq_data: dict[str, Any]):
         self.leg_id: int = iq_data["legId"]
         self.ticker: str = iq_data["symbol"]
         self.symbol_id: int = iq_data["symbolId"]
         self.leg_ratio_quantity: int = iq_data["legRatioQuantity"]
-        self.side: OrderSide = OrderSide[iq_data["side"]]
+        self.side: OrderSide = _ORDER_SIDES[iq_data["side"]]
         self.avg_exec_price: float = iq_data["avgExecPrice"]
         self.last_exec_price: float = iq_data["lastExecPrice"]
 
@@ -482,8 +720,101 @@ class OrderLeg:
         return self.__str__()
 
 
-class Order:
-    def __init__(self, iq_data: dict[str, Any]):
+class Order(LazyModel):
+    __slots__ = (
+        "order_id",
+        "ticker",
+        "symbol_id",
+        "total_quantity",
+        "open_quantity",
+        "filled_quantity",
+        "canceled_quantity",
+        "side",
+        "order_type",
+        "limit_price",
+        "stop_price",
+        "is_all_or_none",
+        "is_anonymous",
+        "iceberg_quantity",
+        "min_quantity",
+        "avg_exec_price",
+        "last_exec_price",
+        "source",
+        "time_in_force",
+        "gtd_date",
+        "order_state",
+        "client_reason_str",
+        "chain_id",
+        "creation_time",
+        "update_time",
+        "notes",
+        "primary_route",
+        "secondary_route",
+        "order_route",
+        "venue_holding_order",
+        "commission_charged",
+        "exchange_order_id",
+        "is_limit_offset_in_dollar",
+        "placement_commission",
+        "legs",
+        "strategy_type",
+        "trigger_stop_price",
+        "order_group_id",
+        "order_class",
+    )
+
+    _LAZY_FIELDS = {
+        "order_id": itemgetter("id"),
+        "ticker": itemgetter("symbol"),
+        "symbol_id": itemgetter("symbolId"),
+        "total_quantity": itemgetter("totalQuantity"),
+        "open_quantity": itemgetter("openQuantity"),
+        "filled_quantity": itemgetter("filledQuantity"),
+        "canceled_quantity": itemgetter("canceledQuantity"),
+        "side": lambda iq_data: _ORDER_SIDES[iq_data["side"]],
+        "order_type": lambda iq_data: _ORDER_TYPES[iq_data["orderType"]],
+        "limit_price": itemgetter("limitPrice"),
+        "stop_price": itemgetter("stopPrice"),
+        "is_all_or_none": itemgetter("isAllOrNone"),
+        "is_anonymous": itemgetter("isAnonymous"),
+        "iceberg_quantity": lambda iq_data: iq_data.get("icebergQuantity") or 0,
+        "min_quantity": itemgetter("minQuantity"),
+        "avg_exec_price": itemgetter("avgExecPrice"),
+        "last_exec_price": itemgetter("lastExecPrice"),
+        "source": itemgetter("source"),
+        "time_in_force": lambda iq_data: _ORDER_TIMES_IN_FORCE[iq_data["timeInForce"]],
+        "gtd_date": lambda iq_data: _optional_datetime(iq_data["gtdDate"]),
+        "order_state": lambda iq_data: _ORDER_STATES[iq_data["state"]],
+        "client_reason_str": lambda iq_data: iq_data.get("clientReasonStr", ""),
+        "chain_id": itemgetter("chainId"),
+        "creation_time": lambda iq_data: _parse_datetime(iq_data["creationTime"]),
+        "update_time": lambda iq_data: _parse_datetime(iq_data["updateTime"]),
+        "notes": itemgetter("notes"),
+        "primary_route": itemgetter("primaryRoute"),
+        "secondary_route": itemgetter("secondaryRoute"),
+        "order_route": itemgetter("orderRoute"),
+        "venue_holding_order": itemgetter("venueHoldingOrder"),
+        "commission_charged": itemgetter("comissionCharged"),  # sic
+        "exchange_order_id": itemgetter("exchangeOrderId"),
+        "is_limit_offset_in_dollar": itemgetter("isLimitOffsetInDollar"),
+        "placement_commission": itemgetter("placementCommission"),
+        "legs": lambda iq_data: [OrderLeg(leg) for leg in iq_data["legs"]],
+        "strategy_type": lambda iq_data: _STRATEGY_TYPES[iq_data["strategyType"]],
+        "trigger_stop_price": itemgetter("triggerStopPrice"),
+        "order_group_id": itemgetter("orderGroupId"),
+        "order_class": lambda iq_data: _ORDER_CLASSES[iq_data["orderClass"]],
+    }
+
+    def __init__(self, iq_data: dict[str, Any], lazy: bool = False):
+        """Constructor
+
+        Args:
+            iq_data: Order as received from the API.
+            lazy: Decode each attribute the first time it is read instead of all of them now.
+        """
+        if lazy:
+            self._iq_data = iq_data
+            return
         self.order_id: int = iq_data["id"]
         self.ticker: str = iq_data["symbol"]
         self.symbol_id: int = iq_data["symbolId"]
@@ -491,8 +822,8 @@ class Order:
         self.open_quantity: int = iq_data["openQuantity"]
         self.filled_quantity: int = iq_data["filledQuantity"]
         self.canceled_quantity: int = iq_data["canceledQuantity"]
-        self.side: OrderSide = OrderSide[iq_data["side"]]
-        self.order_type: OrderType = OrderType[iq_data["orderType"]]
+        self.side: OrderSide = _ORDER_SIDES[iq_data["side"]]
+        self.order_type: OrderType = _ORDER_TYPES[iq_data["orderType"]]
         self.limit_price: float = iq_data["limitPrice"]
         self.stop_price: float = iq_data["stopPrice"]
         self.is_all_or_none: bool = iq_data["isAllOrNone"]
@@ -504,17 +835,15 @@ class Order:
         self.avg_exec_price: float = iq_data["avgExecPrice"]
         self.last_exec_price: float = iq_data["lastExecPrice"]
         self.source: str = iq_data["source"]
-        self.time_in_force: OrderTimeInForce = OrderTimeInForce[iq_data["timeInForce"]]
-        self.gtd_date: Optional[dt] = None
-        if not iq_data["gtdDate"] is None:
-            self.gtd_date = dt.fromisoformat(iq_data["gtdDate"])
-        self.order_state: OrderState = OrderState[iq_data["state"]]
+        self.time_in_force: OrderTimeInForce = _ORDER_TIMES_IN_FORCE[iq_data["timeInForce"]]
+        self.gtd_date: Optional[dt] = _optional_datetime(iq_data["gtdDate"])
+        self.order_state: OrderState = _ORDER_STATES[iq_data["state"]]
         self.client_reason_str: str = ""
         if "clientReasonStr" in iq_data:
             self.client_reason_str = iq_data["clientReasonStr"]
         self.chain_id: int = iq_data["chainId"]
-        self.creation_time: dt = dt.fromisoformat(iq_data["creationTime"])
-        self.update_time: dt = dt.fromisoformat(iq_data["updateTime"])
+        self.creation_time: dt = _parse_datetime(iq_data["creationTime"])
+        self.update_time: dt = _parse_datetime(iq_data["updateTime"])
         self.notes: str = iq_data["notes"]
         self.primary_route: str = iq_data["primaryRoute"]
         self.secondary_route: str = iq_data["secondaryRoute"]
@@ -525,12 +854,10 @@ class Order:
         self.is_limit_offset_in_dollar: bool = iq_data["isLimitOffsetInDollar"]
         self.placement_commission: float = iq_data["placementCommission"]
         self.legs: list[OrderLeg] = [OrderLeg(leg) for leg in iq_data["legs"]]
-        self.strategy_type: StrategyType = StrategyType[iq_data["strategyType"]]
+        self.strategy_type: StrategyType = _STRATEGY_TYPES[iq_data["strategyType"]]
         self.trigger_stop_price: float = iq_data["triggerStopPrice"]
         self.order_group_id: int = iq_data["orderGroupId"]
-        self.order_class: OrderClass = OrderClass.Invalid
-        if iq_data["orderClass"] is not None:
-            self.order_class = OrderClass[iq_data["orderClass"]]
+        self.order_class: OrderClass = _ORDER_CLASSES[iq_data["orderClass"]]
 
     def __str__(self) -> str:  # pragma: no cover
         price = "<unknown>"
@@ -576,17 +903,39 @@ class Order:
 
 
 class Execution:
+    __slots__ = (
+        "execution_id",
+        "ticker",
+        "symbol_id",
+        "quantity",
+        "side",
+        "price",
+        "order_id",
+        "order_chain_id",
+        "exchange_exec_id",
+        "timestamp",
+        "notes",
+        "venue",
+        "total_cost",
+        "order_placement_commission",
+        "commission",
+        "execution_fee",
+        "sec_fee",
+        "canadian_execution_fee",
+        "parent_id",
+    )
+
     def __init__(self, iq_data: dict[str, Any]):
         self.execution_id: int = iq_data["id"]
         self.ticker: str = iq_data["symbol"]
         self.symbol_id: int = iq_data["symbolId"]
         self.quantity: int = iq_data["quantity"]
-        self.side: OrderSide = OrderSide[iq_data["side"]]
+        self.side: OrderSide = _ORDER_SIDES[iq_data["side"]]
         self.price: float = iq_data["price"]
         self.order_id: int = iq_data["orderId"]
         self.order_chain_id: int = iq_data["orderChainId"]
         self.exchange_exec_id: str = iq_data["exchangeExecId"]
-        self.timestamp: dt = dt.fromisoformat(iq_data["timestamp"])
+        self.timestamp: dt = _parse_datetime(iq_data["timestamp"])
         self.notes: str = iq_data["notes"]
         self.venue: str = iq_data["venue"]
         self.total_cost: float = iq_data["totalCost"]
@@ -605,15 +954,26 @@ class Execution:
 
 
 class Ticker:
+    __slots__ = (
+        "ticker",
+        "symbol_id",
+        "description",
+        "security_type",
+        "listing_exchange",
+        "is_quotable",
+        "is_tradable",
+        "currency",
+    )
+
     def __init__(self, iq_data: dict[str, Any]):
         self.ticker: str = iq_data["symbol"]
         self.symbol_id: int = iq_data["symbolId"]
         self.description: str = iq_data["description"]
-        self.security_type: SecurityType = SecurityType[iq_data["securityType"]]
-        self.listing_exchange: ListingExchange = ListingExchange[iq_data["listingExchange"]]
+        self.security_type: SecurityType = _SECURITY_TYPES[iq_data["securityType"]]
+        self.listing_exchange: ListingExchange = _LISTING_EXCHANGES[iq_data["listingExchange"]]
         self.is_quotable: bool = iq_data["isQuotable"]
         self.is_tradable: bool = iq_data["isTradable"]
-        self.currency: Currency = Currency[iq_data["currency"]]
+        self.currency: Currency = _CURRENCIES[iq_data["currency"]]
 
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.listing_exchange}:{self.ticker} - {self.description}"
@@ -623,6 +983,27 @@ class Ticker:
 
 
 class Level1Quote:
+    __slots__ = (
+        "ticker",
+        "symbol_id",
+        "tier",
+        "bid_price",
+        "bid_size",
+        "ask_price",
+        "ask_size",
+        "last_trade_tr_hrs",
+        "last_trade_price",
+        "last_trade_size",
+        "last_trade_tick",
+        "volume",
+        "vwap",
+        "open_price",
+        "high_price",
+        "low_price",
+        "is_delayed",
+        "is_halted",
+    )
+
     def __init__(self, iq_data: dict[str, Any]):
         self.ticker: str = iq_data["symbol"]
         self.symbol_id: int = iq_data["symbolId"]
@@ -636,7 +1017,7 @@ class Level1Quote:
         self.last_trade_tr_hrs: float = iq_data["lastTradePriceTrHrs"]
         self.last_trade_price: float = iq_data["lastTradePrice"]
         self.last_trade_size: int = iq_data["lastTradeSize"]
-        self.last_trade_tick: TickType = TickType[iq_data["lastTradeTick"]]
+        self.last_trade_tick: TickType = _TICK_TYPES[iq_data["lastTradeTick"]]
         self.volume: int = iq_data["volume"]
         self.vwap: Optional[int] = None
         if "VWAP" in iq_data:
@@ -668,6 +1049,8 @@ class Level1Quote:
 
 
 class Level1OptionData(Level1Quote):
+    __slots__ = ("underlying", "underlying_id", "volatility", "delta", "gamma", "theta", "vega", "rho", "open_interest")
+
     def __init__(self, iq_data: dict[str, Any]):
         super().__init__(iq_data)
         self.underlying: str = iq_data["underlying"]
@@ -694,6 +1077,8 @@ class Level1OptionData(Level1Quote):
 
 
 class ChainPerStrikePrice:
+    __slots__ = ("strike_price", "call_symbol_id", "put_symbol_id")
+
     def __init__(self, iq_data: dict[str, Any]):
         self.strike_price: float = iq_data["strikePrice"]
         self.call_symbol_id: int = iq_data["callSymbolId"]
@@ -707,6 +1092,8 @@ class ChainPerStrikePrice:
 
 
 class ChainPerRoot:
+    __slots__ = ("option_root", "chain_per_strike_price", "multiplier")
+
     def __init__(self, iq_data: dict[str, Any]):
         self.option_root: str = iq_data["optionRoot"]
         chain_per_strike_price = [ChainPerStrikePrice(x) for x in iq_data["chainPerStrikePrice"]]
@@ -723,13 +1110,13 @@ class ChainPerRoot:
 
 
 class ChainPerExpiryDate:
+    __slots__ = ("expiry_date", "description", "listing_exchange", "option_exercise_type", "chain_per_root")
+
     def __init__(self, iq_data: dict[str, Any]):
-        self.expiry_date: dt = dt.fromisoformat(iq_data["expiryDate"])
+        self.expiry_date: dt = _parse_datetime(iq_data["expiryDate"])
         self.description: str = iq_data["description"]
-        self.listing_exchange: ListingExchange = ListingExchange[iq_data["listingExchange"]]
-        self.option_exercise_type: OptionExerciseType = OptionExerciseType.Invalid
-        if iq_data["optionExerciseType"] is not None:
-            self.option_exercise_type = OptionExerciseType[iq_data["optionExerciseType"]]
+        self.listing_exchange: ListingExchange = _LISTING_EXCHANGES[iq_data["listingExchange"]]
+        self.option_exercise_type: OptionExerciseType = _OPTION_EXERCISE_TYPES[iq_data["optionExerciseType"]]
         chain_per_root = [ChainPerRoot(x) for x in iq_data["chainPerRoot"]]
         self.chain_per_root: dict[str, ChainPerRoot] = {chain.option_root: chain for chain in chain_per_root}
 
@@ -741,6 +1128,8 @@ class ChainPerExpiryDate:
 
 
 class OptionIdFilter:
+    __slots__ = ("option_type", "underlying_id", "expiry_date", "min_strike_price", "max_strike_price")
+
     def __init__(
         self,
         option_type: OptionType,
@@ -760,12 +1149,15 @@ class OptionIdFilter:
         values["optionType"] = self.option_type.name
         values["underlyingId"] = str(self.underlying_id)
         values["expiryDate"] = self.expiry_date.isoformat()
-        values["minstrikePrice"] = f"{self.min_strike_price:.2f}"
-        values["maxstrikePrice"] = f"{self.max_strike_price:.2f}"
+        # Strikes are sent in cents, round outwards so that a range between cents keeps its options
+        values["minstrikePrice"] = f"{math.floor(round(self.min_strike_price * 100, 6)) / 100:.2f}"
+        values["maxstrikePrice"] = f"{math.ceil(round(self.max_strike_price * 100, 6)) / 100:.2f}"
         return values
 
 
 class StrategyLeg:
+    __slots__ = ("symbol_id", "action", "ratio")
+
     def __init__(self, symbol_id: int, action: OrderAction, ratio: int) -> None:
         self.symbol_id = symbol_id
         self.action = action
@@ -781,6 +1173,8 @@ class StrategyLeg:
 
 
 class StrategyVariantRequest:
+    __slots__ = ("variant_id", "strategy", "legs")
+
     def __init__(self, variant_id: int, strategy: StrategyType, legs: list[StrategyLeg]) -> None:
         self.variant_id = variant_id
         self.strategy = strategy
@@ -796,6 +1190,22 @@ class StrategyVariantRequest:
 
 
 class StrategyVariantQuote:
+    __slots__ = (
+        "variant_id",
+        "bid_price",
+        "ask_price",
+        "underlying",
+        "underlying_id",
+        "open_price",
+        "volatility",
+        "delta",
+        "gamma",
+        "theta",
+        "vega",
+        "rho",
+        "is_real_time",
+    )
+
     def __init__(self, iq_data: dict[str, Any]):
         self.variant_id: int = iq_data["variantId"]
         self.bid_price: Optional[float] = iq_data["bidPrice"]
@@ -813,6 +1223,8 @@ class StrategyVariantQuote:
 
 
 class Candle:
+    __slots__ = ("start", "end", "open", "high", "low", "close", "volume", "vwap")
+
     def __init__(self, iq_data: dict[str, Any]):
         self.start: str = iq_data["start"]
         self.end: str = iq_data["end"]
@@ -826,8 +1238,360 @@ class Candle:
             self.vwap = iq_data["VWAP"]
 
 
-class QuestradeIQ:
-    def __init__(self, config: Union[str, dict[str, Any]] = "secrets.json", save_config: bool = True):
+class AccountSnapshot:
+    __slots__ = ("account", "positions", "balances", "open_orders")
+
+    def __init__(self, account: AccountInfo, positions: list[Position], balances: Balances, open_orders: list[Order]):
+        self.account = account
+        self.positions = positions
+        self.balances = balances
+        self.open_orders = open_orders
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.account} {len(self.positions)} positions {len(self.open_orders)} open orders"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
+
+
+class PortfolioSnapshot:
+    """Positions, balances and open orders of every account, with the details of the symbols they refer to.
+
+    timings holds the seconds spent in each phase of get_portfolio_snapshot(): "accounts", "account_data" (positions,
+    balances and orders of all accounts), "symbols" and "total".
+    """
+
+    __slots__ = ("time", "accounts", "symbols", "timings")
+
+    def __init__(
+        self,
+        time: dt,
+        accounts: list[AccountSnapshot],
+        symbols: dict[int, TickerDetails],
+        timings: dict[str, float],
+    ):
+        self.time = time  # when the snapshot was requested
+        self.accounts = accounts
+        self.symbols = symbols  # symbol id: details of every symbol held or in an open order
+        self.timings = timings
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.time.isoformat()} {len(self.accounts)} accounts"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
+
+    def positions(self) -> list[Position]:
+        """Returns the positions of all accounts."""
+        return [position for account in self.accounts for position in account.positions]
+
+    def open_orders(self) -> list[Order]:
+        """Returns the open orders of all accounts."""
+        return [order for account in self.accounts for order in account.open_orders]
+
+
+def _snapshot_symbol_ids(account_data: list[tuple[list[Position], Balances, list[Order]]]) -> list[int]:
+    """Returns the distinct ids of the symbols held or traded by open orders, sorted."""
+    symbol_ids: set[int] = set()
+    for positions, _, orders in account_data:
+        symbol_ids.update(position.symbol_id for position in positions)
+        for order in orders:
+            symbol_ids.add(order.symbol_id)
+            symbol_ids.update(leg.symbol_id for leg in order.legs)
+    symbol_ids.discard(0)  # multi-leg orders have no symbol of their own
+    return sorted(symbol_ids)
+
+
+def _ticker_list(
+    tickers: Union[
+        list[str], set[str], str, list[Ticker], Ticker, list[TickerDetails], TickerDetails, list[int], set[int], int
+    ],
+) -> list[Union[int, str]]:
+    """Normalizes a tickers argument into a list of symbol ids and symbol names.
+
+    Args:
+        tickers: List of, or set, or single ticker name or id.
+
+    Returns:
+        List of symbol ids (int) and names (str) in input order.
+    """
+    result: list[Union[int, str]] = []
+    if isinstance(tickers, int):
+        result.append(tickers)
+    elif isinstance(tickers, (Ticker, TickerDetails)):
+        result.append(tickers.symbol_id)
+    elif isinstance(tickers, str):
+        result.append(tickers)
+    elif isinstance(tickers, set):
+        for set_element in tickers:
+            if isinstance(set_element, (int, str)):
+                result.append(set_element)
+            else:
+                raise TypeError("Invalid set type for 'tickers'")
+    elif isinstance(tickers, list):
+        for list_element in tickers:
+            if isinstance(list_element, (int, str)):
+                result.append(list_element)
+            elif isinstance(list_element, (Ticker, TickerDetails)):
+                result.append(list_element.symbol_id)
+            else:
+                raise TypeError("Invalid list type for 'tickers'")
+    else:
+        raise TypeError("Invalid type for 'tickers'")
+    return result
+
+
+def _single_ticker(ticker: Union[str, Ticker, TickerDetails, int]) -> Union[int, str]:
+    """Normalizes a single ticker argument into a symbol id or symbol name."""
+    if isinstance(ticker, int):
+        return ticker
+    elif isinstance(ticker, (Ticker, TickerDetails)):
+        return ticker.symbol_id
+    elif isinstance(ticker, str):
+        return ticker
+    else:
+        raise TypeError("Invalid type for 'ticker'")
+
+
+def _symbols_query(tickers: Sequence[Union[int, str]]) -> dict[str, str]:
+    """Builds the query of the symbols call for symbol ids and names."""
+    ids = [str(ticker) for ticker in tickers if isinstance(ticker, int)]
+    names = [ticker for ticker in tickers if isinstance(ticker, str)]
+    query: dict[str, str] = {}
+    if len(ids):
+        query["ids"] = ",".join(ids)
+    if len(names):
+        query["names"] = ",".join(names)
+    return query
+
+
+def _order_symbols(
+    tickers: list[Union[int, str]], found: dict[Union[int, str], dict[str, Any]], fetched: list[dict[str, Any]]
+) -> list[dict[str, Any]]:
+    """Returns the symbol payloads of tickers in input order from the cached and the fetched ones.
+
+    Tickers the API did not return, e.g. unknown names, are skipped.
+    """
+    by_key: dict[Union[int, str], dict[str, Any]] = {}
+    for symbol in fetched:
+        by_key[symbol["symbolId"]] = symbol
+        by_key[symbol["symbol"].upper()] = symbol
+    result = []
+    for ticker in tickers:
+        payload = found.get(ticker) or by_key.get(ticker.upper() if isinstance(ticker, str) else ticker)
+        if payload is not None:
+            result.append(payload)
+    return result
+
+
+def _cached_symbol_ids(
+    tickers: list[Union[int, str]], cache: Optional[SymbolCache]
+) -> tuple[dict[str, int], list[str]]:
+    """Splits the distinct symbol names of tickers into the ones the cache resolves and the ones to request.
+
+    Returns:
+        Symbol ids keyed by upper case name, and the names to request.
+    """
+    resolved: dict[str, int] = {}
+    unresolved: dict[str, str] = {}
+    for ticker in tickers:
+        if not isinstance(ticker, str):
+            continue
+        key = ticker.upper()
+        if key in resolved or key in unresolved:
+            continue
+        symbol_id = None if cache is None else cache.get_symbol_id(ticker)
+        if symbol_id is None:
+            unresolved[key] = ticker
+        else:
+            resolved[key] = symbol_id
+    return resolved, list(unresolved.values())
+
+
+def _resolved_symbol_ids(
+    tickers: list[Union[int, str]], resolved: dict[str, int], fetched: list[dict[str, Any]]
+) -> list[int]:
+    """Replaces the symbol names of tickers with their ids, from resolved and the fetched symbol payloads.
+
+    Raises:
+        ValueError: If a name is unknown.
+    """
+    for symbol in fetched:
+        resolved[symbol["symbol"].upper()] = symbol["symbolId"]
+    ids = []
+    for ticker in tickers:
+        if isinstance(ticker, str):
+            if ticker.upper() not in resolved:
+                raise ValueError(f"Unknown symbol '{ticker}'")
+            ticker = resolved[ticker.upper()]
+        ids.append(ticker)
+    return ids
+
+
+def _request_key(request_path: str, params: Optional[dict[str, Any]]) -> tuple[str, tuple[tuple[str, str], ...]]:
+    """Returns the key identifying GET requests with the same path and parameters, in any order."""
+    return request_path, tuple(sorted((name, str(value)) for name, value in (params or {}).items()))
+
+
+def _time_range_query(start_time: Optional[dt], end_time: Optional[dt]) -> dict[str, str]:
+    query = {}
+    if start_time is not None:
+        if not isinstance(start_time, dt):
+            raise TypeError("Type of 'start_time' must be datetime")
+        query["startTime"] = start_time.isoformat()
+    if end_time is not None:
+        if not isinstance(end_time, dt):
+            raise TypeError("Type of 'end_time' must be datetime")
+        query["endTime"] = end_time.isoformat()
+    return query
+
+
+def _option_quotes_query(
+    ids: Union[int, list[int]], filters: Optional[list[OptionIdFilter]]
+) -> Optional[dict[str, Any]]:
+    """Builds the body of a markets/quotes/options request, or None if there is nothing to request."""
+    query: dict[str, Any] = {}
+    if isinstance(ids, int):
+        query["optionIds"] = [ids]
+    elif isinstance(ids, list):
+        if len(ids) and not isinstance(ids[0], int):
+            raise TypeError("Invalid list type for 'ids'")
+        query["optionIds"] = ids
+    else:
+        raise TypeError("Invalid type for 'ids'")
+    if isinstance(filters, list):
+        query["filters"] = [filter.to_json() for filter in filters]
+    if not query["optionIds"] and not query.get("filters"):
+        return None
+    return query
+
+
+def _option_quote_bodies(
+    option_ids: list[int], filters: list[dict[str, Any]], max_ids: int, max_filters: int
+) -> list[dict[str, Any]]:
+    """Splits the option ids and filters of an option quotes request into the bodies of several requests."""
+    bodies: list[dict[str, Any]] = [{"optionIds": chunk} for chunk in _chunks(option_ids, max_ids)]
+    bodies.extend({"filters": chunk} for chunk in _chunks(filters, max_filters))
+    return bodies
+
+
+def _unique_quotes(quotes: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Drops the quotes of symbols already quoted earlier in the list."""
+    seen: set[int] = set()
+    unique = []
+    for quote in quotes:
+        if quote["symbolId"] not in seen:
+            seen.add(quote["symbolId"])
+            unique.append(quote)
+    return unique
+
+
+def _candle_windows(start_time: dt, end_time: dt, interval: Granularity, max_candles: int) -> list[tuple[dt, dt]]:
+    """Splits a time range into consecutive windows that each hold at most max_candles candles."""
+    window = interval.min_duration() * max_candles
+    windows: list[tuple[dt, dt]] = []
+    window_start = start_time
+    while True:
+        window_end = min(window_start + window, end_time)
+        windows.append((window_start, window_end))
+        if window_end >= end_time:
+            return windows
+        window_start = window_end
+
+
+def _chunks(items: Sequence[T], size: int) -> list[list[T]]:
+    """Splits items into consecutive lists of at most size items."""
+    chunks = []
+    for start in range(0, len(items), size):
+        end = start + size
+        chunks.append(list(items[start:end]))
+    return chunks
+
+
+def _streaming_quotes_query(ids: list[int], socket_mode: SocketMode, max_ids: int) -> dict[str, str]:
+    """Builds the query of the quotes streaming call.
+
+    Raises:
+        ValueError: If there are more than max_ids ids.
+    """
+    if len(ids) > max_ids:
+        raise ValueError(f"At most {max_ids} symbols can be streamed per port, got {len(ids)}")
+    return {"ids": ",".join([str(id) for id in ids]), "stream": "true", "mode": socket_mode.name}
+
+
+def _merge_candle_windows(windows: list[list[dict[str, Any]]]) -> list[dict[str, Any]]:
+    """Concatenates the candles of consecutive windows, dropping the duplicates at window boundaries."""
+    merged: list[dict[str, Any]] = []
+    seen: set[str] = set()
+    for candles in windows:
+        for candle in candles:
+            if candle["start"] not in seen:
+                seen.add(candle["start"])
+                merged.append(candle)
+    return merged
+
+
+def _strategy_quotes_query(variants: list[StrategyVariantRequest]) -> dict[str, Any]:
+    if not isinstance(variants, list):
+        raise TypeError("Invalid type for 'variants', expecting list")
+    if not all(isinstance(x, StrategyVariantRequest) for x in variants):
+        raise TypeError("Invalid element type for 'variants', expecting StrategyVariantRequest")
+    return {"variants": [variant.to_json() for variant in variants]}
+
+
+def _numbered_strategy_query(variants: list[StrategyVariantRequest]) -> dict[str, Any]:
+    """Builds the body of a strategy quotes request numbering the variants 1, 2, ... instead of using their ids."""
+    return {"variants": [dict(variant.to_json(), variantId=number) for number, variant in enumerate(variants, 1)]}
+
+
+def _match_strategy_quotes(
+    variants: list[StrategyVariantRequest], quotes: list[dict[str, Any]]
+) -> list[tuple[StrategyVariantRequest, Optional[StrategyVariantQuote]]]:
+    """Pairs the variants of a _numbered_strategy_query() with their quotes, None for the ones left unquoted.
+
+    Quotes carry the variant_id of their variant.
+    """
+    by_number = {quote["variantId"]: quote for quote in quotes}
+    matched: list[tuple[StrategyVariantRequest, Optional[StrategyVariantQuote]]] = []
+    for number, variant in enumerate(variants, 1):
+        quote = by_number.get(number)
+        if quote is None:
+            matched.append((variant, None))
+            continue
+        strategy_quote = StrategyVariantQuote(quote)
+        strategy_quote.variant_id = variant.variant_id
+        matched.append((variant, strategy_quote))
+    return matched
+
+
+class QuestradeIQBase:
+    """State shared by the blocking and asyncio clients: configuration and access token handling.
+
+    Subclasses provide the transport, i.e. how the access token is fetched and how requests are made.
+    """
+
+    REFRESH_TOKEN_URL = "https://login.questrade.com/oauth2/token"
+    MAX_THROTTLED_RETRIES = 2
+    MAX_CANDLES_PER_REQUEST = 2000
+    MAX_IDS_PER_REQUEST = 100  # symbol ids or names per symbols, quotes or streaming request
+    MAX_FILTERS_PER_REQUEST = 100  # option id filters per option quotes request
+    MAX_VARIANTS_PER_REQUEST = 100  # strategy variants per strategy quotes request
+    TOKEN_REFRESH_MARGIN = 60.0  # refresh the access token this many seconds before it expires
+
+    def __init__(
+        self,
+        config: Union[str, dict[str, Any]] = "secrets.json",
+        save_config: bool = True,
+        *,
+        rate_limiter: Union[RateLimiter, bool] = True,
+        token_broker: Union[TokenBroker, bool] = True,
+        save_delay: Optional[float] = None,
+        json_decoder: Union[str, JsonDecoder, None] = None,
+        symbol_cache: Union[SymbolCache, bool] = False,
+        quote_cache: Union[QuoteCache, bool] = True,
+        option_chain_cache: Union[OptionChainCache, bool] = False,
+        coalesce_requests: bool = True,
+    ):
         """Constructor
 
         Parameters
@@ -835,8 +1599,55 @@ class QuestradeIQ:
         config : Union[str, dict], optional
             Config filename or dictionary.
                 If a dict, key/value pairs for configuration, by default "secrets.json"
+        rate_limiter : Union[RateLimiter, bool], optional
+            Rate limiter to share with other clients, True for a private one or False to disable rate limiting,
+                by default True
+        token_broker : Union[TokenBroker, bool], optional
+            Coordinates token refreshes with other processes using the same config file. True to lock next to the
+                config file (only when config is a filename and save_config is True) or False to disable,
+                by default True. The default creates a persistent "<config>.lock" file next to the config, and a
+                refresh raises TimeoutError when another process holds that lock for more than 30 seconds
+        save_delay : Optional[float], optional
+            If set, config changes are saved by a background thread at most once per save_delay seconds instead of
+                before the request that caused them returns, by default None. Refreshed tokens are still saved before
+                returning when a token broker is used, as other processes wait for them on the lock
+        json_decoder : Union[str, Callable[[bytes], Any], None], optional
+            Function decoding response bodies, or the name of one in iqtrade.decoder.DECODERS ("json", "orjson"),
+                by default None for orjson when it is installed and the standard library otherwise
+        symbol_cache : Union[SymbolCache, bool], optional
+            Cache of symbol details used by get_tickers() and to resolve symbol names, True for a private in-memory
+                one, by default False
+        quote_cache : Union[QuoteCache, bool], optional
+            Cache of received quotes, answering get_quote() and get_option_quotes() calls given a max_age. True for a
+                private one created the first time a max_age is given, or False to disable, by default True
+        option_chain_cache : Union[OptionChainCache, bool], optional
+            Cache of option chains used by get_option_chain(), True for a private in-memory one, by default False
+        coalesce_requests : bool, optional
+            Share the response of a GET request with identical GET requests made while it is in flight instead of
+                sending them too, each caller still gets objects of its own, by default True
         """
         self._should_save_config = save_config
+        self._json_decoder = get_decoder(json_decoder)
+        self._symbol_cache: Optional[SymbolCache] = None
+        if isinstance(symbol_cache, SymbolCache):
+            self._symbol_cache = symbol_cache
+        elif symbol_cache:
+            self._symbol_cache = SymbolCache()
+        self._quote_cache: Optional[QuoteCache] = quote_cache if isinstance(quote_cache, QuoteCache) else None
+        # Callers that never pass a max_age do not pay for caching their quotes
+        self._lazy_quote_cache = quote_cache is True
+        self._option_chain_cache: Optional[OptionChainCache] = None
+        if isinstance(option_chain_cache, OptionChainCache):
+            self._option_chain_cache = option_chain_cache
+        elif option_chain_cache:
+            self._option_chain_cache = OptionChainCache()
+        self._coalesce_requests = coalesce_requests
+        self._coalesced_requests = 0
+        self._rate_limiter: Optional[RateLimiter] = None
+        if isinstance(rate_limiter, RateLimiter):
+            self._rate_limiter = rate_limiter
+        elif rate_limiter:
+            self._rate_limiter = RateLimiter()
         if isinstance(config, str):
             self._config_filename = config
             with open(self._config_filename, "r") as infile:
@@ -850,13 +1661,22 @@ class QuestradeIQ:
         if "iq_refresh_token" not in self._config:
             raise ValueError("'iq_refresh_token' key not found in config")
 
+        self._config_writer: Optional[ConfigWriter] = None
+        self._token_broker: Optional[TokenBroker] = None
+        if self._config_filename != "" and self._should_save_config:
+            self._config_writer = ConfigWriter(self._config_filename, delay=save_delay)
+            if isinstance(token_broker, TokenBroker):
+                self._token_broker = token_broker
+            elif token_broker:
+                self._token_broker = TokenBroker(self._config_filename)
+
         self._api_server = ""
         self._access_token = ""
         self._token_type = ""
+        self._token_expiry = 0.0
+        self._token_generation = 0
         self._api_url: Optional[urllib.parse.ParseResult] = None
-
-        self.session = requests.Session()
-        self._get_access_token()
+        self._load_access_token()
 
     def get_api_server(self) -> str:
         return self._api_server
@@ -867,16 +1687,43 @@ class QuestradeIQ:
     def get_access_token_type(self) -> str:
         return self._token_type
 
+    def get_access_token_expiry(self) -> dt:
+        return dt.fromtimestamp(self._token_expiry)
+
     def get_api_url(self) -> urllib.parse.ParseResult:
         if self._api_url is not None:
             return self._api_url
         raise AttributeError("'api_url' is None")  # pragma: no cover
 
-    def _save_config(self) -> None:
+    def get_json_decoder(self) -> JsonDecoder:
+        return self._json_decoder
+
+    def get_symbol_cache(self) -> Optional[SymbolCache]:
+        return self._symbol_cache
+
+    def get_quote_cache(self) -> Optional[QuoteCache]:
+        return self._quote_cache
+
+    def get_option_chain_cache(self) -> Optional[OptionChainCache]:
+        return self._option_chain_cache
+
+    def get_coalesced_requests(self) -> int:
+        """Returns the number of requests answered with the response of an identical request already in flight."""
+        return self._coalesced_requests
+
+    def get_rate_limiter(self) -> Optional[RateLimiter]:
+        return self._rate_limiter
+
+    def get_rate_limit_status(self, category: RateLimitCategory) -> Optional[RateLimitStatus]:
+        """Returns the request budget left for account or market data calls, or None if rate limiting is disabled."""
+        if self._rate_limiter is None:
+            return None
+        return self._rate_limiter.get_status(category)
+
+    def _save_config(self, sync: bool = False) -> None:
         assert "iq_refresh_token" in self._config
-        if self._config_filename != "" and self._should_save_config:
-            with open(self._config_filename, "w") as outfile:
-                json.dump(self._config, outfile, indent=4)
+        if self._config_writer is not None:
+            self._config_writer.write(self._config, sync=sync)
 
     def _set_config_value(self, key: str, value: Any) -> None:
         self._config[key] = value
@@ -885,26 +1732,19 @@ class QuestradeIQ:
     def _get_config_value(self, key: str) -> Any:
         return self._config[key]
 
-    def _get_access_token(self) -> None:
-        refresh_token_key = "iq_refresh_token"
-        refresh_token = self._get_config_value(refresh_token_key)
-
-        access_token_url = (
-            f"https://login.questrade.com/oauth2/token?grant_type=refresh_token&refresh_token={refresh_token}"
-        )
-        access_token_result = requests.get(access_token_url, timeout=10)
-        access_token_result.raise_for_status()
+    def _get_refresh_token_url(self) -> str:
+        refresh_token = self._get_config_value("iq_refresh_token")
+        return f"{self.REFRESH_TOKEN_URL}?grant_type=refresh_token&refresh_token={refresh_token}"
 
-        access_token_data = access_token_result.json()
+    def _set_access_token(self, access_token_data: Any, response_text: str, *, save: bool = True) -> None:
+        """Validates an OAuth token response and makes it the current access token, saved to the config if save."""
         if (
-            "access_token" not in access_token_data
+            not isinstance(access_token_data, dict)
+            or "access_token" not in access_token_data
             or "api_server" not in access_token_data
             or "refresh_token" not in access_token_data
         ):
-            raise RuntimeError("Invalid refresh token response: {0}".format(access_token_result.text))
-
-        refresh_token = access_token_data["refresh_token"]
-        self._set_config_value(refresh_token_key, refresh_token)
+            raise RuntimeError("Invalid refresh token response: {0}".format(response_text))
 
         self._access_token = access_token_data["access_token"]
         self._api_server = access_token_data["api_server"]
@@ -918,8 +1758,284 @@ class QuestradeIQ:
         else:
             self._token_type = "Bearer"  # pragma: no cover
 
-        auth_headers = {"Authorization": self._token_type + " " + self._access_token}
-        self.session.headers.update(auth_headers)
+        self._token_expiry = time.time() + float(access_token_data.get("expires_in", 1800))
+        self._token_generation += 1
+
+        # The refresh token is single use: persist it together with the access token so the next client can skip
+        # the OAuth round trip while the access token is still valid.
+        self._config["iq_refresh_token"] = access_token_data["refresh_token"]
+        self._config["iq_access_token"] = self._access_token
+        self._config["iq_api_server"] = self._api_server
+        self._config["iq_token_type"] = self._token_type
+        self._config["iq_token_expiry"] = self._token_expiry
+        if save:
+            # Other processes wait on the broker lock for this content, it must be on disk before the lock is released
+            self._save_config(sync=self._token_broker is not None)
+
+    def _load_access_token(self) -> bool:
+        """Restores the access token persisted in the config, if any.
+
+        Returns:
+            True if a persisted access token was restored, even if it needs to be refreshed before use.
+        """
+        if not all(key in self._config for key in ("iq_access_token", "iq_api_server", "iq_token_expiry")):
+            return False
+        self._access_token = self._config["iq_access_token"]
+        self._api_server = self._config["iq_api_server"].rstrip("/")
+        self._api_url = urllib.parse.urlparse(self._api_server)
+        self._token_type = self._config.get("iq_token_type", "Bearer")
+        self._token_expiry = float(self._config["iq_token_expiry"])
+        return True
+
+    def _adopt_shared_access_token(self, shared_config: dict[str, Any]) -> bool:
+        """Takes over the tokens another process saved to the shared config.
+
+        The shared refresh token is always adopted, since ours may have been used up by the other process already.
+
+        Returns:
+            True if the shared access token is newer than ours and still valid, i.e. no refresh is needed.
+        """
+        if "iq_refresh_token" in shared_config:
+            self._config["iq_refresh_token"] = shared_config["iq_refresh_token"]
+        shared_access_token = shared_config.get("iq_access_token")
+        if shared_access_token is None or shared_access_token == self._access_token:
+            return False
+        for key in ("iq_access_token", "iq_api_server", "iq_token_type", "iq_token_expiry"):
+            if key in shared_config:
+                self._config[key] = shared_config[key]
+        if not self._load_access_token() or self._token_needs_refresh():
+            return False
+        self._token_generation += 1
+        return True
+
+    def _cached_quotes(
+        self, kind: str, symbol_ids: list[int], max_age: Optional[float]
+    ) -> tuple[dict[int, dict[str, Any]], list[int]]:
+        """Returns the quotes of the quote cache at most max_age seconds old, and the symbol ids to request."""
+        if max_age is None:
+            return {}, symbol_ids
+        if self._quote_cache is None:
+            if self._lazy_quote_cache:
+                self._quote_cache = QuoteCache()
+            return {}, symbol_ids
+        return self._quote_cache.lookup(kind, symbol_ids, max_age)
+
+    def _merge_quotes(
+        self, kind: str, symbol_ids: list[int], found: dict[int, dict[str, Any]], fetched: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """Adds the fetched quotes to the quote cache and returns them merged with the cached ones in input order.
+
+        Fetched quotes of symbols not in symbol_ids (selected by option id filters) come last.
+        """
+        if self._quote_cache is not None:
+            self._quote_cache.put(kind, fetched)
+        if not found:
+            return fetched
+        quotes = {quote["symbolId"]: quote for quote in fetched}
+        quotes.update(found)
+        requested = set(symbol_ids)
+        return [quotes[symbol_id] for symbol_id in symbol_ids if symbol_id in quotes] + [
+            quote for quote in fetched if quote["symbolId"] not in requested
+        ]
+
+    def _token_needs_refresh(self) -> bool:
+        return time.time() >= self._token_expiry - self.TOKEN_REFRESH_MARGIN
+
+    def _get_auth_headers(self) -> dict[str, str]:
+        return {"Authorization": self._token_type + " " + self._access_token}
+
+
+class QuestradeIQ(QuestradeIQBase):
+    def __init__(
+        self,
+        config: Union[str, dict[str, Any]] = "secrets.json",
+        save_config: bool = True,
+        *,
+        rate_limiter: Union[RateLimiter, bool] = True,
+        token_broker: Union[TokenBroker, bool] = True,
+        save_delay: Optional[float] = None,
+        json_decoder: Union[str, JsonDecoder, None] = None,
+        symbol_cache: Union[SymbolCache, bool] = False,
+        quote_cache: Union[QuoteCache, bool] = True,
+        option_chain_cache: Union[OptionChainCache, bool] = False,
+        coalesce_requests: bool = True,
+        auto_refresh: bool = True,
+        max_workers: int = 8,
+    ):
+        """Constructor
+
+        Parameters
+        ----------
+        config : Union[str, dict], optional
+            Config filename or dictionary.
+                If a dict, key/value pairs for configuration, by default "secrets.json"
+        rate_limiter : Union[RateLimiter, bool], optional
+            Rate limiter to share with other clients, True for a private one or False to disable rate limiting,
+                by default True
+        token_broker : Union[TokenBroker, bool], optional
+            Coordinates token refreshes with other processes using the same config file. True to lock next to the
+                config file (only when config is a filename and save_config is True) or False to disable,
+                by default True. The default creates a persistent "<config>.lock" file next to the config, and a
+                refresh raises TimeoutError when another process holds that lock for more than 30 seconds
+        save_delay : Optional[float], optional
+            If set, config changes are saved by a background thread at most once per save_delay seconds instead of
+                before the request that caused them returns, by default None. Refreshed tokens are still saved before
+                returning when a token broker is used, as other processes wait for them on the lock
+        json_decoder : Union[str, Callable[[bytes], Any], None], optional
+            Function decoding response bodies, or the name of one in iqtrade.decoder.DECODERS ("json", "orjson"),
+                by default None for orjson when it is installed and the standard library otherwise
+        symbol_cache : Union[SymbolCache, bool], optional
+            Cache of symbol details used by get_tickers() and to resolve symbol names, True for a private in-memory
+                one, by default False
+        quote_cache : Union[QuoteCache, bool], optional
+            Cache of received quotes, answering get_quote() and get_option_quotes() calls given a max_age. True for a
+                private one created the first time a max_age is given, or False to disable, by default True
+        option_chain_cache : Union[OptionChainCache, bool], optional
+            Cache of option chains used by get_option_chain(), True for a private in-memory one, by default False
+        coalesce_requests : bool, optional
+            Share the response of a GET request with identical GET requests made while it is in flight instead of
+                sending them too, each caller still gets objects of its own, by default True
+        auto_refresh : bool, optional
+            Refresh the access token in a background thread shortly before it expires, by default True
+        max_workers : int, optional
+            Number of threads used by calls that split their work into several concurrent requests, by default 8
+        """
+        super().__init__(
+            config,
+            save_config,
+            rate_limiter=rate_limiter,
+            token_broker=token_broker,
+            save_delay=save_delay,
+            json_decoder=json_decoder,
+            symbol_cache=symbol_cache,
+            quote_cache=quote_cache,
+            option_chain_cache=option_chain_cache,
+            coalesce_requests=coalesce_requests,
+        )
+        self._auto_refresh = auto_refresh
+        self._token_lock = threading.Lock()
+        self._refresh_timer: Optional[threading.Timer] = None
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._in_flight: dict[tuple[str, tuple[tuple[str, str], ...]], Future[bytes]] = {}
+        self._in_flight_lock = threading.Lock()
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=max(10, max_workers)))
+        if not self._access_token:
+            self._refresh_access_token()
+        elif not self._token_needs_refresh():
+            # The persisted access token is still valid, start without any network call
+            self.session.headers.update(self._get_auth_headers())
+            with self._token_lock:
+                self._schedule_token_refresh()
+        # else the persisted access token has expired and is refreshed on first use
+
+    def __enter__(self) -> QuestradeIQ:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stops the background token refresh, saves pending config and cache changes and closes the HTTP session."""
+        with self._token_lock:
+            self._auto_refresh = False
+            if self._refresh_timer is not None:
+                self._refresh_timer.cancel()
+                self._refresh_timer = None
+        if self._config_writer is not None:
+            self._config_writer.close()
+        if self._symbol_cache is not None:
+            self._symbol_cache.flush()
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+        self.session.close()
+
+    def _get_access_token(self) -> None:
+        access_token_result = requests.get(self._get_refresh_token_url(), timeout=10)
+        access_token_result.raise_for_status()
+        self._set_access_token(access_token_result.json(), access_token_result.text)
+        self.session.headers.update(self._get_auth_headers())
+
+    def _refresh_access_token(self, stale_generation: Optional[int] = None) -> None:
+        """Refreshes the access token, once for all threads that saw the same stale token.
+
+        Args:
+            stale_generation: Generation of the token the caller found to be expired or rejected. If the token was
+                refreshed since, no new refresh is made. None to always refresh.
+        """
+        with self._token_lock:
+            if stale_generation is not None and stale_generation != self._token_generation:
+                return  # another thread already refreshed the token
+            if self._token_broker is None:
+                self._get_access_token()
+            else:
+                with self._token_broker.lock():
+                    if self._adopt_shared_access_token(self._token_broker.load()):
+                        self.session.headers.update(self._get_auth_headers())
+                    else:
+                        self._get_access_token()
+            self._schedule_token_refresh()
+
+    def _schedule_token_refresh(self) -> None:
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+        if not self._auto_refresh:
+            return
+        delay = max(0.0, self._token_expiry - self.TOKEN_REFRESH_MARGIN - time.time())
+        self._refresh_timer = threading.Timer(
+            delay, QuestradeIQ._background_token_refresh, args=(weakref.ref(self), self._token_generation)
+        )
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    @staticmethod
+    def _background_token_refresh(client_ref: weakref.ref[QuestradeIQ], generation: int) -> None:
+        client = client_ref()
+        if client is None:
+            return  # pragma: no cover
+        try:
+            client._refresh_access_token(generation)
+        except Exception:
+            # The next request will retry the refresh on demand
+            logger.warning("Background access token refresh failed", exc_info=True)
+
+    def _map_concurrent(self, function: Callable[[T], R], items: list[T]) -> list[R]:
+        """Calls function for every item on the client's worker threads and returns the results in input order.
+
+        Requests made by function still go through the rate limiter, which paces the workers.
+        """
+        if len(items) <= 1 or self._max_workers <= 1:
+            return [function(item) for item in items]
+        return list(self._get_executor().map(function, items))
+
+    def _iter_concurrent(self, function: Callable[[T], R], items: list[T]) -> Iterator[R]:
+        """Calls function for every item like _map_concurrent(), but yields the results as they complete.
+
+        Calls not started yet are cancelled when the iterator is closed early.
+        """
+        if len(items) <= 1 or self._max_workers <= 1:
+            for item in items:
+                yield function(item)
+            return
+        executor = self._get_executor()
+        futures = [executor.submit(function, item) for item in items]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self._max_workers, thread_name_prefix="iqtrade")
+            return self._executor
 
     def _make_request(
         self,
@@ -929,12 +2045,68 @@ class QuestradeIQ:
         params: Optional[dict[str, Any]] = None,
         json: Optional[dict[str, Any]] = None,
     ) -> dict[str, Any]:
-        request_url = f"{self._api_server}/v1/{request_path}"
-        response = self.session.request(method, request_url, params=params, json=json)
+        if method != "GET" or json is not None or not self._coalesce_requests:
+            return decode_object(
+                self._json_decoder, self._make_raw_request(request_path, method=method, params=params, json=json)
+            )
+        key = _request_key(request_path, params)
+        with self._in_flight_lock:
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                future: Future[bytes] = Future()
+                self._in_flight[key] = future
+            else:
+                self._coalesced_requests += 1
+        # The response body is shared, every caller decodes its own objects and may modify them
+        if in_flight is not None:
+            return decode_object(self._json_decoder, in_flight.result())
+        try:
+            result = self._make_raw_request(request_path, params=params)
+        except BaseException as error:
+            with self._in_flight_lock:
+                del self._in_flight[key]
+            future.set_exception(error)
+            raise
+        # Requests made from now on get a fresh response
+        with self._in_flight_lock:
+            del self._in_flight[key]
+        future.set_result(result)
+        return decode_object(self._json_decoder, result)
+
+    def _make_raw_request(
+        self,
+        request_path: str,
+        *,
+        method: str = "GET",
+        params: Optional[dict[str, Any]] = None,
+        json: Optional[dict[str, Any]] = None,
+    ) -> bytes:
+        """Sends an API request and returns the undecoded response body."""
+        if self._token_needs_refresh():
+            self._refresh_access_token(self._token_generation)
+        throttled = 0
+        reauthenticated = False
+        while True:
+            generation = self._token_generation
+            request_url = f"{self._api_server}/v1/{request_path}"
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire(request_path)
+            response = self.session.request(
+                method, request_url, params=params, json=json, headers=self._get_auth_headers()
+            )
+            if self._rate_limiter is not None:
+                self._rate_limiter.update(request_path, response.status_code, response.headers)
+            if response.status_code == 401 and not reauthenticated:
+                reauthenticated = True
+                self._refresh_access_token(generation)
+            elif response.status_code == 429 and throttled < self.MAX_THROTTLED_RETRIES:
+                if self._rate_limiter is None:
+                    time.sleep(throttled_delay(response.headers, throttled))
+                throttled += 1
+            else:
+                break
         response.raise_for_status()
-        json_response = response.json()
-        assert isinstance(json_response, dict)
-        return json_response
+        return response.content
 
     def get_time(self) -> dt:
         """Retrieves current server time.
@@ -1032,6 +2204,7 @@ class QuestradeIQ:
         start_time: Optional[dt] = None,
         end_time: Optional[dt] = None,
         state_filter: Optional[OrderStateFilter] = None,
+        lazy: bool = False,
     ) -> list[Order]:
         """Retrieves orders for specified account
 
@@ -1040,6 +2213,7 @@ class QuestradeIQ:
             start_time: Start of time range in ISO format. By default – start of today, 12:00am.
             end_time: End of time range in ISO format. By default – end of today, 11:59pm
             state_filter: All, Open, Closed – retrieve all, active or closed orders. Defaults to All.
+            lazy: Decode the order attributes on first access, see Order.
 
         Returns:
             List of orders.
@@ -1047,15 +2221,7 @@ class QuestradeIQ:
         See Also:
             https://www.questrade.com/api/documentation/rest-operations/account-calls/accounts-id-orders
         """
-        query = {}
-        if start_time is not None:
-            if not isinstance(start_time, dt):
-                raise TypeError("Type of 'start_time' must be datetime")
-            query["startTime"] = start_time.isoformat()
-        if end_time is not None:
-            if not isinstance(end_time, dt):
-                raise TypeError("Type of 'end_time' must be datetime")
-            query["endTime"] = end_time.isoformat()
+        query = _time_range_query(start_time, end_time)
         if state_filter:
             if not isinstance(state_filter, OrderStateFilter):
                 raise TypeError("Type of 'state_filter' must be OrderStateFilter")  # pragma: no cover
@@ -1063,7 +2229,7 @@ class QuestradeIQ:
         response = self._make_request(f"accounts/{AccountInfo.get_account_number(account_id)}/orders", params=query)
         if "orders" not in response:
             raise RuntimeError("Invalid respose received")
-        return [Order(order) for order in response["orders"]]
+        return [Order(order, lazy) for order in response["orders"]]
 
     def get_order(self, account_id: Union[str, AccountInfo], orderId: Union[str, int]) -> list[Order]:
         """Retrieves a specific order for specified account
@@ -1103,30 +2269,68 @@ class QuestradeIQ:
         See Also:
             https://www.questrade.com/api/documentation/rest-operations/account-calls/accounts-id-executions
         """
-        query = {}
-        if start_time is not None:
-            if not isinstance(start_time, dt):
-                raise TypeError("Type of 'start_time' must be datetime")
-            query["startTime"] = start_time.isoformat()
-        if end_time is not None:
-            if not isinstance(end_time, dt):
-                raise TypeError("Type of 'end_time' must be datetime")
-            query["endTime"] = end_time.isoformat()
+        query = _time_range_query(start_time, end_time)
         response = self._make_request(f"accounts/{AccountInfo.get_account_number(account_id)}/executions", params=query)
         if "executions" not in response:
             raise RuntimeError("Invalid respose received")
         return [Execution(execution) for execution in response["executions"]]
 
+    def get_portfolio_snapshot(self) -> PortfolioSnapshot:
+        """Retrieves positions, balances and open orders of all accounts and the details of their symbols.
+
+            The per-account calls of all accounts are made concurrently, then the symbols of all positions and open
+            orders are retrieved with a single get_tickers() call.
+
+        Returns:
+            The snapshot, with the time spent in each phase.
+        """
+        started = time.perf_counter()
+        snapshot_time = dt.now().astimezone()
+        accounts = self.get_accounts()
+        accounts_done = time.perf_counter()
+
+        def get_account_data(call: tuple[str, AccountInfo]) -> Any:
+            kind, account = call
+            if kind == "positions":
+                return self.get_positions(account)
+            if kind == "balances":
+                return self.get_balances(account)
+            return self.get_orders(account, state_filter=OrderStateFilter.Open)
+
+        calls = [(kind, account) for account in accounts for kind in ("positions", "balances", "orders")]
+        results = self._map_concurrent(get_account_data, calls)
+        account_data = [(results[i], results[i + 1], results[i + 2]) for i in range(0, len(results), 3)]
+        account_data_done = time.perf_counter()
+
+        symbol_ids = _snapshot_symbol_ids(account_data)
+        symbols = {symbol.symbol_id: symbol for symbol in self.get_tickers(symbol_ids)} if symbol_ids else {}
+        finished = time.perf_counter()
+        return PortfolioSnapshot(
+            snapshot_time,
+            [AccountSnapshot(account, *data) for account, data in zip(accounts, account_data)],
+            symbols,
+            {
+                "accounts": accounts_done - started,
+                "account_data": account_data_done - accounts_done,
+                "symbols": finished - account_data_done,
+                "total": finished - started,
+            },
+        )
+
     def get_tickers(
         self,
         tickers: Union[
             list[str], set[str], str, list[Ticker], Ticker, list[TickerDetails], TickerDetails, list[int], set[int], int
         ],
+        lazy: bool = False,
     ) -> list[TickerDetails]:
         """Retrieves detailed information about the given symbols.
 
+            Long symbol lists are split into requests of at most MAX_IDS_PER_REQUEST symbols made concurrently.
+
         Args:
             tickers: List of, or set, or single ticker name or id.
+            lazy: Decode the symbol attributes on first access, see TickerDetails.
 
         Returns:
             List of symbols.
@@ -1134,43 +2338,46 @@ class QuestradeIQ:
         See Also:
             https://www.questrade.com/api/documentation/rest-operations/market-calls/symbols-id
         """
-        ids: list[str] = []
-        names: list[str] = []
-        if isinstance(tickers, int):
-            ids.append(str(tickers))
-        elif isinstance(tickers, (Ticker, TickerDetails)):
-            ids.append(str(tickers.symbol_id))
-        elif isinstance(tickers, str):
-            names.append(tickers)
-        elif isinstance(tickers, set):
-            for set_element in tickers:
-                if isinstance(set_element, int):
-                    ids.append(str(set_element))
-                elif isinstance(set_element, str):
-                    names.append(set_element)
-                else:
-                    raise TypeError("Invalid set type for 'tickers'")
-        elif isinstance(tickers, list):
-            for list_element in tickers:
-                if isinstance(list_element, int):
-                    ids.append(str(list_element))
-                elif isinstance(list_element, (Ticker, TickerDetails)):
-                    ids.append(str(list_element.symbol_id))
-                elif isinstance(list_element, str):
-                    names.append(list_element)
-                else:
-                    raise TypeError("Invalid list type for 'tickers'")
-        else:
-            raise TypeError("Invalid type for 'tickers'")
-        query: dict[str, str] = {}
-        if len(ids):
-            query["ids"] = ",".join(ids)
-        if len(names):
-            query["names"] = ",".join(names)
-        response = self._make_request("symbols", params=query)
-        if "symbols" not in response:
-            raise RuntimeError("Invalid respose received")
-        return [TickerDetails(symbol) for symbol in response["symbols"]]
+        symbols = self._get_symbols(_ticker_list(tickers))
+        return [TickerDetails(symbol, lazy) for symbol in symbols]
+
+    def _request_symbols(self, tickers: Sequence[Union[int, str]]) -> list[dict[str, Any]]:
+        """Requests symbol payloads, in concurrent chunks of at most MAX_IDS_PER_REQUEST tickers."""
+
+        def request_chunk(chunk: list[Union[int, str]]) -> list[dict[str, Any]]:
+            response = self._make_request("symbols", params=_symbols_query(chunk))
+            if "symbols" not in response:
+                raise RuntimeError("Invalid respose received")
+            symbols: list[dict[str, Any]] = response["symbols"]
+            return symbols
+
+        chunks = self._map_concurrent(request_chunk, _chunks(tickers, self.MAX_IDS_PER_REQUEST))
+        return [symbol for chunk in chunks for symbol in chunk]
+
+    def _get_symbols(self, tickers: list[Union[int, str]]) -> list[dict[str, Any]]:
+        """Returns symbol payloads, from the symbol cache if there is one and only requesting the ones it lacks."""
+        if self._symbol_cache is None:
+            return self._request_symbols(tickers)
+        found, missing = self._symbol_cache.lookup(tickers)
+        fetched: list[dict[str, Any]] = []
+        if missing:
+            fetched = self._request_symbols(missing)
+            self._symbol_cache.put(fetched)
+        return _order_symbols(tickers, found, fetched)
+
+    def _resolve_symbol_ids(self, tickers: list[Union[int, str]]) -> list[int]:
+        """Returns the ids of symbol ids and names, looking up all the names the symbol cache lacks in one request.
+
+        Raises:
+            ValueError: If a name is unknown.
+        """
+        resolved, unresolved = _cached_symbol_ids(tickers, self._symbol_cache)
+        fetched: list[dict[str, Any]] = []
+        if unresolved:
+            fetched = self._request_symbols(unresolved)
+            if self._symbol_cache is not None:
+                self._symbol_cache.put(fetched)
+        return _resolved_symbol_ids(tickers, resolved, fetched)
 
     def search_for_symbols(self, prefix: str, offset: Optional[int] = None) -> list[Ticker]:
         """Retrieves symbol(s) using several search criteria.
@@ -1196,35 +2403,45 @@ class QuestradeIQ:
     def get_option_chain(self, ticker: Union[str, Ticker, TickerDetails, int]) -> dict[dt, ChainPerExpiryDate]:
         """Retrieves an option chain for a particular underlying symbol.
 
+            With an option chain cache, a chain fetched earlier on the same trading date is returned without a request.
+
         Args:
             ticker: String or id of the ticker.
 
         Returns:
             List of ChainPerExpiryDate for the underlying symbol
         """
-        if isinstance(ticker, str):
-            symbol_id = self.get_tickers(ticker)[0].symbol_id
-        elif isinstance(ticker, (Ticker, TickerDetails)):
-            symbol_id = ticker.symbol_id
-        elif isinstance(ticker, int):
-            symbol_id = ticker
-        else:
-            raise TypeError("Invalid type for 'ticker'")
+        symbol_id = _single_ticker(ticker)
+        if isinstance(symbol_id, str):
+            symbol_id = self._resolve_symbol_ids([symbol_id])[0]
+        if self._option_chain_cache is not None:
+            cached = self._option_chain_cache.get(symbol_id)
+            if cached is not None:
+                return cached
         response = self._make_request(f"symbols/{symbol_id}/options")
         if "optionChain" not in response:
             raise RuntimeError("Invalid respose received")
-        return {chain.expiry_date: chain for chain in [ChainPerExpiryDate(chain) for chain in response["optionChain"]]}
+        chain = {chain.expiry_date: chain for chain in [ChainPerExpiryDate(chain) for chain in response["optionChain"]]}
+        if self._option_chain_cache is not None:
+            self._option_chain_cache.put(symbol_id, chain)
+        return chain
 
     def get_quote(
         self,
         tickers: Union[
             list[str], set[str], str, list[Ticker], Ticker, list[TickerDetails], TickerDetails, list[int], set[int], int
         ],
+        *,
+        max_age: Optional[float] = None,
     ) -> list[Level1Quote]:
         """Retrieves a single Level 1 market data quote for one or more symbols.
 
+            Long symbol lists are split into requests of at most MAX_IDS_PER_REQUEST symbols made concurrently.
+
         Args:
             tickers: List of, or set, or single ticker name or id.
+            max_age: Age in seconds up to which quotes from the quote cache are returned, only the symbols without
+                such a quote are requested. None to request all of them.
 
         Returns:
             List of quotes for the given symbols.
@@ -1232,81 +2449,138 @@ class QuestradeIQ:
         See Also:
             https://www.questrade.com/api/documentation/rest-operations/market-calls/markets-quotes-id
         """
-        ids: list[str] = []
-        if isinstance(tickers, int):
-            ids.append(str(tickers))
-        elif isinstance(tickers, (Ticker, TickerDetails)):
-            ids.append(str(tickers.symbol_id))
-        elif isinstance(tickers, str):
-            ids.append(str(self.get_tickers(tickers)[0].symbol_id))
-        elif isinstance(tickers, set):
-            for element in tickers:
-                if isinstance(element, int):
-                    ids.append(str(element))
-                elif isinstance(element, str):
-                    ids.append(str(self.get_tickers(element)[0].symbol_id))
-                else:
-                    raise TypeError("Invalid set type for 'tickers'")
-        elif isinstance(tickers, list):
-            for item in tickers:
-                if isinstance(item, int):
-                    ids.append(str(item))
-                elif isinstance(item, (Ticker, TickerDetails)):
-                    ids.append(str(item.symbol_id))
-                elif isinstance(item, str):
-                    ids.append(str(self.get_tickers(item)[0].symbol_id))
-                else:
-                    raise TypeError("Invalid list type for 'tickers'")
-        else:
-            raise TypeError("Invalid type for 'tickers'")
-        query: dict[str, str] = {}
-        if len(ids):
-            query["ids"] = ",".join(ids)
-        response = self._make_request("markets/quotes", params=query)
-        if "quotes" not in response:
-            raise RuntimeError("Invalid respose received")
-        return [Level1Quote(quote) for quote in response["quotes"]]
+        symbol_ids = self._resolve_symbol_ids(_ticker_list(tickers))
+        found, missing = self._cached_quotes("quote", symbol_ids, max_age)
+
+        def request_chunk(chunk: list[str]) -> list[dict[str, Any]]:
+            query: dict[str, str] = {}
+            if len(chunk):
+                query["ids"] = ",".join(chunk)
+            response = self._make_request("markets/quotes", params=query)
+            if "quotes" not in response:
+                raise RuntimeError("Invalid respose received")
+            quotes: list[dict[str, Any]] = response["quotes"]
+            return quotes
+
+        fetched: list[dict[str, Any]] = []
+        if missing or not found:
+            id_chunks: list[list[str]] = _chunks([str(id) for id in missing], self.MAX_IDS_PER_REQUEST) or [[]]
+            fetched = [quote for chunk in self._map_concurrent(request_chunk, id_chunks) for quote in chunk]
+        return [Level1Quote(quote) for quote in self._merge_quotes("quote", symbol_ids, found, fetched)]
+
+    def _request_option_quotes(
+        self, ids: Union[int, list[int]], filters: Optional[list[OptionIdFilter]], max_age: Optional[float]
+    ) -> list[dict[str, Any]]:
+        """Returns the option quote payloads of get_option_quotes()."""
+        query = _option_quotes_query(ids, filters)
+        if query is None:
+            return []
+        option_ids: list[int] = query["optionIds"]
+        found, missing = self._cached_quotes("option", option_ids, None if filters else max_age)
+
+        def request_quotes(body: dict[str, Any]) -> list[dict[str, Any]]:
+            response = self._make_request("markets/quotes/options", method="POST", json=body)
+            if "optionQuotes" not in response:
+                raise RuntimeError("Invalid respose received")
+            quotes: list[dict[str, Any]] = response["optionQuotes"]
+            return quotes
+
+        bodies = _option_quote_bodies(
+            missing, query.get("filters", []), self.MAX_IDS_PER_REQUEST, self.MAX_FILTERS_PER_REQUEST
+        )
+        fetched = [quote for quotes in self._map_concurrent(request_quotes, bodies) for quote in quotes]
+        return _unique_quotes(self._merge_quotes("option", option_ids, found, fetched))
 
     def get_option_quotes(
         self,
         ids: Union[int, list[int]],
         *,
         filters: Optional[list[OptionIdFilter]] = None,
+        max_age: Optional[float] = None,
     ) -> list[Level1OptionData]:
         """Retrieves a single Level 1 market data quote and Greek data for one or more option symbols.
 
+            Ids and filters are sent in separate requests of at most MAX_IDS_PER_REQUEST ids or
+            MAX_FILTERS_PER_REQUEST filters, made concurrently.
+
         Args:
             ids: Input array of option IDs
             filters: Input array of OptionIdFilters
+            max_age: Age in seconds up to which quotes from the quote cache are returned, only the options without
+                such a quote are requested. Ignored with filters, which can only be answered by the API.
 
         Returns:
-            List of Level1OptionData quotes.
+            List of Level1OptionData quotes, one per option: the ones of ids in input order, then the ones selected by
+                filters.
 
         See Also:
             https://www.questrade.com/api/documentation/rest-operations/market-calls/markets-quotes-options
         """
-        query: dict[str, Any] = {}
-        if isinstance(ids, int):
-            query["optionIds"] = [ids]
-        elif isinstance(ids, list):
-            if len(ids) == 0:
-                return []
-            elif isinstance(ids[0], int):
-                query["optionIds"] = ids
-            else:
-                raise TypeError("Invalid list type for 'ids'")
-        else:
-            raise TypeError("Invalid type for 'ids'")
-        if isinstance(filters, list):
-            query["filters"] = [filter.to_json() for filter in filters]
-        response = self._make_request("markets/quotes/options", method="POST", json=query)
-        if "optionQuotes" not in response:
+        return [Level1OptionData(quote) for quote in self._request_option_quotes(ids, filters, max_age)]
+
+    def get_option_quotes_by_id(
+        self,
+        ids: Union[int, list[int]],
+        *,
+        filters: Optional[list[OptionIdFilter]] = None,
+        max_age: Optional[float] = None,
+    ) -> dict[int, Level1OptionData]:
+        """Retrieves option quotes like get_option_quotes() and returns them keyed by option symbol id."""
+        return {quote.symbol_id: quote for quote in self.get_option_quotes(ids, filters=filters, max_age=max_age)}
+
+    def get_chain_quotes(
+        self,
+        underlying: Union[str, Ticker, TickerDetails, int],
+        expiries: Union[int, list[dt], None] = None,
+        strike_range: Optional[tuple[float, float]] = None,
+        *,
+        use_numpy: bool = True,
+    ) -> OptionQuoteTable:
+        """Retrieves the quotes and Greeks of the calls and puts of an option chain as a columnar table.
+
+            The option chain (from the option chain cache if any) selects the strikes, which are then quoted through
+            one call and one put OptionIdFilter per expiry, bounded by the strikes listed in range. The filters are sent
+            like the ones of get_option_quotes().
+
+        Args:
+            underlying: String or id of the underlying ticker.
+            expiries: Number of upcoming expiries, list of expiries, or None for all of them.
+            strike_range: Lowest and highest strike price, None for all strikes.
+            use_numpy: Use NumPy arrays when NumPy is installed.
+
+        Returns:
+            OptionQuoteTable of the options, sorted by expiry, strike price and option type.
+        """
+        from .options import OptionChainIndex, OptionQuoteTable
+
+        symbol_id = self._resolve_symbol_ids([_single_ticker(underlying)])[0]
+        chain = self.get_option_chain(symbol_id)
+        index = self._option_chain_cache.get_index(symbol_id) if self._option_chain_cache is not None else None
+        if index is None:
+            index = OptionChainIndex(chain)
+        selected = index.next_expiries(expiries) if isinstance(expiries, int) else expiries
+        low, high = (None, None) if strike_range is None else strike_range
+        quotes = self._request_option_quotes([], index.quote_filters(symbol_id, low, high, expiries=selected), None)
+        return OptionQuoteTable.from_raw(quotes, index.contracts(low, high, expiries=selected), use_numpy=use_numpy)
+
+    def _request_strategy_quotes(self, query: dict[str, Any]) -> list[dict[str, Any]]:
+        response = self._make_request("markets/quotes/strategies", method="POST", json=query)
+        if "strategyQuotes" not in response:
             raise RuntimeError("Invalid respose received")
-        return [Level1OptionData(quote) for quote in response["optionQuotes"]]
+        quotes: list[dict[str, Any]] = response["strategyQuotes"]
+        return quotes
+
+    def _quote_strategy_batch(
+        self, variants: list[StrategyVariantRequest]
+    ) -> list[tuple[StrategyVariantRequest, Optional[StrategyVariantQuote]]]:
+        return _match_strategy_quotes(variants, self._request_strategy_quotes(_numbered_strategy_query(variants)))
 
     def get_strategy_quotes(self, variants: list[StrategyVariantRequest]) -> list[StrategyVariantQuote]:
         """Retrieve a calculated L1 market data quote for a single or many multi-leg strategies.
 
+            Variants are sent in requests of at most MAX_VARIANTS_PER_REQUEST variants made concurrently, their ids
+            only need to be unique within a request.
+
         Args:
             variants: Input array of StrategyVariantsRequests
 
@@ -1316,16 +2590,72 @@ class QuestradeIQ:
         See Also:
             https://www.questrade.com/api/documentation/rest-operations/market-calls/markets-quotes-strategies
         """
-        if not isinstance(variants, list):
-            raise TypeError("Invalid type for 'variants', expecting list")
-        if not all(isinstance(x, StrategyVariantRequest) for x in variants):
-            raise TypeError("Invalid element type for 'variants', expecting StrategyVariantRequest")
+        query = _strategy_quotes_query(variants)
+        bodies = [{"variants": chunk} for chunk in _chunks(query["variants"], self.MAX_VARIANTS_PER_REQUEST)]
+        quotes = self._map_concurrent(self._request_strategy_quotes, bodies)
+        return [StrategyVariantQuote(quote) for chunk in quotes for quote in chunk]
 
-        query = {"variants": [variant.to_json() for variant in variants]}
-        response = self._make_request("markets/quotes/strategies", method="POST", json=query)
-        if "strategyQuotes" not in response:
-            raise RuntimeError("Invalid respose received")
-        return [StrategyVariantQuote(quote) for quote in response["strategyQuotes"]]
+    def get_strategy_quotes_by_request(
+        self, variants: list[StrategyVariantRequest]
+    ) -> list[Optional[StrategyVariantQuote]]:
+        """Retrieves strategy quotes like get_strategy_quotes(), but numbers the variants itself.
+
+            Variant ids are not sent, so they need not be unique or even set. Each quote carries the variant_id of its
+            variant.
+
+        Args:
+            variants: Input array of StrategyVariantsRequests
+
+        Returns:
+            The quote of each variant in input order, None for variants the API did not quote.
+        """
+        _strategy_quotes_query(variants)
+        batches = self._map_concurrent(self._quote_strategy_batch, _chunks(variants, self.MAX_VARIANTS_PER_REQUEST))
+        return [quote for batch in batches for _, quote in batch]
+
+    def stream_strategy_quotes(
+        self, variants: list[StrategyVariantRequest]
+    ) -> Generator[tuple[StrategyVariantRequest, Optional[StrategyVariantQuote]], None, None]:
+        """Retrieves strategy quotes like get_strategy_quotes_by_request() and yields them as each request completes.
+
+            Scanning thousands of spreads, the first quotes can be used while the later requests are still running.
+            Requests not started yet are cancelled when the generator is closed early.
+
+        Args:
+            variants: Input array of StrategyVariantsRequests
+
+        Returns:
+            Generator of (variant, quote) pairs, one per variant, in the order the requests complete. quote is None for
+                variants the API did not quote.
+        """
+        _strategy_quotes_query(variants)
+        batches = self._iter_concurrent(self._quote_strategy_batch, _chunks(variants, self.MAX_VARIANTS_PER_REQUEST))
+        return (pair for batch in batches for pair in batch)
+
+    @overload
+    def get_candles(
+        self,
+        ticker: Union[str, Ticker, TickerDetails, int],
+        interval: Granularity,
+        start_time: dt,
+        end_time: dt,
+        raw_data: bool = ...,
+        as_series: Literal[False] = ...,
+    ) -> Union[list[Candle], list[dict[str, Any]]]:
+        ...
+
+    @overload
+    def get_candles(
+        self,
+        ticker: Union[str, Ticker, TickerDetails, int],
+        interval: Granularity,
+        start_time: dt,
+        end_time: dt,
+        raw_data: bool = ...,
+        *,
+        as_series: Literal[True],
+    ) -> CandleSeries:
+        ...
 
     def get_candles(
         self,
@@ -1334,41 +2664,51 @@ class QuestradeIQ:
         start_time: dt,
         end_time: dt,
         raw_data: bool = False,
-    ) -> Union[list[Candle], dict[str, Any]]:
+        as_series: bool = False,
+    ) -> Union[list[Candle], list[dict[str, Any]], CandleSeries]:
         """Retrieves historical market data in the form of OHLC candlesticks for a specified symbol.
 
-            This call is limited to returning 2,000 candlesticks in a single response.
+            The API returns at most 2,000 candlesticks per request. Longer ranges are split into windows of at most
+            that many candles, fetched concurrently and merged in order.
 
         Args:
             ticker: Symbol identifier.
             interval: Interval of a single candlestick.
             start_time: Beginning of the candlestick range.
             end_time: End of the candlestick range.
+            raw_data: Return the candles as received instead of Candle objects.
+            as_series: Return the candles as a columnar CandleSeries instead of Candle objects.
 
         Returns:
-            List of Candles
+            List of Candles, or a CandleSeries if as_series is set
 
         See Also:
             https://www.questrade.com/api/documentation/rest-operations/market-calls/markets-candles-id
         """
-        id: int = 0
-        if isinstance(ticker, int):
-            id = ticker
-        elif isinstance(ticker, (Ticker, TickerDetails)):
-            id = ticker.symbol_id
-        elif isinstance(ticker, str):
-            id = self.get_tickers(ticker)[0].symbol_id
-        else:
-            raise TypeError("Invalid type for 'ticker'")
-        query = {
-            "startTime": start_time.isoformat(),
-            "endTime": end_time.isoformat(),
-            "interval": interval.name,
-        }
-        response = self._make_request(f"markets/candles/{id}", params=query)
-        if "candles" not in response:
-            raise RuntimeError("Invalid respose received")  # pragma: no cover
-        return response["candles"] if raw_data else [Candle(candle) for candle in response["candles"]]
+        id = _single_ticker(ticker)
+        if isinstance(id, str):
+            id = self._resolve_symbol_ids([id])[0]
+        symbol_id = id
+
+        def get_window(window: tuple[dt, dt]) -> list[dict[str, Any]]:
+            query = {
+                "startTime": window[0].isoformat(),
+                "endTime": window[1].isoformat(),
+                "interval": interval.name,
+            }
+            response = self._make_request(f"markets/candles/{symbol_id}", params=query)
+            if "candles" not in response:
+                raise RuntimeError("Invalid respose received")  # pragma: no cover
+            candles: list[dict[str, Any]] = response["candles"]
+            return candles
+
+        windows = _candle_windows(start_time, end_time, interval, self.MAX_CANDLES_PER_REQUEST)
+        candles = _merge_candle_windows(self._map_concurrent(get_window, windows))
+        if as_series:
+            from .candles import CandleSeries
+
+            return CandleSeries.from_raw(candles)
+        return candles if raw_data else [Candle(candle) for candle in candles]
 
     def setup_streaming_notifications(self, socket_mode: SocketMode) -> int:
         """Retrieves the port number used for notification streaming.
@@ -1392,17 +2732,36 @@ class QuestradeIQ:
         """Retrieves the port number used for L1 quote streaming.
 
         Args:
-            ids: List of symbol ids to stream.
+            ids: List of at most MAX_IDS_PER_REQUEST symbol ids to stream.
             socket_mode: Either RawSocket or WebSocket.
 
         Returns:
             The port number to connect to with ether raw or web sockets as requested.
 
+        Raises:
+            ValueError: If there are more than MAX_IDS_PER_REQUEST ids, see setup_streaming_quotes_batched().
+
         See Also:
             https://www.questrade.com/api/documentation/streaming
         """
-        query = {"ids": ",".join([str(id) for id in ids]), "stream": "true", "mode": socket_mode.name}
+        query = _streaming_quotes_query(ids, socket_mode, self.MAX_IDS_PER_REQUEST)
         response = self._make_request("markets/quotes", params=query)
         if "streamPort" not in response:
             raise RuntimeError("Invalid respose received")  # pragma: no cover
         return int(response["streamPort"])
+
+    def setup_streaming_quotes_batched(self, ids: list[int], socket_mode: SocketMode) -> list[int]:
+        """Retrieves the port numbers used for L1 quote streaming of any number of symbols.
+
+            The ids are split into streams of at most MAX_IDS_PER_REQUEST symbols set up concurrently.
+
+        Args:
+            ids: List of symbol ids to stream.
+            socket_mode: Either RawSocket or WebSocket.
+
+        Returns:
+            One port number per stream, in the order of the ids they stream.
+        """
+        return self._map_concurrent(
+            lambda chunk: self.setup_streaming_quotes(chunk, socket_mode), _chunks(ids, self.MAX_IDS_PER_REQUEST)
+        )
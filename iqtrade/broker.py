@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from types import TracebackType
+from typing import Any, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+    import msvcrt
+
+
+class FileLock:
+    """Advisory lock on a file, exclusive between processes and between instances in the same process."""
+
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, filename: str, timeout: float = 30):
+        self.filename = filename
+        self.timeout = timeout
+        self._fd: Optional[int] = None
+
+    def __enter__(self) -> FileLock:
+        self.acquire()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.release()
+
+    @staticmethod
+    def _try_lock(fd: int) -> bool:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:  # pragma: no cover
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
+    @staticmethod
+    def _unlock(fd: int) -> None:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:  # pragma: no cover
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+    def acquire(self) -> None:
+        """Blocks until the lock is held.
+
+        Raises:
+            TimeoutError: If the lock could not be acquired within timeout seconds.
+        """
+        if self._fd is not None:
+            raise RuntimeError("Lock already acquired")
+        fd = os.open(self.filename, os.O_RDWR | os.O_CREAT, 0o600)
+        deadline = time.monotonic() + self.timeout
+        while not self._try_lock(fd):
+            if time.monotonic() >= deadline:
+                os.close(fd)
+                raise TimeoutError(f"Could not lock '{self.filename}' within {self.timeout}s")
+            time.sleep(self.POLL_INTERVAL)
+        self._fd = fd
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        try:
+            self._unlock(self._fd)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+
+class TokenBroker:
+    """Coordinates access token refreshes between processes sharing one config file.
+
+    Questrade refresh tokens are single use, so two processes refreshing with the same refresh token invalidate each
+    other. The broker serializes refreshes with a lock file next to the config: the process holding the lock first
+    re-reads the config, adopts the access token another process saved if it is still valid, and only otherwise
+    refreshes and saves the new tokens before releasing the lock.
+    """
+
+    def __init__(self, config_filename: str, *, lock_filename: Optional[str] = None, timeout: float = 30):
+        """Constructor
+
+        Args:
+            config_filename: Config file shared by the processes.
+            lock_filename: Lock file, by default config_filename + ".lock".
+            timeout: Longest time in seconds to wait for another process' refresh.
+        """
+        self.config_filename = config_filename
+        self.lock_filename = lock_filename if lock_filename is not None else config_filename + ".lock"
+        self.timeout = timeout
+
+    def lock(self) -> FileLock:
+        """Returns a new, not yet acquired, lock guarding token refreshes."""
+        return FileLock(self.lock_filename, self.timeout)
+
+    def load(self) -> dict[str, Any]:
+        """Reads the shared config. Returns an empty dict if it cannot be read."""
+        try:
+            with open(self.config_filename, "r") as infile:
+                shared = json.load(infile)
+        except (OSError, ValueError):
+            return {}
+        return shared if isinstance(shared, dict) else {}
@@ -0,0 +1,514 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import date
+from datetime import datetime as dt
+from datetime import time as dt_time
+from datetime import timedelta
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Optional, Union
+from zoneinfo import ZoneInfo
+
+from .storage import atomic_write, atomic_write_json
+
+if TYPE_CHECKING:
+    from .api import ChainPerExpiryDate
+    from .options import OptionChainIndex
+
+logger = logging.getLogger(__name__)
+
+DAY = 24 * 3600.0
+EXCHANGE_TIMEZONE = "America/New_York"
+
+
+class SymbolCache:
+    """Cache of symbol details (the payloads of the symbols call) keyed by symbol id and by symbol name.
+
+    Entries expire per field: every field of the payload has a time to live, so the same entry can still resolve a
+    name to its symbol id, which practically never changes, after its prices and ratios have become stale. The cache
+    holds at most max_size symbols and evicts the least recently used ones. With a filename the cache is loaded
+    when created and saved by flush(), close() and at interpreter exit, so a restarted process starts warm.
+    """
+
+    DEFAULT_FIELD_TTLS = {"symbol": 30 * DAY, "symbolId": 30 * DAY}
+
+    def __init__(
+        self,
+        *,
+        max_size: int = 10000,
+        ttl: float = 12 * 3600.0,
+        field_ttls: Optional[dict[str, float]] = None,
+        filename: Optional[str] = None,
+    ):
+        """Constructor
+
+        Args:
+            max_size: Largest number of symbols kept.
+            ttl: Time to live in seconds of the fields without an entry in field_ttls.
+            field_ttls: Time to live in seconds per payload key (e.g. "prevDayClosePrice"), by default 30 days for
+                "symbol" and "symbolId".
+            filename: JSON file the cache is loaded from and saved to, None to keep it in memory only.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.field_ttls = dict(self.DEFAULT_FIELD_TTLS if field_ttls is None else field_ttls)
+        self.filename = filename
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._symbols: OrderedDict[int, tuple[float, dict[str, Any]]] = OrderedDict()  # id: (fetch time, payload)
+        self._names: dict[str, int] = {}
+        self._dirty = False
+        if filename is not None:
+            self._load()
+            atexit.register(self.flush)
+
+    @staticmethod
+    def _normalize_name(name: str) -> str:
+        return name.upper()
+
+    def _field_ttl(self, fields: Optional[Iterable[str]]) -> float:
+        if fields is None:
+            return min([self.ttl, *self.field_ttls.values()])
+        return min(self.field_ttls.get(field, self.ttl) for field in fields)
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def _get_locked(self, ticker: Union[int, str], max_age: float, now: float) -> Optional[dict[str, Any]]:
+        symbol_id = ticker if isinstance(ticker, int) else self._names.get(self._normalize_name(ticker))
+        if symbol_id is None or symbol_id not in self._symbols:
+            return None
+        fetched, payload = self._symbols[symbol_id]
+        if now - fetched >= max_age:
+            return None
+        self._symbols.move_to_end(symbol_id)
+        return payload
+
+    def lookup(
+        self, tickers: Iterable[Union[int, str]], fields: Optional[Iterable[str]] = None
+    ) -> tuple[dict[Union[int, str], dict[str, Any]], list[Union[int, str]]]:
+        """Looks up symbols by id or name.
+
+        Args:
+            tickers: Symbol ids and names.
+            fields: Payload keys the caller needs, they decide how old an entry may be. None for all of them.
+
+        Returns:
+            The payloads found, keyed by the ticker as given, and the tickers not found or expired.
+        """
+        max_age = self._field_ttl(fields)
+        now = time.time()
+        found: dict[Union[int, str], dict[str, Any]] = {}
+        missing: list[Union[int, str]] = []
+        with self._lock:
+            for ticker in tickers:
+                payload = self._get_locked(ticker, max_age, now)
+                if payload is None:
+                    missing.append(ticker)
+                else:
+                    found[ticker] = payload
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def get(self, ticker: Union[int, str], fields: Optional[Iterable[str]] = None) -> Optional[dict[str, Any]]:
+        """Returns the payload of a symbol, or None if it is not cached or expired."""
+        found, _ = self.lookup([ticker], fields)
+        return found.get(ticker)
+
+    def get_symbol_id(self, name: str) -> Optional[int]:
+        """Resolves a symbol name to its id, or returns None if it is not cached."""
+        payload = self.get(name, ("symbolId",))
+        return None if payload is None else int(payload["symbolId"])
+
+    def put(self, symbols: Iterable[dict[str, Any]], *, fetched: Optional[float] = None) -> None:
+        """Adds or replaces symbols.
+
+        Args:
+            symbols: Payloads as received from the symbols call.
+            fetched: When the payloads were fetched, by default now.
+        """
+        fetched = time.time() if fetched is None else fetched
+        with self._lock:
+            for payload in symbols:
+                symbol_id = int(payload["symbolId"])
+                self._symbols[symbol_id] = (fetched, payload)
+                self._symbols.move_to_end(symbol_id)
+                self._names[self._normalize_name(payload["symbol"])] = symbol_id
+            while len(self._symbols) > self.max_size:
+                _, (_, evicted) = self._symbols.popitem(last=False)
+                name = self._normalize_name(evicted["symbol"])
+                if self._names.get(name) == evicted["symbolId"]:
+                    del self._names[name]
+            self._dirty = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._symbols.clear()
+            self._names.clear()
+            self._dirty = True
+
+    def _load(self) -> None:
+        assert self.filename is not None
+        try:
+            with open(self.filename, "r") as infile:
+                saved = json.load(infile)
+            entries = saved["symbols"]
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.warning("Ignoring unreadable symbol cache '%s'", self.filename, exc_info=True)
+            return
+        for entry in entries:
+            self.put([entry["data"]], fetched=entry["fetched"])
+        self._dirty = False
+
+    def flush(self) -> None:
+        """Saves the cache to its file if it changed since it was loaded or last saved."""
+        if self.filename is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            # Least recently used first, so that loading restores the eviction order
+            entries = [{"fetched": fetched, "data": payload} for fetched, payload in self._symbols.values()]
+            atomic_write_json(self.filename, {"symbols": entries})
+            self._dirty = False
+
+    def close(self) -> None:
+        self.flush()
+        if self.filename is not None:
+            atexit.unregister(self.flush)
+
+
+class QuoteCache:
+    """Recently received quotes, for callers that accept quotes up to a given age instead of requesting fresh ones.
+
+    Quotes are kept per kind ("quote" for Level 1 quotes, "option" for option quotes) and symbol id. The cache holds at
+    most max_size quotes and evicts the least recently used ones. Ages are measured with a monotonic clock, so the cache
+    is only meaningful within a process.
+    """
+
+    def __init__(self, *, max_size: int = 10000):
+        """Constructor
+
+        Args:
+            max_size: Largest number of quotes kept.
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._quotes: OrderedDict[tuple[str, int], tuple[float, dict[str, Any]]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._quotes)
+
+    def lookup(
+        self, kind: str, symbol_ids: Iterable[int], max_age: float
+    ) -> tuple[dict[int, dict[str, Any]], list[int]]:
+        """Looks up quotes by symbol id.
+
+        Args:
+            kind: Kind of quote.
+            symbol_ids: Symbol ids.
+            max_age: Age in seconds above which a quote is not returned.
+
+        Returns:
+            The quote payloads found, keyed by symbol id, and the ids not found or too old.
+        """
+        now = time.monotonic()
+        found: dict[int, dict[str, Any]] = {}
+        missing: list[int] = []
+        with self._lock:
+            for symbol_id in symbol_ids:
+                key = (kind, symbol_id)
+                entry = self._quotes.get(key)
+                if entry is None or now - entry[0] > max_age:
+                    missing.append(symbol_id)
+                else:
+                    self._quotes.move_to_end(key)
+                    found[symbol_id] = entry[1]
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def put(self, kind: str, quotes: Iterable[dict[str, Any]]) -> None:
+        """Adds or replaces quotes, received now.
+
+        Args:
+            kind: Kind of quote.
+            quotes: Payloads as received from the API.
+        """
+        now = time.monotonic()
+        with self._lock:
+            for payload in quotes:
+                key = (kind, int(payload["symbolId"]))
+                self._quotes[key] = (now, payload)
+                self._quotes.move_to_end(key)
+            while len(self._quotes) > self.max_size:
+                self._quotes.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._quotes.clear()
+
+
+_CHAIN_MAGIC = b"IQOC\x01"
+
+
+def _encode_chain(chain: dict[dt, ChainPerExpiryDate], fetched: float) -> bytes:
+    """Encodes an option chain into the binary cache format.
+
+    The format is a magic number followed by a zlib stream holding the length of a JSON header, the header (expiries,
+    roots and strike counts) and, per root, the strike prices (float64), call symbol ids and put symbol ids (int64)
+    packed little endian.
+    """
+    expiries = []
+    arrays = []
+    for expiry in sorted(chain):
+        chain_per_expiry = chain[expiry]
+        roots = []
+        for chain_per_root in chain_per_expiry.chain_per_root.values():
+            strikes = sorted(chain_per_root.chain_per_strike_price.values(), key=lambda x: x.strike_price)
+            count = len(strikes)
+            roots.append(
+                {"optionRoot": chain_per_root.option_root, "multiplier": chain_per_root.multiplier, "strikes": count}
+            )
+            arrays.append(
+                struct.pack(
+                    f"<{count}d{count}q{count}q",
+                    *[x.strike_price for x in strikes],
+                    *[x.call_symbol_id for x in strikes],
+                    *[x.put_symbol_id for x in strikes],
+                )
+            )
+        expiries.append(
+            {
+                "expiryDate": chain_per_expiry.expiry_date.isoformat(),
+                "description": chain_per_expiry.description,
+                "listingExchange": chain_per_expiry.listing_exchange.name,
+                "optionExerciseType": chain_per_expiry.option_exercise_type.name,
+                "chainPerRoot": roots,
+            }
+        )
+    header = json.dumps({"fetched": fetched, "optionChain": expiries}).encode("utf-8")
+    return _CHAIN_MAGIC + zlib.compress(struct.pack("<I", len(header)) + header + b"".join(arrays))
+
+
+def _decode_chain(data: bytes) -> tuple[dict[dt, ChainPerExpiryDate], float]:
+    """Decodes an option chain and its fetch time from the binary cache format.
+
+    Raises:
+        ValueError: If data is not in the cache format.
+    """
+    from . import api
+
+    if not data.startswith(_CHAIN_MAGIC):
+        raise ValueError("Not an option chain cache file")
+    magic_size = len(_CHAIN_MAGIC)
+    payload = zlib.decompress(data[magic_size:])
+    (header_size,) = struct.unpack_from("<I", payload)
+    offset = 4 + header_size
+    header = json.loads(payload[4:offset])
+    for chain_per_expiry in header["optionChain"]:
+        for chain_per_root in chain_per_expiry["chainPerRoot"]:
+            count = chain_per_root.pop("strikes")
+            values = struct.unpack_from(f"<{count}d{count}q{count}q", payload, offset)
+            offset += 24 * count
+            chain_per_root["chainPerStrikePrice"] = [
+                {"strikePrice": values[i], "callSymbolId": values[count + i], "putSymbolId": values[2 * count + i]}
+                for i in range(count)
+            ]
+    chains = [api.ChainPerExpiryDate(chain_per_expiry) for chain_per_expiry in header["optionChain"]]
+    return {chain.expiry_date: chain for chain in chains}, header["fetched"]
+
+
+@lru_cache(maxsize=None)
+def _exchange_timezone() -> ZoneInfo:
+    # Looked up on first use: importing the package must not need a time zone database
+    return ZoneInfo(EXCHANGE_TIMEZONE)
+
+
+def _trading_date(when: float) -> date:
+    """Returns the date at time when in the exchange's time zone, daylight saving time included."""
+    return dt.fromtimestamp(when, _exchange_timezone()).date()
+
+
+def _next_trading_date_start(when: float) -> float:
+    """Returns the time the trading date following the one at time when begins."""
+    tomorrow = _trading_date(when) + timedelta(days=1)
+    return dt.combine(tomorrow, dt_time(), _exchange_timezone()).timestamp()
+
+
+class OptionChainCache:
+    """Option chains by underlying symbol id, valid for the trading date they were fetched on.
+
+    Series are only listed between trading days, so a chain is used until the date changes in the exchange's time
+    zone (New York), or until one of its expiries has passed. With a directory, chains are also saved there in a compact
+    binary form (packed strike and id arrays, zlib compressed) so other processes and restarts can reuse them.
+
+    start_refresh() refreshes the chains in a background thread as soon as the trading date changes, so lookups keep
+    being served from memory after the date changes.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        """Constructor
+
+        Args:
+            directory: Directory the chains are saved to and loaded from, created if needed. None to keep them in
+                memory only.
+        """
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._chains: dict[int, tuple[float, dict[dt, ChainPerExpiryDate]]] = {}  # symbol id: (fetch time, chain)
+        self._indexes: dict[int, OptionChainIndex] = {}
+        self._refresh_stop: Optional[threading.Event] = None
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _filename(self, symbol_id: int) -> str:
+        assert self.directory is not None
+        return os.path.join(self.directory, f"{symbol_id}.chain")
+
+    @staticmethod
+    def is_valid(chain: dict[dt, ChainPerExpiryDate], fetched: float, now: Optional[float] = None) -> bool:
+        """Tells whether a chain fetched at time fetched can still be used at time now (by default now)."""
+        now = time.time() if now is None else now
+        today = _trading_date(now)
+        if _trading_date(fetched) != today:
+            return False
+        return all(expiry.date() >= today for expiry in chain)
+
+    def _load(self, symbol_id: int) -> Optional[tuple[float, dict[dt, ChainPerExpiryDate]]]:
+        if self.directory is None:
+            return None
+        try:
+            with open(self._filename(symbol_id), "rb") as infile:
+                chain, fetched = _decode_chain(infile.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError, struct.error, zlib.error):
+            logger.warning("Ignoring unreadable option chain cache of %d", symbol_id, exc_info=True)
+            return None
+        return fetched, chain
+
+    def get(self, symbol_id: int) -> Optional[dict[dt, ChainPerExpiryDate]]:
+        """Returns the chain of an underlying if it is cached and still valid, from memory or from disk."""
+        with self._lock:
+            entry = self._chains.get(symbol_id)
+        if entry is None or not self.is_valid(entry[1], entry[0]):
+            entry = self._load(symbol_id)
+            if entry is None or not self.is_valid(entry[1], entry[0]):
+                return None
+            with self._lock:
+                self._chains[symbol_id] = entry
+                self._indexes.pop(symbol_id, None)
+        return entry[1]
+
+    def get_index(self, symbol_id: int) -> Optional[OptionChainIndex]:
+        """Returns an OptionChainIndex of the chain of an underlying if it is cached and still valid."""
+        from .options import OptionChainIndex
+
+        chain = self.get(symbol_id)
+        if chain is None:
+            return None
+        with self._lock:
+            index = self._indexes.get(symbol_id)
+            if index is None:
+                index = self._indexes[symbol_id] = OptionChainIndex(chain)
+        return index
+
+    def put(self, symbol_id: int, chain: dict[dt, ChainPerExpiryDate], *, fetched: Optional[float] = None) -> None:
+        """Adds or replaces the chain of an underlying.
+
+        Args:
+            symbol_id: Symbol id of the underlying.
+            chain: Chain as returned by get_option_chain().
+            fetched: When the chain was fetched, by default now.
+        """
+        fetched = time.time() if fetched is None else fetched
+        with self._lock:
+            self._chains[symbol_id] = (fetched, chain)
+            self._indexes.pop(symbol_id, None)
+        if self.directory is not None:
+            atomic_write(self._filename(symbol_id), _encode_chain(chain, fetched))
+
+    def symbol_ids(self) -> list[int]:
+        """Returns the underlyings held in memory."""
+        with self._lock:
+            return list(self._chains)
+
+    def refresh(self, fetch: Callable[[int], dict[dt, ChainPerExpiryDate]]) -> int:
+        """Fetches the chains held in memory that are no longer valid.
+
+            A chain that cannot be fetched is logged and stays stale, the other chains are still refreshed.
+
+        Args:
+            fetch: Function returning the chain of an underlying, e.g. QuestradeIQ.get_option_chain.
+
+        Returns:
+            Number of chains refreshed.
+        """
+        refreshed = 0
+        for symbol_id in self.symbol_ids():
+            with self._lock:
+                fetched, chain = self._chains[symbol_id]
+            if self.is_valid(chain, fetched):
+                continue
+            try:
+                chain = fetch(symbol_id)
+            except Exception:
+                logger.warning("Refreshing the option chain of %d failed", symbol_id, exc_info=True)
+                continue
+            with self._lock:
+                current = self._chains.get(symbol_id)
+            # A fetch through a client using this cache has put the chain already
+            if current is None or current[1] is not chain:
+                self.put(symbol_id, chain)
+            refreshed += 1
+        return refreshed
+
+    def _refresh_delay(self, now: float, retry_interval: float) -> float:
+        """Returns how long the refresh thread sleeps: until the next trading date, shorter while chains are stale."""
+        delay = _next_trading_date_start(now) - now
+        with self._lock:
+            entries = list(self._chains.values())
+        if any(not self.is_valid(chain, fetched, now) for fetched, chain in entries):
+            delay = min(delay, retry_interval)
+        # Waits can end a little early, never spin until the date changes
+        return max(delay, 1.0)
+
+    def start_refresh(
+        self, fetch: Callable[[int], dict[dt, ChainPerExpiryDate]], retry_interval: float = 300.0
+    ) -> None:
+        """Starts a daemon thread calling refresh() when the trading date changes, until stop_refresh() is called.
+
+        The thread sleeps until the next New York midnight, so it costs nothing between trading dates. Chains that
+        could not be fetched are tried again every retry_interval seconds.
+        """
+        self.stop_refresh()
+        stop = self._refresh_stop = threading.Event()
+
+        def run() -> None:
+            while not stop.wait(self._refresh_delay(time.time(), retry_interval)):
+                try:
+                    self.refresh(fetch)
+                except Exception:
+                    logger.warning("Option chain refresh failed", exc_info=True)
+
+        threading.Thread(target=run, name="iqtrade-option-chains", daemon=True).start()
+
+    def stop_refresh(self) -> None:
+        if self._refresh_stop is not None:
+            self._refresh_stop.set()
+            self._refresh_stop = None
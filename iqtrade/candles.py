@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import math
+from datetime import datetime as dt
+from datetime import timedelta, timezone
+from typing import Any, Iterable, Union, overload
+
+from .api import Candle, _parse_datetime
+from .columns import FLOAT64, INT64, column_to_list, is_numpy_column, make_column
+
+EPOCH = dt(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def datetime_to_epoch_ns(value: dt) -> int:
+    """Converts a datetime to nanoseconds since the epoch. Naive datetimes are taken as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - EPOCH) // timedelta(microseconds=1) * 1000
+
+
+def iso_to_epoch_ns(timestamp: str) -> int:
+    """Converts an ISO 8601 timestamp to nanoseconds since the epoch. Timestamps without offset are taken as UTC."""
+    return datetime_to_epoch_ns(_parse_datetime(timestamp))
+
+
+def epoch_ns_to_datetime(epoch_ns: int) -> dt:
+    """Converts nanoseconds since the epoch to an aware UTC datetime (microsecond precision)."""
+    return EPOCH + timedelta(microseconds=epoch_ns // 1000)
+
+
+class CandleSeries:
+    """OHLCV candles stored column by column in contiguous typed arrays.
+
+    Timestamps are nanoseconds since the epoch (int64), prices and VWAP are float64 (NaN when VWAP is missing) and
+    volumes are int64. Columns are NumPy arrays when NumPy is installed, memoryviews over array.array otherwise.
+    Slicing a series returns a view sharing the same memory.
+    """
+
+    COLUMNS = ("start", "end", "open", "high", "low", "close", "volume", "vwap")
+    TYPECODES = (INT64, INT64, FLOAT64, FLOAT64, FLOAT64, FLOAT64, INT64, FLOAT64)
+
+    def __init__(self, start: Any, end: Any, open: Any, high: Any, low: Any, close: Any, volume: Any, vwap: Any):
+        self.start = start
+        self.end = end
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.vwap = vwap
+
+    @classmethod
+    def from_raw(cls, candles: Iterable[dict[str, Any]], *, use_numpy: bool = True) -> CandleSeries:
+        """Builds a series from candles as returned by get_candles(raw_data=True), in a single pass."""
+        columns: tuple[list[Any], ...] = ([], [], [], [], [], [], [], [])
+        start, end, open, high, low, close, volume, vwap = columns
+        for candle in candles:
+            start.append(iso_to_epoch_ns(candle["start"]))
+            end.append(iso_to_epoch_ns(candle["end"]))
+            open.append(candle["open"])
+            high.append(candle["high"])
+            low.append(candle["low"])
+            close.append(candle["close"])
+            volume.append(candle["volume"])
+            candle_vwap = candle.get("VWAP")
+            vwap.append(math.nan if candle_vwap is None else candle_vwap)
+        return cls(
+            *[make_column(values, typecode, use_numpy=use_numpy) for values, typecode in zip(columns, cls.TYPECODES)]
+        )
+
+    @classmethod
+    def from_candles(cls, candles: Iterable[Candle], *, use_numpy: bool = True) -> CandleSeries:
+        return cls.from_raw(
+            (
+                {
+                    "start": candle.start,
+                    "end": candle.end,
+                    "open": candle.open,
+                    "high": candle.high,
+                    "low": candle.low,
+                    "close": candle.close,
+                    "volume": candle.volume,
+                    "VWAP": candle.vwap,
+                }
+                for candle in candles
+            ),
+            use_numpy=use_numpy,
+        )
+
+    @classmethod
+    def empty(cls, *, use_numpy: bool = True) -> CandleSeries:
+        return cls.from_raw([], use_numpy=use_numpy)
+
+    def columns(self) -> dict[str, Any]:
+        """Returns the columns by name."""
+        return {name: getattr(self, name) for name in self.COLUMNS}
+
+    def is_numpy(self) -> bool:
+        return is_numpy_column(self.start)
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    @overload
+    def __getitem__(self, index: int) -> Candle:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> CandleSeries:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Candle, CandleSeries]:
+        if isinstance(index, slice):
+            return CandleSeries(*[column[index] for column in self.columns().values()])
+        return self._candle(index)
+
+    def _candle(self, index: int) -> Candle:
+        vwap = float(self.vwap[index])
+        return Candle(
+            {
+                "start": epoch_ns_to_datetime(int(self.start[index])).isoformat(),
+                "end": epoch_ns_to_datetime(int(self.end[index])).isoformat(),
+                "open": float(self.open[index]),
+                "high": float(self.high[index]),
+                "low": float(self.low[index]),
+                "close": float(self.close[index]),
+                "volume": int(self.volume[index]),
+                "VWAP": None if math.isnan(vwap) else vwap,
+            }
+        )
+
+    def to_candles(self) -> list[Candle]:
+        """Returns the candles as Candle objects, with start and end as UTC ISO timestamps."""
+        return [self._candle(index) for index in range(len(self))]
+
+    def to_lists(self) -> dict[str, list[Any]]:
+        return {name: column_to_list(column) for name, column in self.columns().items()}
+
+    def __str__(self) -> str:  # pragma: no cover
+        if len(self) == 0:
+            return "CandleSeries(empty)"
+        first = epoch_ns_to_datetime(int(self.start[0])).isoformat()
+        last = epoch_ns_to_datetime(int(self.start[len(self) - 1])).isoformat()
+        return f"CandleSeries({len(self)} candles {first} - {last})"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import mmap
+import os
+import threading
+import time
+from datetime import datetime as dt
+from typing import Any, Optional
+
+from .api import Granularity, QuestradeIQ
+from .candles import CandleSeries, datetime_to_epoch_ns, epoch_ns_to_datetime
+from .columns import column_from_buffer, make_column
+from .storage import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+ITEM_SIZE = 8  # every column holds 8 byte values (int64 or float64)
+
+
+def _subtract_ranges(start: int, end: int, covered: list[list[int]]) -> list[tuple[int, int]]:
+    """Returns the parts of [start, end] not in the sorted, disjoint covered ranges."""
+    missing = []
+    position = start
+    for covered_start, covered_end in covered:
+        if covered_end < position:
+            continue
+        if covered_start > end:
+            break
+        if covered_start > position:
+            missing.append((position, covered_start))
+        position = max(position, covered_end)
+    if position < end:
+        missing.append((position, end))
+    return missing
+
+
+def _add_range(covered: list[list[int]], start: int, end: int) -> list[list[int]]:
+    """Adds [start, end] to the sorted, disjoint covered ranges, merging ranges that overlap or touch."""
+    result: list[list[int]] = []
+    for covered_start, covered_end in sorted(covered + [[start, end]]):
+        if result and covered_start <= result[-1][1]:
+            result[-1][1] = max(result[-1][1], covered_end)
+        else:
+            result.append([covered_start, covered_end])
+    return result
+
+
+def _contains(column: Any, value: int) -> bool:
+    """Tells whether the sorted column holds value."""
+    position = bisect.bisect_left(column, value)
+    return position < len(column) and column[position] == value
+
+
+class CandleStore:
+    """Local store of historical candles, kept in one directory per symbol.
+
+    Every (symbol id, granularity) pair has one binary file per CandleSeries column, holding native byte order int64
+    or float64 values sorted by start time, and a JSON index recording the number of valid rows and the time ranges
+    already synced. New candles after the stored ones are appended to the column files; candles before or between
+    stored ones (backfills) rewrite the columns into new files. Stored rows are never modified in place and the index
+    is replaced last, so an interrupted sync leaves the previous content readable.
+
+    read() memory-maps the column files, so the returned series are views on the files rather than copies.
+
+    The store is safe to use from several threads, but only one process should sync a given symbol at a time. Syncs
+    of the same symbol and granularity run one at a time, while reads and other syncs go on during their requests.
+    """
+
+    def __init__(self, directory: str, *, use_numpy: bool = True):
+        """Constructor
+
+        Args:
+            directory: Directory holding the store, created if needed.
+            use_numpy: Return NumPy columns when NumPy is installed.
+        """
+        self.directory = directory
+        self.use_numpy = use_numpy
+        self._lock = threading.Lock()
+        self._sync_locks: dict[tuple[int, Granularity], threading.Lock] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _sync_lock(self, symbol_id: int, granularity: Granularity) -> threading.Lock:
+        with self._lock:
+            return self._sync_locks.setdefault((symbol_id, granularity), threading.Lock())
+
+    def _index_filename(self, symbol_id: int, granularity: Granularity) -> str:
+        return os.path.join(self.directory, str(symbol_id), f"{granularity.name}.json")
+
+    def _column_filename(self, symbol_id: int, granularity: Granularity, generation: int, column: str) -> str:
+        return os.path.join(self.directory, str(symbol_id), f"{granularity.name}.{generation}.{column}")
+
+    def _load_index(self, symbol_id: int, granularity: Granularity) -> dict[str, Any]:
+        try:
+            with open(self._index_filename(symbol_id, granularity), "r") as infile:
+                index: dict[str, Any] = json.load(infile)
+        except FileNotFoundError:
+            return {"generation": 0, "rows": 0, "coverage": []}
+        return index
+
+    def _save_index(self, symbol_id: int, granularity: Granularity, index: dict[str, Any]) -> None:
+        atomic_write_json(self._index_filename(symbol_id, granularity), index)
+
+    def _map_columns(self, symbol_id: int, granularity: Granularity, index: dict[str, Any]) -> CandleSeries:
+        rows = index["rows"]
+        columns = []
+        for column, typecode in zip(CandleSeries.COLUMNS, CandleSeries.TYPECODES):
+            if rows == 0:
+                columns.append(make_column([], typecode, use_numpy=self.use_numpy))
+                continue
+            filename = self._column_filename(symbol_id, granularity, index["generation"], column)
+            with open(filename, "rb") as infile:
+                mapped = mmap.mmap(infile.fileno(), rows * ITEM_SIZE, access=mmap.ACCESS_READ)
+            columns.append(column_from_buffer(mapped, typecode, use_numpy=self.use_numpy))
+        return CandleSeries(*columns)
+
+    def read(
+        self,
+        symbol_id: int,
+        granularity: Granularity,
+        start_time: Optional[dt] = None,
+        end_time: Optional[dt] = None,
+    ) -> CandleSeries:
+        """Reads stored candles without copying them.
+
+        Args:
+            symbol_id: Symbol identifier.
+            granularity: Interval of a single candlestick.
+            start_time: Earliest candle start to return, all stored candles if None.
+            end_time: Latest candle start to return, all stored candles if None.
+
+        Returns:
+            The stored candles in the range, sorted by start time.
+        """
+        with self._lock:
+            series = self._map_columns(symbol_id, granularity, self._load_index(symbol_id, granularity))
+        first = 0 if start_time is None else bisect.bisect_left(series.start, datetime_to_epoch_ns(start_time))
+        last = len(series) if end_time is None else bisect.bisect_right(series.start, datetime_to_epoch_ns(end_time))
+        return series[first:last]
+
+    def coverage(self, symbol_id: int, granularity: Granularity) -> list[tuple[dt, dt]]:
+        """Returns the time ranges already synced, sorted and disjoint."""
+        with self._lock:
+            index = self._load_index(symbol_id, granularity)
+        return [(epoch_ns_to_datetime(start), epoch_ns_to_datetime(end)) for start, end in index["coverage"]]
+
+    def missing_ranges(
+        self, symbol_id: int, granularity: Granularity, start_time: dt, end_time: dt
+    ) -> list[tuple[dt, dt]]:
+        """Returns the parts of [start_time, end_time] that still need to be fetched."""
+        with self._lock:
+            index = self._load_index(symbol_id, granularity)
+        missing = _subtract_ranges(datetime_to_epoch_ns(start_time), datetime_to_epoch_ns(end_time), index["coverage"])
+        return [(epoch_ns_to_datetime(start), epoch_ns_to_datetime(end)) for start, end in missing]
+
+    def sync(self, client: QuestradeIQ, symbol_id: int, granularity: Granularity, start_time: dt, end_time: dt) -> int:
+        """Fetches the candles of [start_time, end_time] that are not stored yet.
+
+            Only the ranges not covered by previous syncs are requested. A candle that has not closed yet is not
+            stored and its range is not marked as synced, so a later sync fetches it once it is complete.
+
+        Args:
+            client: Client used to fetch the candles.
+            symbol_id: Symbol identifier.
+            granularity: Interval of a single candlestick.
+            start_time: Beginning of the range to sync.
+            end_time: End of the range to sync.
+
+        Returns:
+            Number of candles added to the store.
+        """
+        # Only syncs change the index, so it stays current while the candles are fetched without the store lock
+        with self._sync_lock(symbol_id, granularity):
+            with self._lock:
+                index = self._load_index(symbol_id, granularity)
+            start_ns = datetime_to_epoch_ns(start_time)
+            end_ns = min(datetime_to_epoch_ns(end_time), time.time_ns())
+            rows: int = index["rows"]
+            for gap_start, gap_end in _subtract_ranges(start_ns, end_ns, index["coverage"]):
+                candles = client.get_candles(
+                    symbol_id,
+                    granularity,
+                    epoch_ns_to_datetime(gap_start),
+                    epoch_ns_to_datetime(gap_end),
+                    as_series=True,
+                )
+                covered_end = gap_end
+                if len(candles) and candles.end[len(candles) - 1] > time.time_ns():
+                    # The last candle is still open, fetch it again once it has closed
+                    covered_end = min(gap_end, int(candles.start[len(candles) - 1]) - 1)
+                    candles = candles[: len(candles) - 1]
+                with self._lock:
+                    self._store(symbol_id, granularity, index, candles, gap_start)
+                    if covered_end > gap_start:
+                        index["coverage"] = _add_range(index["coverage"], gap_start, covered_end)
+                    self._save_index(symbol_id, granularity, index)
+            return int(index["rows"]) - rows
+
+    def _store(
+        self, symbol_id: int, granularity: Granularity, index: dict[str, Any], candles: CandleSeries, gap_start: int
+    ) -> None:
+        """Writes the candles fetched from gap_start on and updates index (without saving it)."""
+        stored = self._map_columns(symbol_id, granularity, index)
+        if len(stored) and len(candles):
+            # Candles up to the start of the fetched range were covered by an earlier sync, keep the stored ones
+            first_new = 0
+            while (
+                first_new < len(candles)
+                and candles.start[first_new] <= gap_start
+                and _contains(stored.start, candles.start[first_new])
+            ):
+                first_new += 1
+            candles = candles[first_new:]
+        if len(candles) == 0:
+            return
+        if len(stored) == 0 or candles.start[0] > stored.start[len(stored) - 1]:
+            self._append(symbol_id, granularity, index, candles)
+        else:
+            self._rewrite(symbol_id, granularity, index, stored, candles)
+
+    def _append(self, symbol_id: int, granularity: Granularity, index: dict[str, Any], candles: CandleSeries) -> None:
+        os.makedirs(os.path.dirname(self._index_filename(symbol_id, granularity)), exist_ok=True)
+        for column in CandleSeries.COLUMNS:
+            filename = self._column_filename(symbol_id, granularity, index["generation"], column)
+            fd = os.open(filename, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                # Drops bytes past the last valid row left by an interrupted sync, never rows readers may have mapped
+                os.ftruncate(fd, index["rows"] * ITEM_SIZE)
+                os.lseek(fd, 0, os.SEEK_END)
+                os.write(fd, memoryview(getattr(candles, column)).cast("B"))
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        index["rows"] += len(candles)
+
+    def _rewrite(
+        self,
+        symbol_id: int,
+        granularity: Granularity,
+        index: dict[str, Any],
+        stored: CandleSeries,
+        candles: CandleSeries,
+    ) -> None:
+        rows = {row[0]: row for row in zip(*stored.to_lists().values())}
+        rows.update({row[0]: row for row in zip(*candles.to_lists().values())})
+        merged = [rows[start] for start in sorted(rows)]
+        generation = index["generation"] + 1
+        for position, (column, typecode) in enumerate(zip(CandleSeries.COLUMNS, CandleSeries.TYPECODES)):
+            values = make_column((row[position] for row in merged), typecode, use_numpy=False)
+            filename = self._column_filename(symbol_id, granularity, generation, column)
+            with open(filename, "wb") as outfile:
+                outfile.write(values.cast("B"))
+                outfile.flush()
+                os.fsync(outfile.fileno())
+        old_generation = index["generation"]
+        index["generation"] = generation
+        index["rows"] = len(merged)
+        # The old files are removed once the index points to the new ones
+        self._save_index(symbol_id, granularity, index)
+        for column in CandleSeries.COLUMNS:
+            try:
+                os.unlink(self._column_filename(symbol_id, granularity, old_generation, column))
+            except OSError:  # pragma: no cover
+                logger.warning("Could not remove old candle column '%s'", column, exc_info=True)
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from array import array
+from typing import Any, Iterable
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
+
+INT64 = "q"
+INT32 = "i"
+FLOAT64 = "d"
+
+_NUMPY_DTYPES = {INT64: "int64", INT32: "int32", FLOAT64: "float64"}
+
+
+def has_numpy() -> bool:
+    return np is not None
+
+
+def make_column(values: Iterable[Any], typecode: str, *, use_numpy: bool = True) -> Any:
+    """Creates a column of the given array typecode (INT64, INT32 or FLOAT64) holding values.
+
+    Columns are numpy arrays when NumPy is installed and use_numpy is set, memoryviews over an array.array otherwise.
+    Both support len(), indexing and slicing without copying.
+    """
+    if use_numpy and np is not None:
+        return np.fromiter(values, dtype=_NUMPY_DTYPES[typecode])
+    return memoryview(array(typecode, values))
+
+
+def column_from_buffer(buffer: Any, typecode: str, *, use_numpy: bool = True) -> Any:
+    """Creates a column sharing the memory of buffer (bytes, mmap, ...) without copying."""
+    if use_numpy and np is not None:
+        return np.frombuffer(buffer, dtype=_NUMPY_DTYPES[typecode])
+    return memoryview(buffer).cast("B").cast(typecode)  # type: ignore
+
+
+def column_to_list(column: Any) -> list[Any]:
+    result: list[Any] = column.tolist()
+    return result
+
+
+def is_numpy_column(column: Any) -> bool:
+    return np is not None and isinstance(column, np.ndarray)
+
+
+class ColumnTable:
+    """Table of equally long columns, named by COLUMNS and readable as attributes."""
+
+    COLUMNS: tuple[str, ...] = ()
+
+    def __init__(self, columns: dict[str, Any]):
+        """Constructor
+
+        Args:
+            columns: Column arrays by name, one for each name of COLUMNS.
+        """
+        self._columns = {name: columns[name] for name in self.COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self._columns[self.COLUMNS[0]])
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self.__dict__["_columns"][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def columns(self) -> dict[str, Any]:
+        """Returns the columns by name."""
+        return dict(self._columns)
+
+    def is_numpy(self) -> bool:
+        return is_numpy_column(self._columns[self.COLUMNS[0]])
+
+    def to_lists(self) -> dict[str, list[Any]]:
+        return {name: column_to_list(column) for name, column in self._columns.items()}
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+JsonDecoder = Callable[[bytes], Any]
+
+
+def stdlib_decoder(data: bytes) -> Any:
+    """Decodes JSON with the standard library. Bytes are decoded directly, the encoding is detected from the data."""
+    return json.loads(data)
+
+
+def orjson_decoder(data: bytes) -> Any:
+    """Decodes JSON with orjson, several times faster than the standard library on large responses."""
+    if orjson is None:
+        raise ImportError("orjson is not installed, install it with 'pip install orjson'")
+    return orjson.loads(data)
+
+
+DECODERS: dict[str, JsonDecoder] = {"json": stdlib_decoder, "orjson": orjson_decoder}
+
+
+def available_decoders() -> list[str]:
+    """Returns the names of the decoders whose backend is installed."""
+    return [name for name in DECODERS if name != "orjson" or orjson is not None]
+
+
+def get_decoder(decoder: Union[str, JsonDecoder, None] = None) -> JsonDecoder:
+    """Returns the JSON decoder to use for API responses.
+
+    Args:
+        decoder: A function decoding bytes, the name of a decoder in DECODERS, or None for the fastest installed one.
+
+    Raises:
+        ValueError: If the name is unknown.
+        ImportError: If the backend of the named decoder is not installed.
+    """
+    if callable(decoder):
+        return decoder
+    if decoder is None:
+        return orjson_decoder if orjson is not None else stdlib_decoder
+    if decoder not in DECODERS:
+        raise ValueError(f"Unknown JSON decoder '{decoder}', expected one of {', '.join(DECODERS)}")
+    if decoder == "orjson" and orjson is None:
+        raise ImportError("orjson is not installed, install it with 'pip install orjson'")
+    return DECODERS[decoder]
+
+
+def decode_object(decoder: JsonDecoder, data: bytes) -> dict[str, Any]:
+    """Decodes a response that must be a JSON object."""
+    result = decoder(data)
+    if not isinstance(result, dict):
+        raise RuntimeError("Invalid respose received")
+    return result
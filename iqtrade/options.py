@@ -0,0 +1,394 @@
+from __future__ import annotations
+
+import bisect
+import math
+import time
+from datetime import datetime as dt
+from datetime import timedelta, timezone
+from typing import Any, Iterable, Optional
+
+from .api import ChainPerExpiryDate, OptionIdFilter, OptionType
+from .candles import datetime_to_epoch_ns, epoch_ns_to_datetime
+from .columns import FLOAT64, INT32, INT64, ColumnTable, column_to_list, make_column
+
+# Expiry dates are midnight of the expiry day, options expire at the close
+EXPIRY_TIME = timedelta(hours=16)
+
+
+class OptionStrike:
+    __slots__ = ("expiry_date", "option_root", "strike_price", "call_symbol_id", "put_symbol_id", "multiplier")
+
+    def __init__(
+        self,
+        expiry_date: dt,
+        option_root: str,
+        strike_price: float,
+        call_symbol_id: int,
+        put_symbol_id: int,
+        multiplier: float,
+    ):
+        self.expiry_date = expiry_date
+        self.option_root = option_root
+        self.strike_price = strike_price
+        self.call_symbol_id = call_symbol_id
+        self.put_symbol_id = put_symbol_id
+        self.multiplier = multiplier
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.option_root} {self.expiry_date.strftime('%d %b %Y')} {self.strike_price:.2f}"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
+
+
+class _StrikeTable:
+    """Strikes of one expiry and option root, sorted, with the call and put symbol ids at the same positions."""
+
+    __slots__ = ("strikes", "call_ids", "put_ids", "multiplier")
+
+    def __init__(self, strikes: Any, call_ids: Any, put_ids: Any, multiplier: float):
+        self.strikes = strikes
+        self.call_ids = call_ids
+        self.put_ids = put_ids
+        self.multiplier = multiplier
+
+    def range(self, low: Optional[float], high: Optional[float]) -> tuple[int, int]:
+        """Returns the positions [first, last) of the strikes in [low, high]."""
+        first = 0 if low is None else bisect.bisect_left(self.strikes, low)
+        last = len(self.strikes) if high is None else bisect.bisect_right(self.strikes, high)
+        return first, max(first, last)
+
+
+class OptionChainIndex:
+    """Option chain as returned by get_option_chain(), indexed for strike and expiry queries.
+
+    Every expiry and option root has its strikes in a sorted array, with the call and put symbol ids in arrays at the
+    same positions, so strike ranges and nearest strikes are found by bisection rather than by scanning the chain.
+    Arrays are NumPy arrays when NumPy is installed and use_numpy is set, memoryviews over array.array otherwise.
+
+    Queries take an optional option root. Without it they cover all roots of an expiry, e.g. the standard and the
+    adjusted (non-standard deliverable) options.
+    """
+
+    def __init__(self, chain: dict[dt, ChainPerExpiryDate], *, use_numpy: bool = True):
+        """Constructor
+
+        Args:
+            chain: Option chain as returned by get_option_chain().
+            use_numpy: Use NumPy arrays when NumPy is installed.
+        """
+        self.expiries: list[dt] = sorted(chain)
+        self._closes = [expiry + EXPIRY_TIME for expiry in self.expiries]
+        self._tables: dict[dt, dict[str, _StrikeTable]] = {}
+        for expiry in self.expiries:
+            tables = self._tables[expiry] = {}
+            for root, chain_per_root in chain[expiry].chain_per_root.items():
+                strikes = sorted(chain_per_root.chain_per_strike_price.values(), key=lambda x: x.strike_price)
+                tables[root] = _StrikeTable(
+                    make_column([x.strike_price for x in strikes], FLOAT64, use_numpy=use_numpy),
+                    make_column([x.call_symbol_id for x in strikes], INT64, use_numpy=use_numpy),
+                    make_column([x.put_symbol_id for x in strikes], INT64, use_numpy=use_numpy),
+                    chain_per_root.multiplier,
+                )
+
+    def __len__(self) -> int:
+        """Returns the number of strikes of all expiries and roots."""
+        return sum(len(table.strikes) for tables in self._tables.values() for table in tables.values())
+
+    def _selected_tables(
+        self, expiries: Optional[Iterable[dt]], root: Optional[str]
+    ) -> list[tuple[dt, str, _StrikeTable]]:
+        selected = []
+        for expiry in self.expiries if expiries is None else expiries:
+            for table_root, table in self._tables.get(expiry, {}).items():
+                if root is None or table_root == root:
+                    selected.append((expiry, table_root, table))
+        return selected
+
+    def roots(self, expiry: dt) -> list[str]:
+        """Returns the option roots of an expiry."""
+        return list(self._tables.get(expiry, {}))
+
+    def strikes(self, expiry: dt, root: str) -> Any:
+        """Returns the sorted strike prices of an expiry and option root as an array.
+
+        Raises:
+            KeyError: If the chain has no such expiry or root.
+        """
+        return self._tables[expiry][root].strikes
+
+    def nearest_expiry(self, when: dt) -> dt:
+        """Returns the expiry closest to when, the earlier one on ties.
+
+        Raises:
+            ValueError: If the chain is empty.
+        """
+        if not self.expiries:
+            raise ValueError("The option chain is empty")
+        position = bisect.bisect_left(self.expiries, when)
+        first, last = max(0, position - 1), position + 1
+        candidates = self.expiries[first:last]
+        return min(candidates, key=lambda expiry: abs(expiry - when))
+
+    def next_expiries(self, count: int, after: Optional[dt] = None) -> list[dt]:
+        """Returns the first count expiries still trading at a time, by default now.
+
+        Options trade until the close of their expiry date, so an expiry is included for the whole expiry day.
+        """
+        after = dt.fromtimestamp(time.time(), timezone.utc) if after is None else after
+        first = bisect.bisect_right(self._closes, after)
+        last = first + count
+        return self.expiries[first:last]
+
+    def strikes_between(
+        self,
+        low: Optional[float],
+        high: Optional[float],
+        *,
+        expiries: Optional[Iterable[dt]] = None,
+        root: Optional[str] = None,
+    ) -> list[OptionStrike]:
+        """Returns the strikes in [low, high], sorted by expiry, root and strike price.
+
+        Args:
+            low: Lowest strike price, None for no lower bound.
+            high: Highest strike price, None for no upper bound.
+            expiries: Expiries to search, all of them if None.
+            root: Option root to search, all of them if None.
+        """
+        result = []
+        for expiry, table_root, table in self._selected_tables(expiries, root):
+            first, last = table.range(low, high)
+            for position in range(first, last):
+                result.append(self._strike(expiry, table_root, table, position))
+        return result
+
+    def nearest_strike(self, expiry: dt, price: float, root: Optional[str] = None) -> OptionStrike:
+        """Returns the strike of an expiry closest to price, the lower one on ties.
+
+        Raises:
+            KeyError: If the chain has no strikes for the expiry and root.
+        """
+        best: Optional[tuple[float, float, OptionStrike]] = None
+        for _, table_root, table in self._selected_tables([expiry], root):
+            position = bisect.bisect_left(table.strikes, price)
+            for candidate in (position - 1, position):
+                if 0 <= candidate < len(table.strikes):
+                    strike = self._strike(expiry, table_root, table, candidate)
+                    key = (abs(strike.strike_price - price), strike.strike_price, strike)
+                    if best is None or key[:2] < best[:2]:
+                        best = key
+        if best is None:
+            raise KeyError(f"No strikes for {expiry.isoformat()}" + ("" if root is None else f" and root {root}"))
+        return best[2]
+
+    def at_the_money(self, expiry: dt, spot: float, root: Optional[str] = None) -> OptionStrike:
+        """Returns the at-the-money strike of an expiry, i.e. the one nearest to the spot price of the underlying."""
+        return self.nearest_strike(expiry, spot, root)
+
+    def call_ids(
+        self,
+        low: Optional[float] = None,
+        high: Optional[float] = None,
+        *,
+        expiries: Optional[Iterable[dt]] = None,
+        root: Optional[str] = None,
+    ) -> list[int]:
+        """Returns the call symbol ids of the strikes in [low, high], ready to pass to get_option_quotes()."""
+        return self._ids("call_ids", low, high, expiries, root)
+
+    def put_ids(
+        self,
+        low: Optional[float] = None,
+        high: Optional[float] = None,
+        *,
+        expiries: Optional[Iterable[dt]] = None,
+        root: Optional[str] = None,
+    ) -> list[int]:
+        """Returns the put symbol ids of the strikes in [low, high], ready to pass to get_option_quotes()."""
+        return self._ids("put_ids", low, high, expiries, root)
+
+    def _ids(
+        self,
+        column: str,
+        low: Optional[float],
+        high: Optional[float],
+        expiries: Optional[Iterable[dt]],
+        root: Optional[str],
+    ) -> list[int]:
+        ids: list[int] = []
+        for _, _, table in self._selected_tables(expiries, root):
+            first, last = table.range(low, high)
+            ids.extend(column_to_list(getattr(table, column)[first:last]))
+        return ids
+
+    def quote_filters(
+        self,
+        underlying_id: int,
+        low: Optional[float] = None,
+        high: Optional[float] = None,
+        *,
+        expiries: Optional[Iterable[dt]] = None,
+    ) -> list[OptionIdFilter]:
+        """Returns the fewest option id filters selecting the calls and puts of the strikes in [low, high].
+
+        Each expiry with strikes in range gets one call and one put filter, bounded by the lowest and highest strikes
+        actually listed in range for all its roots. Expiries without strikes in range get none.
+
+        Args:
+            underlying_id: Symbol id of the underlying of the chain.
+            low: Lowest strike price, None for no lower bound.
+            high: Highest strike price, None for no upper bound.
+            expiries: Expiries to select, all of them if None.
+        """
+        filters = []
+        for expiry in self.expiries if expiries is None else expiries:
+            listed: list[float] = []
+            for _, _, table in self._selected_tables([expiry], None):
+                first, last = table.range(low, high)
+                if first < last:
+                    listed.extend((float(table.strikes[first]), float(table.strikes[last - 1])))
+            if listed:
+                for option_type in (OptionType.Call, OptionType.Put):
+                    filters.append(OptionIdFilter(option_type, underlying_id, expiry, min(listed), max(listed)))
+        return filters
+
+    def contracts(
+        self,
+        low: Optional[float] = None,
+        high: Optional[float] = None,
+        *,
+        expiries: Optional[Iterable[dt]] = None,
+    ) -> dict[int, tuple[dt, float, OptionType]]:
+        """Returns the expiry, strike price and option type of the calls and puts of the strikes in [low, high], keyed
+        by option symbol id."""
+        contracts = {}
+        for strike in self.strikes_between(low, high, expiries=expiries):
+            contracts[strike.call_symbol_id] = (strike.expiry_date, strike.strike_price, OptionType.Call)
+            contracts[strike.put_symbol_id] = (strike.expiry_date, strike.strike_price, OptionType.Put)
+        return contracts
+
+    @staticmethod
+    def _strike(expiry: dt, root: str, table: _StrikeTable, position: int) -> OptionStrike:
+        return OptionStrike(
+            expiry,
+            root,
+            float(table.strikes[position]),
+            int(table.call_ids[position]),
+            int(table.put_ids[position]),
+            table.multiplier,
+        )
+
+
+def _float_or_nan(value: Optional[float]) -> float:
+    return math.nan if value is None else value
+
+
+def _int_or_zero(value: Optional[int]) -> int:
+    return 0 if value is None else value
+
+
+class OptionQuoteTable(ColumnTable):
+    """Option quotes stored column by column in contiguous typed arrays, one row per option.
+
+    Rows are sorted by expiry, strike price and option type (calls first). Expiries are nanoseconds since the epoch
+    (int64), option types OptionType values (int32), sizes, volumes and open interest int64, prices, implied volatility
+    and Greeks float64 (NaN when missing). Columns are NumPy arrays when NumPy is installed, memoryviews over
+    array.array otherwise.
+    """
+
+    COLUMNS = (
+        "symbol_id",
+        "expiry",
+        "strike",
+        "option_type",
+        "bid",
+        "bid_size",
+        "ask",
+        "ask_size",
+        "last",
+        "volume",
+        "open_interest",
+        "volatility",
+        "delta",
+        "gamma",
+        "theta",
+        "vega",
+        "rho",
+    )
+    TYPECODES = (
+        INT64,
+        INT64,
+        FLOAT64,
+        INT32,
+        FLOAT64,
+        INT64,
+        FLOAT64,
+        INT64,
+        FLOAT64,
+        INT64,
+        INT64,
+        FLOAT64,
+        FLOAT64,
+        FLOAT64,
+        FLOAT64,
+        FLOAT64,
+        FLOAT64,
+    )
+    _FIELDS = (
+        ("bidPrice", _float_or_nan),
+        ("bidSize", _int_or_zero),
+        ("askPrice", _float_or_nan),
+        ("askSize", _int_or_zero),
+        ("lastTradePrice", _float_or_nan),
+        ("volume", _int_or_zero),
+        ("openInterest", _int_or_zero),
+        ("volatility", _float_or_nan),
+        ("delta", _float_or_nan),
+        ("gamma", _float_or_nan),
+        ("theta", _float_or_nan),
+        ("vega", _float_or_nan),
+        ("rho", _float_or_nan),
+    )
+
+    @classmethod
+    def from_raw(
+        cls,
+        quotes: Iterable[dict[str, Any]],
+        contracts: dict[int, tuple[dt, float, OptionType]],
+        *,
+        use_numpy: bool = True,
+    ) -> OptionQuoteTable:
+        """Builds a table from option quotes as returned by the API.
+
+        Args:
+            quotes: Option quote payloads, quotes of options missing from contracts are skipped.
+            contracts: Expiry, strike price and option type by option symbol id, see OptionChainIndex.contracts().
+            use_numpy: Use NumPy arrays when NumPy is installed.
+        """
+        rows = []
+        for quote in quotes:
+            contract = contracts.get(quote["symbolId"])
+            if contract is None:
+                continue
+            expiry, strike, option_type = contract
+            row: list[Any] = [quote["symbolId"], datetime_to_epoch_ns(expiry), strike, option_type.value]
+            row.extend(convert(quote.get(field)) for field, convert in cls._FIELDS)
+            rows.append(row)
+        rows.sort(key=lambda row: (row[1], row[2], row[3]))
+        return cls(
+            {
+                name: make_column((row[position] for row in rows), typecode, use_numpy=use_numpy)
+                for position, (name, typecode) in enumerate(zip(cls.COLUMNS, cls.TYPECODES))
+            }
+        )
+
+    def __str__(self) -> str:  # pragma: no cover
+        if len(self) == 0:
+            return "OptionQuoteTable(empty)"
+        first = epoch_ns_to_datetime(int(self._columns["expiry"][0])).strftime("%d %b %Y")
+        last = epoch_ns_to_datetime(int(self._columns["expiry"][len(self) - 1])).strftime("%d %b %Y")
+        return f"OptionQuoteTable({len(self)} options {first} - {last})"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
@@ -0,0 +1,574 @@
+"""Black-Scholes-Merton prices, Greeks and implied volatilities of whole arrays of options at once.
+
+Functions take scalars or equally long sequences or NumPy arrays and return FLOAT64 columns. With NumPy every formula
+runs once over whole arrays, without it element by element. Invalid inputs (prices, times or volatilities that are not
+positive, OptionType.Invalid) give NaN.
+
+Units follow Level1OptionData: volatility in percent, theta per calendar day, vega and rho per percentage point. Times
+are in years and the interest rate and dividend yield are continuously compounded annual fractions (0.05 for 5%).
+
+Options flagged american are priced with the quadratic approximation of Barone-Adesi and Whaley (1987), which adds
+the early exercise premium to the European price, and their Greeks are finite differences of that price. It is exact
+for calls on underlyings without dividends and within a few cents of a binomial tree for listed maturities.
+"""
+from __future__ import annotations
+
+import math
+from datetime import datetime as dt
+from datetime import timezone
+from typing import Any, Callable, Iterable, Mapping, Optional, Sequence, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
+
+from .api import Level1OptionData, Level1Quote, OptionExerciseType, OptionType, TickerDetails
+from .columns import FLOAT64, INT64, ColumnTable, make_column
+from .options import EXPIRY_TIME
+
+SECONDS_PER_YEAR = 365 * 86400.0
+MIN_VOLATILITY = 1e-4
+MAX_VOLATILITY = 10.0
+CRITICAL_PRICE_ITERATIONS = 50
+
+GREEKS = ("delta", "gamma", "theta", "vega", "rho")
+
+# Hart's double precision approximation of the normal distribution (West, Better approximations to cumulative normal
+# functions, 2005), with coefficients from the highest power down
+_HART_NUMERATOR = (
+    3.52624965998911e-02,
+    0.700383064443688,
+    6.37396220353165,
+    33.912866078383,
+    112.079291497871,
+    221.213596169931,
+    220.206867912376,
+)
+_HART_DENOMINATOR = (
+    8.83883476483184e-02,
+    1.75566716318264,
+    16.064177579207,
+    86.7807322029461,
+    296.564248779674,
+    637.333633378831,
+    793.826512519948,
+    440.413735824752,
+)
+
+ArrayLike = Union[float, Sequence[float], Any]
+
+
+class _ScalarMath:
+    log = staticmethod(math.log)
+    sqrt = staticmethod(math.sqrt)
+    exp = staticmethod(math.exp)
+
+    @staticmethod
+    def norm_cdf(x: float) -> float:
+        return 0.5 * math.erfc(-x / math.sqrt(2))
+
+    @staticmethod
+    def where(condition: bool, x: float, y: float) -> float:
+        return x if condition else y
+
+    @staticmethod
+    def all(condition: bool) -> bool:
+        return condition
+
+    @staticmethod
+    def any(condition: bool) -> bool:
+        return bool(condition)
+
+
+class _ArrayMath:
+    log = staticmethod(lambda x: np.log(x))
+    sqrt = staticmethod(lambda x: np.sqrt(x))
+    exp = staticmethod(lambda x: np.exp(x))
+    where = staticmethod(lambda condition, x, y: np.where(condition, x, y))
+
+    @staticmethod
+    def norm_cdf(x: Any) -> Any:
+        z = np.abs(x)
+        numerator = denominator = 0.0
+        for coefficient in _HART_NUMERATOR:
+            numerator = numerator * z + coefficient
+        for coefficient in _HART_DENOMINATOR:
+            denominator = denominator * z + coefficient
+        # Continued fraction in the tail
+        fraction = z + 0.65
+        for term in (4, 3, 2, 1):
+            fraction = z + term / fraction
+        density = np.exp(-0.5 * z * z)
+        tail = np.where(z < 7.07106781186547, density * numerator / denominator, density / fraction / 2.506628274631)
+        tail = np.where(z > 37, 0.0, tail)
+        return np.where(x > 0, 1 - tail, tail)
+
+    @staticmethod
+    def all(condition: Any) -> bool:
+        return bool(np.all(condition))
+
+    @staticmethod
+    def any(condition: Any) -> bool:
+        return bool(np.any(condition))
+
+
+def _norm_pdf(m: Any, x: Any) -> Any:
+    return m.exp(-0.5 * x * x) / math.sqrt(2 * math.pi)
+
+
+def _d1_d2(m: Any, spot: Any, strike: Any, time: Any, sigma: Any, rate: Any, dividend_yield: Any) -> tuple[Any, Any]:
+    sigma_root_time = sigma * m.sqrt(time)
+    d1 = (m.log(spot / strike) + (rate - dividend_yield + 0.5 * sigma * sigma) * time) / sigma_root_time
+    return d1, d1 - sigma_root_time
+
+
+def _price(
+    m: Any, phi: Any, spot: Any, strike: Any, time: Any, sigma: Any, rate: Any, dividend_yield: Any
+) -> tuple[Any, Any]:
+    """Returns the price and the vega per unit of volatility, phi is 1 for calls and -1 for puts."""
+    d1, d2 = _d1_d2(m, spot, strike, time, sigma, rate, dividend_yield)
+    forward_spot = spot * m.exp(-dividend_yield * time)
+    price = phi * (forward_spot * m.norm_cdf(phi * d1) - strike * m.exp(-rate * time) * m.norm_cdf(phi * d2))
+    return price, forward_spot * _norm_pdf(m, d1) * m.sqrt(time)
+
+
+def _critical_price(
+    m: Any, phi: Any, strike: Any, time: Any, sigma: Any, rate: Any, dividend_yield: Any, exponent: Any, early: Any
+) -> Any:
+    """Returns the underlying price beyond which early exercise is optimal, by Newton-Raphson from the seed of
+    Barone-Adesi and Whaley."""
+    root_time = m.sqrt(time)
+    limit = strike / (1 - 1 / exponent)
+    h = -(phi * (rate - dividend_yield) * time + 2 * sigma * root_time) * strike / (phi * (limit - strike))
+    # Only a first guess, kept from overflowing for volatilities far below the cost of carry
+    critical = strike + (limit - strike) * (1 - m.exp(m.where(h < 50, h, 50.0)))
+    dividend_discount = m.exp(-dividend_yield * time)
+    for _ in range(CRITICAL_PRICE_ITERATIONS):
+        d1, _ = _d1_d2(m, critical, strike, time, sigma, rate, dividend_yield)
+        european = _price(m, phi, critical, strike, time, sigma, rate, dividend_yield)[0]
+        not_exercised = 1 - dividend_discount * m.norm_cdf(phi * d1)
+        error = phi * (critical - strike) - european - phi * not_exercised * critical / exponent
+        slope = phi * not_exercised * (1 - 1 / exponent) + dividend_discount * _norm_pdf(m, d1) / (
+            sigma * root_time * exponent
+        )
+        # A flat slope only happens for tiny volatilities, whose critical price tends to the strike
+        step = m.where(slope != 0, critical - error / m.where(slope != 0, slope, 1.0), (critical + strike) / 2)
+        # Calls are exercised above the strike and puts below it, halve the distance to the bound instead of leaving
+        # the bracket
+        step = m.where(phi * (step - strike) > 0, m.where(step > 0, step, critical / 2), (critical + strike) / 2)
+        # Options never exercised early have no critical price, NaN inputs none either
+        converged = (abs(error) < 1e-10 * strike) | (abs(step - critical) < 1e-10 * strike)
+        if m.all(m.where(early, converged, True) | (error != error)):
+            break
+        critical = step
+    return critical
+
+
+def _american_price(
+    m: Any, phi: Any, spot: Any, strike: Any, time: Any, sigma: Any, rate: Any, dividend_yield: Any
+) -> Any:
+    """Returns the Barone-Adesi-Whaley price, phi is 1 for calls and -1 for puts."""
+    european = _price(m, phi, spot, strike, time, sigma, rate, dividend_yield)[0]
+    # Calls are only exercised early for the dividends, puts for the interest on the strike
+    early = m.where(phi > 0, dividend_yield > 0, rate > 0)
+    if not m.any(early):
+        return european
+    variance = sigma * sigma
+    discount = 1 - m.exp(-rate * time)
+    # 2r / (variance (1 - exp(-rT))), which tends to 2 / (variance T) without interest
+    scale = m.where(discount != 0, 2 * rate / (variance * m.where(discount != 0, discount, 1.0)), 2 / (variance * time))
+    carry = 2 * (rate - dividend_yield) / variance
+    exponent = (1 - carry + phi * m.sqrt((carry - 1) * (carry - 1) + 4 * scale)) / 2
+    critical = _critical_price(m, phi, strike, time, sigma, rate, dividend_yield, exponent, early)
+    d1, _ = _d1_d2(m, critical, strike, time, sigma, rate, dividend_yield)
+    weight = phi * critical / exponent * (1 - m.exp(-dividend_yield * time) * m.norm_cdf(phi * d1))
+    exercised = phi * (spot - critical) >= 0
+    premium = european + weight * m.where(exercised, 1.0, spot / critical) ** exponent
+    american = m.where(exercised, phi * (spot - strike), premium)
+    return m.where(early, american, european)
+
+
+def _american_greeks(
+    m: Any, phi: Any, spot: Any, strike: Any, time: Any, sigma: Any, rate: Any, dividend_yield: Any
+) -> tuple[Any, ...]:
+    """Returns the Greeks of the Barone-Adesi-Whaley price by finite differences, in the units of _greeks()."""
+
+    def price(spot: Any = spot, time: Any = time, sigma: Any = sigma, rate: Any = rate) -> Any:
+        return _american_price(m, phi, spot, strike, time, sigma, rate, dividend_yield)
+
+    base = price()
+    bump = spot * 1e-3
+    up, down = price(spot=spot + bump), price(spot=spot - bump)
+    step = m.where(time > 2 / 365, 1 / 365, time / 2)
+    theta = (price(time=time - step) - base) / step
+    vega = (price(sigma=sigma * 1.0001) - price(sigma=sigma * 0.9999)) / (sigma * 0.0002)
+    rho = (price(rate=rate + 1e-4) - base) / 1e-4
+    return (up - down) / (2 * bump), (up - 2 * base + down) / (bump * bump), theta / 365, vega / 100, rho / 100
+
+
+def _greeks(
+    m: Any,
+    phi: Any,
+    spot: Any,
+    strike: Any,
+    time: Any,
+    volatility: Any,
+    rate: Any,
+    dividend_yield: Any,
+    american: Any,
+) -> tuple[Any, ...]:
+    sigma = volatility / 100
+    d1, d2 = _d1_d2(m, spot, strike, time, sigma, rate, dividend_yield)
+    forward_spot = spot * m.exp(-dividend_yield * time)
+    discounted_strike = strike * m.exp(-rate * time)
+    density = _norm_pdf(m, d1)
+    root_time = m.sqrt(time)
+    delta = phi * m.exp(-dividend_yield * time) * m.norm_cdf(phi * d1)
+    gamma = m.exp(-dividend_yield * time) * density / (spot * sigma * root_time)
+    theta = (
+        -forward_spot * density * sigma / (2 * root_time)
+        - phi * rate * discounted_strike * m.norm_cdf(phi * d2)
+        + phi * dividend_yield * forward_spot * m.norm_cdf(phi * d1)
+    )
+    vega = forward_spot * density * root_time
+    rho = phi * discounted_strike * time * m.norm_cdf(phi * d2)
+    greeks = (delta, gamma, theta / 365, vega / 100, rho / 100)
+    if not m.any(american):
+        return greeks
+    american_greeks = _american_greeks(m, phi, spot, strike, time, sigma, rate, dividend_yield)
+    return tuple(m.where(american, value, greek) for value, greek in zip(american_greeks, greeks))
+
+
+def _price_only(
+    m: Any,
+    phi: Any,
+    spot: Any,
+    strike: Any,
+    time: Any,
+    volatility: Any,
+    rate: Any,
+    dividend_yield: Any,
+    american: Any,
+) -> tuple[Any]:
+    european = _price(m, phi, spot, strike, time, volatility / 100, rate, dividend_yield)[0]
+    if not m.any(american):
+        return (european,)
+    return (
+        m.where(
+            american, _american_price(m, phi, spot, strike, time, volatility / 100, rate, dividend_yield), european
+        ),
+    )
+
+
+def _implied_volatility(
+    m: Any,
+    phi: Any,
+    price: Any,
+    spot: Any,
+    strike: Any,
+    time: Any,
+    rate: Any,
+    dividend_yield: Any,
+    american: Any,
+    tolerance: float,
+    max_iterations: int,
+) -> tuple[Any]:
+    """Newton-Raphson on the volatility, falling back to bisection whenever a step leaves the bracket."""
+    any_american = m.any(american)
+
+    def model(sigma: Any) -> tuple[Any, Any]:
+        european, vega = _price(m, phi, spot, strike, time, sigma, rate, dividend_yield)
+        if not any_american:
+            return european, vega
+        # The European vega is close enough to steer the search, which the bracket keeps converging
+        return (
+            m.where(american, _american_price(m, phi, spot, strike, time, sigma, rate, dividend_yield), european),
+            vega,
+        )
+
+    forward_spot = spot * m.exp(-dividend_yield * time)
+    discounted_strike = strike * m.exp(-rate * time)
+    intrinsic = phi * (forward_spot - discounted_strike)
+    # American options are worth at least their exercise value, which any volatility low enough to exercise them
+    # matches, and at most the underlying or the strike
+    exercise = m.where(american, phi * (spot - strike) + tolerance, intrinsic)
+    intrinsic = m.where(exercise > intrinsic, exercise, intrinsic)
+    upper = m.where(phi > 0, m.where(american, spot, forward_spot), m.where(american, strike, discounted_strike))
+    # Prices outside the no-arbitrage bounds match no volatility
+    outside = (price <= intrinsic) | (price >= upper)
+    low = price * 0 + MIN_VOLATILITY
+    high = price * 0 + MAX_VOLATILITY
+    # Brenner-Subrahmanyam approximation for at-the-money options as the first guess
+    guess = m.sqrt(2 * math.pi / time) * price / spot
+    sigma = m.where((guess > low) & (guess < high), guess, price * 0 + 0.5)
+    for _ in range(max_iterations):
+        value, vega = model(sigma)
+        error = value - price
+        converged = abs(error) < tolerance
+        if m.all(converged | outside):
+            break
+        high = m.where(error > 0, sigma, high)
+        low = m.where(error > 0, low, sigma)
+        step = sigma - error / m.where(vega > 0, vega, math.inf)
+        # Converged options keep their volatility, a step onto the bracket would bisect them away from it
+        sigma = m.where(converged, sigma, m.where((step > low) & (step < high), step, 0.5 * (low + high)))
+    error = model(sigma)[0] - price
+    return (m.where(outside | (abs(error) >= tolerance), math.nan, sigma * 100),)
+
+
+def _option_type_values(option_type: Any) -> Any:
+    if isinstance(option_type, OptionType):
+        return option_type.value
+    if np is not None and isinstance(option_type, np.ndarray):
+        return option_type
+    if isinstance(option_type, (int, float)):
+        return option_type
+    return [value.value if isinstance(value, OptionType) else value for value in option_type]
+
+
+def _broadcast(values: ArrayLike, count: int) -> list[Any]:
+    if isinstance(values, (int, float)):
+        return [values] * count
+    values = list(values)
+    if len(values) != count:
+        raise ValueError(f"Expected {count} values, got {len(values)}")
+    return values
+
+
+def _apply(
+    function: Callable[..., tuple[Any, ...]],
+    outputs: int,
+    option_type: Any,
+    positive: list[ArrayLike],
+    rates: list[ArrayLike],
+    *,
+    use_numpy: bool,
+    **options: Any,
+) -> list[Any]:
+    """Applies function(m, phi, *positive, *rates, **options), which returns outputs values, to every option.
+
+    Gives NaN where option_type is not a call or a put or a value of positive is not positive.
+    """
+    option_type = _option_type_values(option_type)
+    if use_numpy and np is not None:
+        types = np.asarray(option_type)
+        arguments = [np.asarray(values, dtype="float64") for values in positive + rates]
+        with np.errstate(all="ignore"):
+            phi = np.where(types == OptionType.Call.value, 1.0, np.where(types == OptionType.Put.value, -1.0, np.nan))
+            valid = ~np.isnan(phi)
+            for values in arguments[: len(positive)]:
+                valid = valid & (values > 0)
+            results = function(_ArrayMath, phi, *arguments, **options)
+            return [np.atleast_1d(np.where(valid, result, np.nan)).astype("float64") for result in results]
+
+    all_values = [option_type] + positive + rates
+    count = max([len(values) for values in all_values if not isinstance(values, (int, float))], default=1)
+    signs = {OptionType.Call.value: 1.0, OptionType.Put.value: -1.0}
+    checked = slice(1, len(positive) + 1)
+    columns: list[list[float]] = [[] for _ in range(outputs)]
+    for row in zip(*[_broadcast(values, count) for values in all_values]):
+        sign = signs.get(row[0])
+        if sign is None or not all(value > 0 for value in row[checked]):
+            result: tuple[float, ...] = (math.nan,) * outputs
+        else:
+            result = function(_ScalarMath, sign, *row[1:], **options)
+        for column, value in zip(columns, result):
+            column.append(value)
+    return [make_column(column, FLOAT64, use_numpy=False) for column in columns]
+
+
+def black_scholes_price(
+    option_type: Any,
+    spot: ArrayLike,
+    strike: ArrayLike,
+    time: ArrayLike,
+    volatility: ArrayLike,
+    rate: ArrayLike = 0.0,
+    dividend_yield: ArrayLike = 0.0,
+    american: ArrayLike = False,
+    *,
+    use_numpy: bool = True,
+) -> Any:
+    """Returns the Black-Scholes-Merton prices of options, with the early exercise premium of American ones.
+
+    Args:
+        option_type: OptionType (or its value) of each option.
+        spot: Price of the underlying.
+        strike: Strike price.
+        time: Time to expiry in years.
+        volatility: Annualized volatility in percent.
+        rate: Risk-free interest rate.
+        dividend_yield: Dividend yield of the underlying.
+        american: Whether the option can be exercised before expiry, see the module documentation.
+        use_numpy: Use NumPy arrays when NumPy is installed.
+    """
+    return _apply(
+        _price_only,
+        1,
+        option_type,
+        [spot, strike, time, volatility],
+        [rate, dividend_yield, american],
+        use_numpy=use_numpy,
+    )[0]
+
+
+def black_scholes_greeks(
+    option_type: Any,
+    spot: ArrayLike,
+    strike: ArrayLike,
+    time: ArrayLike,
+    volatility: ArrayLike,
+    rate: ArrayLike = 0.0,
+    dividend_yield: ArrayLike = 0.0,
+    american: ArrayLike = False,
+    *,
+    use_numpy: bool = True,
+) -> dict[str, Any]:
+    """Returns the Black-Scholes-Merton Greeks of options as columns keyed by the names of GREEKS.
+
+    Args are the ones of black_scholes_price().
+    """
+    columns = _apply(
+        _greeks,
+        len(GREEKS),
+        option_type,
+        [spot, strike, time, volatility],
+        [rate, dividend_yield, american],
+        use_numpy=use_numpy,
+    )
+    return dict(zip(GREEKS, columns))
+
+
+def implied_volatility(
+    option_type: Any,
+    price: ArrayLike,
+    spot: ArrayLike,
+    strike: ArrayLike,
+    time: ArrayLike,
+    rate: ArrayLike = 0.0,
+    dividend_yield: ArrayLike = 0.0,
+    american: ArrayLike = False,
+    *,
+    tolerance: float = 1e-6,
+    max_iterations: int = 100,
+    use_numpy: bool = True,
+) -> Any:
+    """Returns the annualized volatilities in percent at which the model prices of black_scholes_price() match the
+    option prices, NaN where no volatility between MIN_VOLATILITY and MAX_VOLATILITY (as fractions) matches.
+
+    Args:
+        option_type: OptionType (or its value) of each option.
+        price: Price of the option.
+        spot: Price of the underlying.
+        strike: Strike price.
+        time: Time to expiry in years.
+        rate: Risk-free interest rate.
+        dividend_yield: Dividend yield of the underlying.
+        american: Whether the option can be exercised before expiry, see the module documentation.
+        tolerance: Largest accepted difference between the model and option prices.
+        max_iterations: Largest number of Newton-Raphson or bisection steps.
+        use_numpy: Use NumPy arrays when NumPy is installed.
+    """
+    return _apply(
+        _implied_volatility,
+        1,
+        option_type,
+        [price, spot, strike, time],
+        [rate, dividend_yield, american],
+        use_numpy=use_numpy,
+        tolerance=tolerance,
+        max_iterations=max_iterations,
+    )[0]
+
+
+def quote_price(quote: Level1Quote) -> float:
+    """Returns the mid price of a quote, its last trade price without a two-sided market, or NaN without either."""
+    bid, ask, last = quote.bid_price or 0, quote.ask_price or 0, quote.last_trade_price or 0
+    if bid > 0 and ask > 0:
+        return (bid + ask) / 2
+    return last if last > 0 else math.nan
+
+
+class OptionGreeks(ColumnTable):
+    """Implied volatilities and Greeks computed locally for option quotes, one row per quote.
+
+    Columns hold the inputs (option type as OptionType values, strike, time to expiry in years, underlying and option
+    prices) and the results in the units of Level1OptionData. Rows whose inputs are missing or invalid are NaN.
+    """
+
+    COLUMNS = ("symbol_id", "option_type", "strike", "time", "spot", "price", "volatility") + GREEKS
+
+
+def price_option_quotes(
+    quotes: Iterable[Level1OptionData],
+    details: Union[Mapping[int, TickerDetails], Iterable[TickerDetails]],
+    underlying: Union[Level1Quote, float],
+    *,
+    rate: float = 0.0,
+    dividend_yield: float = 0.0,
+    now: Optional[dt] = None,
+    use_numpy: bool = True,
+) -> OptionGreeks:
+    """Computes implied volatilities and Greeks of option quotes from their prices instead of requesting them.
+
+    Option prices are quote mid prices, or last trade prices without a two-sided market. American options are priced
+    with their early exercise premium, see the module documentation, and options of an unknown OptionExerciseType
+    are NaN.
+
+    Args:
+        quotes: Option quotes, e.g. from get_option_quotes().
+        details: TickerDetails of the options (by symbol id or as a list), e.g. from get_tickers(), giving
+            their type, exercise type, strike and expiry.
+        underlying: Quote of the underlying, or its price.
+        rate: Risk-free interest rate.
+        dividend_yield: Dividend yield of the underlying.
+        now: Time from which times to expiry are measured, by default now.
+        use_numpy: Use NumPy arrays when NumPy is installed.
+    """
+    if not isinstance(details, Mapping):
+        details = {detail.symbol_id: detail for detail in details}
+    now = dt.now(timezone.utc) if now is None else now
+    spot = quote_price(underlying) if isinstance(underlying, Level1Quote) else float(underlying)
+    symbol_ids, option_types, strikes, times, prices, american = [], [], [], [], [], []
+    for quote in quotes:
+        detail = details.get(quote.symbol_id)
+        symbol_ids.append(quote.symbol_id)
+        prices.append(quote_price(quote))
+        if (
+            detail is None
+            or detail.option_expiry_date is None
+            or detail.option_exercise_type not in (OptionExerciseType.American, OptionExerciseType.European)
+        ):
+            option_types.append(OptionType.Invalid.value)
+            strikes.append(math.nan)
+            times.append(math.nan)
+            american.append(False)
+            continue
+        option_types.append(detail.option_type.value)
+        american.append(detail.option_exercise_type == OptionExerciseType.American)
+        strikes.append(detail.option_strike_price)
+        times.append((detail.option_expiry_date + EXPIRY_TIME - now).total_seconds() / SECONDS_PER_YEAR)
+
+    option_type = make_column(option_types, INT64, use_numpy=use_numpy)
+    strike = make_column(strikes, FLOAT64, use_numpy=use_numpy)
+    time = make_column(times, FLOAT64, use_numpy=use_numpy)
+    price = make_column(prices, FLOAT64, use_numpy=use_numpy)
+    volatility = implied_volatility(
+        option_type, price, spot, strike, time, rate, dividend_yield, american, use_numpy=use_numpy
+    )
+    greeks = black_scholes_greeks(
+        option_type, spot, strike, time, volatility, rate, dividend_yield, american, use_numpy=use_numpy
+    )
+    return OptionGreeks(
+        {
+            "symbol_id": make_column(symbol_ids, INT64, use_numpy=use_numpy),
+            "option_type": option_type,
+            "strike": strike,
+            "time": time,
+            "spot": make_column([spot] * len(symbol_ids), FLOAT64, use_numpy=use_numpy),
+            "price": price,
+            "volatility": volatility,
+            **greeks,
+        }
+    )
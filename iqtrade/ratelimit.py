@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from datetime import datetime as dt
+from enum import Enum
+from typing import Mapping, Optional
+
+THROTTLED_BACKOFF = 1.0  # seconds to wait after a 429 response that does not say when to retry
+
+
+class RateLimitCategory(Enum):
+    Account = 0
+    MarketData = 1
+
+    @staticmethod
+    def from_request_path(request_path: str) -> RateLimitCategory:
+        """Returns the rate limit category Questrade applies to the given API request path."""
+        if request_path.startswith("markets") or request_path.startswith("symbols"):
+            return RateLimitCategory.MarketData
+        return RateLimitCategory.Account
+
+
+class RateLimitExceeded(RuntimeError):
+    """Raised when a request would have to wait longer than the limiter's max_wait, if one is set, for budget."""
+
+    def __init__(self, category: RateLimitCategory, wait: float):
+        super().__init__(f"{category.name} rate limit exhausted, next request allowed in {wait:.1f}s")
+        self.category = category
+        self.wait = wait
+
+
+class RateLimitStatus:
+    def __init__(self, category: RateLimitCategory, available: float, remaining: int, reset: float):
+        self.category: RateLimitCategory = category
+        self.available: float = available  # requests that can be sent right now without waiting
+        self.remaining: int = remaining  # requests left in the current hourly window
+        self.reset: dt = dt.fromtimestamp(reset)  # when the hourly window resets
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.category.name}: {self.remaining} remaining until {self.reset.isoformat()}"
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return self.__str__()
+
+
+class TokenBucket:
+    """Token bucket for a per-second limit combined with an hourly request budget.
+
+    Tokens are handed out as reservations: reserve() always consumes a token and returns how long the caller has to
+    wait before using it, so concurrent callers queue up behind each other instead of retrying. A token is taken at
+    the time the request is sent, so callers queued behind an exhausted hourly budget are spaced at the per-second rate
+    after the reset instead of all waking up at once.
+    """
+
+    def __init__(self, per_second: int, per_hour: int):
+        self.per_second = per_second
+        self.per_hour = per_hour
+        self._tokens = float(per_second)
+        self._last_refill = time.monotonic()
+        self._remaining = per_hour
+        self._reset = time.time() + 3600
+
+    def _refill(self, until: float) -> None:
+        # _last_refill is in the future while requests are queued: _tokens counts what is left when the last one is sent
+        if until > self._last_refill:
+            self._tokens = min(float(self.per_second), self._tokens + (until - self._last_refill) * self.per_second)
+            self._last_refill = until
+        if time.time() >= self._reset:
+            self._start_window(time.time())
+
+    def _start_window(self, start: float) -> None:
+        self._remaining = self.per_hour
+        self._reset = start + 3600
+
+    def delay(self) -> float:
+        """Returns how long the next request would have to wait, without reserving anything."""
+        now = time.monotonic()
+        self._refill(now)
+        wait = max(0.0, self._last_refill - now)
+        if self._tokens < 1:
+            wait += (1 - self._tokens) / self.per_second
+        if self._remaining <= 0:
+            wait = max(wait, self._reset - time.time())
+        return wait
+
+    def reserve(self) -> float:
+        """Consumes one token and returns the number of seconds to wait before sending the request."""
+        wait = self.delay()
+        if wait > 0:
+            # The token is taken when the request is sent
+            self._refill(time.monotonic() + wait)
+            if time.time() + wait >= self._reset:
+                # The request is sent in the next hourly window
+                self._start_window(self._reset)
+        self._tokens -= 1
+        self._remaining -= 1
+        return wait
+
+    def update(self, remaining: Optional[int], reset: Optional[float]) -> None:
+        """Synchronizes the hourly budget with the values reported by the server."""
+        if reset is not None:
+            self._reset = reset
+        if remaining is not None:
+            self._remaining = remaining
+
+    def exhaust(self) -> None:
+        """Marks the hourly budget as used up until the reset time, e.g. after a 429 response."""
+        self._remaining = 0
+
+    def status(self, category: RateLimitCategory) -> RateLimitStatus:
+        now = time.monotonic()
+        self._refill(now)
+        available = max(0.0, self._tokens) if self._last_refill <= now else 0.0
+        return RateLimitStatus(category, available, max(0, self._remaining), self._reset)
+
+
+class RateLimiter:
+    """Client side rate limiter following Questrade's account and market data budgets.
+
+    Keeps one TokenBucket per RateLimitCategory, updated from the X-RateLimit-Remaining and X-RateLimit-Reset headers
+    of every response. A limiter can be shared between several clients that use the same credentials.
+
+    See Also:
+        https://www.questrade.com/api/documentation/rate-limiting
+    """
+
+    def __init__(
+        self,
+        *,
+        account_per_second: int = 30,
+        account_per_hour: int = 30000,
+        market_data_per_second: int = 20,
+        market_data_per_hour: int = 15000,
+        max_wait: Optional[float] = None,
+    ):
+        """Constructor
+
+        Args:
+            account_per_second: Account calls allowed per second.
+            account_per_hour: Account calls allowed per hour.
+            market_data_per_second: Market data calls allowed per second.
+            market_data_per_hour: Market data calls allowed per hour.
+            max_wait: Longest time in seconds a caller is made to wait. Requests that would have to wait longer raise
+                RateLimitExceeded instead of blocking. By default callers wait as long as the budget requires, up to
+                the end of the hourly window.
+        """
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._buckets: dict[RateLimitCategory, TokenBucket] = {
+            RateLimitCategory.Account: TokenBucket(account_per_second, account_per_hour),
+            RateLimitCategory.MarketData: TokenBucket(market_data_per_second, market_data_per_hour),
+        }
+
+    def reserve(self, request_path: str) -> float:
+        """Reserves budget for a request and returns the number of seconds to wait before sending it.
+
+        Raises:
+            RateLimitExceeded: If max_wait is set and the wait would be longer. No budget is consumed in that case.
+        """
+        category = RateLimitCategory.from_request_path(request_path)
+        with self._lock:
+            bucket = self._buckets[category]
+            wait = bucket.delay()
+            if self.max_wait is not None and wait > self.max_wait:
+                raise RateLimitExceeded(category, wait)
+            return bucket.reserve()
+
+    def acquire(self, request_path: str) -> None:
+        """Blocks until a request to request_path can be sent."""
+        wait = self.reserve(request_path)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, request_path: str) -> None:
+        """Waits, without blocking the event loop, until a request to request_path can be sent."""
+        wait = self.reserve(request_path)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def update(self, request_path: str, status_code: int, headers: Mapping[str, str]) -> None:
+        """Updates the budget of the request's category from a response."""
+        remaining: Optional[int] = None
+        reset: Optional[float] = None
+        if "X-RateLimit-Remaining" in headers:
+            remaining = int(headers["X-RateLimit-Remaining"])
+        if "X-RateLimit-Reset" in headers:
+            reset = float(headers["X-RateLimit-Reset"])
+        category = RateLimitCategory.from_request_path(request_path)
+        with self._lock:
+            bucket = self._buckets[category]
+            if status_code == 429 and reset is None:
+                reset = time.time() + THROTTLED_BACKOFF
+            bucket.update(remaining, reset)
+            if status_code == 429:
+                bucket.exhaust()
+
+    def get_status(self, category: RateLimitCategory) -> RateLimitStatus:
+        """Returns how much budget is left for a category."""
+        with self._lock:
+            return self._buckets[category].status(category)
+
+
+def throttled_delay(headers: Mapping[str, str], attempt: int) -> float:
+    """Returns how long to wait before retrying a request that got a 429 response without a rate limiter.
+
+    Waits until the X-RateLimit-Reset time when the response has one, or backs off exponentially otherwise.
+
+    Args:
+        headers: Headers of the 429 response.
+        attempt: Number of the retry, starting from 0.
+    """
+    if "X-RateLimit-Reset" in headers:
+        return max(0.0, float(headers["X-RateLimit-Reset"]) - time.time())
+    return THROTTLED_BACKOFF * 2.0**attempt
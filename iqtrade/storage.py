@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import stat
+import tempfile
+import threading
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def atomic_write(filename: str, data: bytes) -> None:
+    """Replaces the content of a file so that readers and crashes only ever see the old or the new content.
+
+    The data is written to a temporary file in the same directory, flushed to disk and renamed over the target. A
+    symlink is followed and replaced at its destination, and the permissions of an existing file are kept; new files
+    are only readable by their owner, as config files hold tokens.
+    """
+    filename = os.path.realpath(filename)
+    directory = os.path.dirname(filename)
+    fd, temp_filename = tempfile.mkstemp(dir=directory, prefix=os.path.basename(filename) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as outfile:
+            if os.path.exists(filename):
+                os.chmod(temp_filename, stat.S_IMODE(os.stat(filename).st_mode))
+            outfile.write(data)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.replace(temp_filename, filename)
+    except BaseException:
+        os.unlink(temp_filename)
+        raise
+    if hasattr(os, "O_DIRECTORY"):
+        # Make the rename itself durable
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def atomic_write_json(filename: str, data: Any) -> None:
+    atomic_write(filename, json.dumps(data, indent=4).encode("utf-8"))
+
+
+class ConfigWriter:
+    """Persists a JSON config file atomically, optionally combining writes in a background thread.
+
+    With delay=None every write() replaces the file before returning. With a delay, write() only records the new
+    content and a background thread saves the latest one at most once per delay seconds; pending content is also
+    saved by flush(), close() and at interpreter exit. A write(sync=True) is saved right away even with a delay.
+    """
+
+    def __init__(self, filename: str, *, delay: Optional[float] = None):
+        self.filename = filename
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._pending: Optional[bytes] = None
+        self._timer: Optional[threading.Timer] = None
+        self.writes = 0  # number of times the file was actually written
+        if delay is not None:
+            atexit.register(self.flush)
+
+    def write(self, config: dict[str, Any], *, sync: bool = False) -> None:
+        """Saves config.
+
+        Args:
+            config: Config to save, serialized before returning so the caller may keep modifying it.
+            sync: Save before returning even if the writer has a delay, e.g. for content other processes wait for.
+        """
+        data = json.dumps(config, indent=4).encode("utf-8")
+        with self._lock:
+            self._pending = data
+            if sync or self.delay is None:
+                self._flush_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.delay, self._background_flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        """Saves pending content, if any."""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        self.flush()
+        if self.delay is not None:
+            atexit.unregister(self.flush)
+
+    def _flush_locked(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending is None:
+            return
+        atomic_write(self.filename, self._pending)
+        self._pending = None
+        self.writes += 1
+
+    def _background_flush(self) -> None:
+        with self._lock:
+            self._timer = None
+            try:
+                self._flush_locked()
+            except Exception:
+                # Keep the content pending, the next write or flush retries
+                logger.warning("Saving '%s' failed", self.filename, exc_info=True)
@@ -13,6 +13,7 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/jpflouret/iqtrade",
     packages=find_packages(),
-    install_requires=["requests"],
+    install_requires=["requests", 'tzdata; platform_system == "Windows"'],
+    extras_require={"async": ["aiohttp>=3.8"], "orjson": ["orjson>=3"]},
     python_requires=">=3.9",
 )
@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+import threading
+from datetime import datetime
+from typing import Any
+
+import pytest
+from aioresponses import CallbackResult, aioresponses
+
+import iqtrade.api as iq
+from iqtrade.aio import QuestradeIQAsync
+from iqtrade.broker import FileLock
+from iqtrade.cache import SymbolCache
+from iqtrade.storage import ConfigWriter
+
+from test_api import (
+    ACCESS_TOKEN_RESPONSE,
+    REFRESH_TOKEN_URL,
+    SECOND_ACCESS_TOKEN_RESPONSE,
+    TEST_AAPL_QUOTE,
+    TEST_AAPL_SYMBOL,
+    TEST_ACCOUNTS_RESPONSE,
+    TEST_BALANCES_RESPONSE,
+    TEST_CANDLES_RESPONSE,
+    TEST_MOCK_API_SERVER,
+    TEST_OPTIONS_QUOTE_RESPONSE,
+    TEST_OPTIONS_RESPONSE,
+    TEST_ORDERS_RESPONSE,
+    TEST_POSITIONS_RESPONSE,
+    TEST_REFRESH_TOKEN_VALID,
+    TEST_STRATEGY_QUOTE_RESPONSE,
+    TEST_VALID_CONFIG,
+)
+
+
+@pytest.fixture()  # type: ignore
+def m() -> Any:
+    with aioresponses() as m:
+        yield m
+
+
+def test_async_no_network_on_construction(m: aioresponses) -> None:
+    qt = QuestradeIQAsync(TEST_VALID_CONFIG)
+    assert qt.get_access_token() == ""
+    assert len(m.requests) == 0
+
+
+def test_async_login(m: aioresponses) -> None:
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, payload=ACCESS_TOKEN_RESPONSE)
+
+    async def run() -> None:
+        async with QuestradeIQAsync(TEST_VALID_CONFIG) as qt:
+            assert qt.get_access_token() == ACCESS_TOKEN_RESPONSE["access_token"]
+            assert qt.get_api_server() == TEST_MOCK_API_SERVER[:-1]
+            assert qt.get_api_url().hostname == "api01.iq.questrade.com"
+
+    asyncio.run(run())
+
+
+def test_async_invalid_login(m: aioresponses) -> None:
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, payload={})
+
+    async def run() -> None:
+        async with QuestradeIQAsync(TEST_VALID_CONFIG):
+            pass  # pragma: no cover
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
+
+
+def test_async_login_cancelled_waiting_for_broker(m: aioresponses, tmp_path: Any) -> None:
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, payload=ACCESS_TOKEN_RESPONSE)
+    filename = str(tmp_path / "secrets.json")
+    with open(filename, "w") as outfile:
+        json.dump(TEST_VALID_CONFIG, outfile)
+
+    async def run() -> None:
+        qt = QuestradeIQAsync(filename)
+        # Another process is refreshing the token
+        other_process = FileLock(filename + ".lock")
+        other_process.acquire()
+        login = asyncio.ensure_future(qt.login())
+        await asyncio.sleep(0.1)
+        login.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await login
+        other_process.release()
+
+        # The lock the executor took for the cancelled login is released
+        await asyncio.sleep(0.3)
+        with FileLock(filename + ".lock", timeout=0.1):
+            pass
+        await qt.login()
+        assert qt.get_access_token() == ACCESS_TOKEN_RESPONSE["access_token"]
+        await qt.close()
+
+    asyncio.run(run())
+    with open(filename, "r") as infile:
+        assert json.load(infile)["iq_refresh_token"] == ACCESS_TOKEN_RESPONSE["refresh_token"]
+
+
+def test_async_close_saves_off_the_loop(m: aioresponses, tmp_path: Any, monkeypatch: Any) -> None:
+    filename = str(tmp_path / "secrets.json")
+    with open(filename, "w") as outfile:
+        json.dump(TEST_VALID_CONFIG, outfile)
+    threads: list[str] = []
+    monkeypatch.setattr(ConfigWriter, "flush", lambda self: threads.append(threading.current_thread().name))
+    monkeypatch.setattr(SymbolCache, "flush", lambda self: threads.append(threading.current_thread().name))
+
+    async def run() -> None:
+        qt = QuestradeIQAsync(
+            filename, save_delay=60, symbol_cache=SymbolCache(filename=str(tmp_path / "symbols.json"))
+        )
+        await qt.close()
+
+    asyncio.run(run())
+    assert len(threads) == 2
+    assert threading.main_thread().name not in threads
+
+
+def test_async_gather(m: aioresponses) -> None:
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, payload=ACCESS_TOKEN_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/accounts", payload=TEST_ACCOUNTS_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/accounts/12345678/balances", payload=TEST_BALANCES_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/accounts/12345678/positions", payload=TEST_POSITIONS_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/accounts/12345678/orders?stateFilter=Open", payload=TEST_ORDERS_RESPONSE)
+
+    async def run() -> None:
+        async with QuestradeIQAsync(TEST_VALID_CONFIG) as qt:
+            accounts, balances, positions, orders = await asyncio.gather(
+                qt.get_accounts(),
+                qt.get_balances("12345678"),
+                qt.get_positions("12345678"),
+                qt.get_orders("12345678", state_filter=iq.OrderStateFilter.Open),
+            )
+            assert isinstance(accounts[0], iq.AccountInfo)
+            assert isinstance(balances, iq.Balances)
+            assert isinstance(positions[0], iq.Position)
+            assert isinstance(orders[0], iq.Order)
+
+    asyncio.run(run())
+
+
+def test_async_coalesced_requests(m: aioresponses) -> None:
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, payload=ACCESS_TOKEN_RESPONSE)
+
+    async def quotes(url: Any, **kwargs: Any) -> CallbackResult:
+        await asyncio.sleep(0.01)  # keep the request in flight while the other callers run
+        return CallbackResult(payload=TEST_AAPL_QUOTE)
+
+    m.get(TEST_MOCK_API_SERVER + "v1/markets/quotes?ids=8049", callback=quotes, repeat=2)
+
+    async def run() -> None:
+        async with QuestradeIQAsync(TEST_VALID_CONFIG) as qt:
+            quotes = await asyncio.gather(*[qt.get_quote(8049) for _ in range(5)])
+            assert all(quote[0].symbol_id == 8049 for quote in quotes)
+            assert qt.get_coalesced_requests() == 4
+
+            # Callers share the response, not the decoded objects
+            responses = await asyncio.gather(
+                *[qt._make_request("markets/quotes", params={"ids": "8049"}) for _ in "ab"]
+            )
+            assert responses[0] == responses[1] and responses[0] is not responses[1]
+            assert responses[0]["quotes"][0] is not responses[1]["quotes"][0]
+            assert qt.get_coalesced_requests() == 5
+
+    # Only two quotes responses are mocked, so the test fails if the identical requests were all sent
+    asyncio.run(run())
+
+
+def test_async_coalesced_request_owner_cancelled(m: aioresponses) -> None:
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, payload=ACCESS_TOKEN_RESPONSE)
+
+    async def quotes(url: Any, **kwargs: Any) -> CallbackResult:
+        await asyncio.sleep(0.05)
+        return CallbackResult(payload=TEST_AAPL_QUOTE)
+
+    m.get(TEST_MOCK_API_SERVER + "v1/markets/quotes?ids=8049", callback=quotes)
+
+    async def run() -> None:
+        async with QuestradeIQAsync(TEST_VALID_CONFIG) as qt:
+            owner = asyncio.ensure_future(qt.get_quote(8049))
+            await asyncio.sleep(0.01)
+            waiter = asyncio.ensure_future(qt.get_quote(8049))
+            await asyncio.sleep(0.01)
+            assert qt.get_coalesced_requests() == 1
+            # The task that started the request is cancelled, the one waiting for it still gets the quote
+            owner.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await owner
+            assert (await waiter)[0].symbol_id == 8049
+
+    asyncio.run(run())
+
+
+def test_async_batched_strategy_quotes(m: aioresponses) -> None:
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, payload=ACCESS_TOKEN_RESPONSE)
+
+    async def strategy_quotes(url: Any, **kwargs: Any) -> CallbackResult:
+        variants = kwargs["json"]["variants"]
+        # The first request completes last
+        await asyncio.sleep(0.02 if variants[0]["legs"][0]["symbolId"] == 1 else 0)
+        quote = TEST_STRATEGY_QUOTE_RESPONSE["strategyQuotes"][0]
+        return CallbackResult(
+            payload={
+                "strategyQuotes": [
+                    dict(quote, variantId=variant["variantId"], bidPrice=variant["legs"][0]["symbolId"])
+                    for variant in variants
+                ]
+            }
+        )
+
+    m.post(TEST_MOCK_API_SERVER + "v1/markets/quotes/strategies", callback=strategy_quotes, repeat=True)
+    variants = [
+        iq.StrategyVariantRequest(0, iq.StrategyType.VerticalPutSpread, [iq.StrategyLeg(id, iq.OrderAction.Sell, 1)])
+        for id in range(1, 6)
+    ]
+
+    async def run() -> None:
+        async with QuestradeIQAsync(TEST_VALID_CONFIG) as qt:
+            qt.MAX_VARIANTS_PER_REQUEST = 2
+            quotes = await qt.get_strategy_quotes_by_request(variants)
+            assert [quote and quote.bid_price for quote in quotes] == [1, 2, 3, 4, 5]
+            pairs = [(variant.legs[0].symbol_id, quote) async for variant, quote in qt.stream_strategy_quotes(variants)]
+            assert sorted(symbol_id for symbol_id, _ in pairs[:3]) == [3, 4, 5]
+            assert [symbol_id for symbol_id, _ in pairs[3:]] == [1, 2]
+            assert all(quote is not None and quote.bid_price == symbol_id for symbol_id, quote in pairs)
+            assert len(await qt.get_strategy_quotes(variants)) == 5
+
+    asyncio.run(run())
+
+
+def test_async_portfolio_snapshot(m: aioresponses) -> None:
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, payload=ACCESS_TOKEN_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/accounts", payload=TEST_ACCOUNTS_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/accounts/26598145/balances", payload=TEST_BALANCES_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/accounts/26598145/positions", payload=TEST_POSITIONS_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/accounts/26598145/orders?stateFilter=Open", payload=TEST_ORDERS_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/symbols?ids=8049,38738", payload=TEST_AAPL_SYMBOL)
+
+    async def run() -> None:
+        async with QuestradeIQAsync(TEST_VALID_CONFIG) as qt:
+            snapshot = await qt.get_portfolio_snapshot()
+            assert snapshot.accounts[0].account.number == "26598145"
+            assert isinstance(snapshot.accounts[0].positions[0], iq.Position)
+            assert isinstance(snapshot.open_orders()[0], iq.Order)
+            assert 8049 in snapshot.symbols
+            assert snapshot.timings["total"] >= 0
+
+    asyncio.run(run())
+
+
+def test_async_market_data(m: aioresponses) -> None:
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, payload=ACCESS_TOKEN_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/symbols?names=AAPL", payload=TEST_AAPL_SYMBOL, repeat=True)
+    m.get(TEST_MOCK_API_SERVER + "v1/markets/quotes?ids=8049", payload=TEST_AAPL_QUOTE, repeat=True)
+    m.get(TEST_MOCK_API_SERVER + "v1/symbols/8049/options", payload=TEST_OPTIONS_RESPONSE, repeat=True)
+    m.get(re.compile(re.escape(TEST_MOCK_API_SERVER + "v1/markets/candles/8049") + ".*"), payload=TEST_CANDLES_RESPONSE)
+    m.post(TEST_MOCK_API_SERVER + "v1/markets/quotes/options", payload=TEST_OPTIONS_QUOTE_RESPONSE)
+    m.post(
+        TEST_MOCK_API_SERVER + "v1/markets/quotes/options",
+        payload={"optionQuotes": [dict(TEST_OPTIONS_QUOTE_RESPONSE["optionQuotes"][0], symbolId=6101993)]},
+        repeat=True,
+    )
+    m.post(TEST_MOCK_API_SERVER + "v1/markets/quotes/strategies", payload=TEST_STRATEGY_QUOTE_RESPONSE)
+
+    async def run() -> None:
+        qt = QuestradeIQAsync(TEST_VALID_CONFIG)
+        try:
+            tickers = await qt.get_tickers("AAPL")
+            assert tickers[0].symbol_id == 8049
+            quotes = await qt.get_quote(["AAPL"])
+            assert quotes[0].symbol_id == 8049
+            chain = await qt.get_option_chain(tickers[0])
+            assert len(chain) == 1
+            candles = await qt.get_candles(8049, iq.Granularity.OneDay, datetime(2021, 1, 1), datetime(2021, 12, 31))
+            assert isinstance(candles, list)
+            assert await qt.get_option_quotes([]) == []
+            option_quotes = await qt.get_option_quotes(1234)
+            assert isinstance(option_quotes[0], iq.Level1OptionData)
+            variants = [
+                iq.StrategyVariantRequest(
+                    1, iq.StrategyType.CoveredCall, [iq.StrategyLeg(27426, iq.OrderAction.Buy, 100)]
+                )
+            ]
+            strategy_quotes = await qt.get_strategy_quotes(variants)
+            assert isinstance(strategy_quotes[0], iq.StrategyVariantQuote)
+            table = await qt.get_chain_quotes("AAPL", strike_range=(60, 60))
+            assert table.to_lists()["symbol_id"] == [6101993]
+        finally:
+            await qt.close()
+
+    asyncio.run(run())
+
+
+def test_async_invalid_response(m: aioresponses) -> None:
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, payload=ACCESS_TOKEN_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/accounts", payload={})
+
+    async def run() -> None:
+        async with QuestradeIQAsync(TEST_VALID_CONFIG) as qt:
+            await qt.get_accounts()
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
+
+    with pytest.raises(TypeError):
+        asyncio.run(QuestradeIQAsync(TEST_VALID_CONFIG).get_quote(3.14159))  # type: ignore
+
+
+def test_async_token_refresh_on_401(m: aioresponses) -> None:
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, payload=ACCESS_TOKEN_RESPONSE)
+    m.get(REFRESH_TOKEN_URL + ACCESS_TOKEN_RESPONSE["refresh_token"], payload=SECOND_ACCESS_TOKEN_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/accounts", status=401)
+    m.get(TEST_MOCK_API_SERVER + "v1/accounts", payload=TEST_ACCOUNTS_RESPONSE, repeat=True)
+
+    async def run() -> None:
+        async with QuestradeIQAsync(TEST_VALID_CONFIG) as qt:
+            results = await asyncio.gather(qt.get_accounts(), qt.get_accounts())
+            assert [len(result) for result in results] == [1, 1]
+            assert qt.get_access_token() == SECOND_ACCESS_TOKEN_RESPONSE["access_token"]
+
+    asyncio.run(run())
+    refreshes = [key for key in m.requests if key[1].host == "login.questrade.com"]
+    assert len(refreshes) == 2
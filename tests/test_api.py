@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import copy
 import json
+import os
 import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Any
 from unittest import mock
@@ -12,6 +16,7 @@ from pytz import timezone
 from requests.models import HTTPError
 
 import iqtrade.api as iq
+from iqtrade.columns import column_to_list
 
 REFRESH_TOKEN_URL = "https://login.questrade.com/oauth2/token?grant_type=refresh_token&refresh_token="
 
@@ -442,16 +447,35 @@ def test_config_file_missing(m: requests_mock.Mocker) -> None:
     assert not m.called
 
 
-@mock.patch("builtins.open", new_callable=mock.mock_open, read_data=json.dumps(TEST_VALID_CONFIG))
-def test_config_file_open(om: mock.MagicMock, m: requests_mock.Mocker) -> None:
-    filename = "mysettings.json"
+def test_config_file_open(m: requests_mock.Mocker, tmp_path: Any) -> None:
+    filename = str(tmp_path / "mysettings.json")
+    with open(filename, "w") as outfile:
+        json.dump(TEST_VALID_CONFIG, outfile)
     m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, json=ACCESS_TOKEN_RESPONSE)
-    iq.QuestradeIQ(filename)
-    om.assert_any_call(filename, "r")
-    om.assert_called_with(filename, "w")
+    with mock.patch("os.replace", wraps=os.replace) as replace:
+        iq.QuestradeIQ(filename, token_broker=False)
+        # saved atomically: written to a temporary file renamed over the config
+        replace.assert_called_once()
+        assert replace.call_args[0][1] == filename
+    with open(filename, "r") as infile:
+        assert json.load(infile)["iq_refresh_token"] == ACCESS_TOKEN_RESPONSE["refresh_token"]
+    assert os.listdir(tmp_path) == ["mysettings.json"]
     assert len(m.request_history) == 1
 
 
+def test_config_file_save_delay(m: requests_mock.Mocker, tmp_path: Any) -> None:
+    filename = str(tmp_path / "mysettings.json")
+    with open(filename, "w") as outfile:
+        json.dump(TEST_VALID_CONFIG, outfile)
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, json=ACCESS_TOKEN_RESPONSE)
+    qt = iq.QuestradeIQ(filename, token_broker=False, save_delay=60)
+    with open(filename, "r") as infile:
+        assert json.load(infile) == TEST_VALID_CONFIG
+    qt.close()
+    with open(filename, "r") as infile:
+        assert json.load(infile)["iq_refresh_token"] == ACCESS_TOKEN_RESPONSE["refresh_token"]
+
+
 @mock.patch("builtins.open", new_callable=mock.mock_open, read_data=json.dumps(TEST_VALID_CONFIG))
 def test_config_file_open_but_not_saved(om: mock.MagicMock, m: requests_mock.Mocker) -> None:
     filename = "mysettings.json"
@@ -507,6 +531,145 @@ def test_login(m: requests_mock.Mocker) -> None:
     assert url.hostname == "api01.iq.questrade.com"
 
 
+SECOND_ACCESS_TOKEN_RESPONSE: dict[str, Any] = {
+    "access_token": "this_is_the_second_access_token",
+    "refresh_token": "this_is_your_third_refresh_token",
+    "token_type": "Bearer",
+    "api_server": TEST_MOCK_API_SERVER,
+    "expires_in": 1800,
+}
+
+
+def test_token_refresh_on_401(m: requests_mock.Mocker) -> None:
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, json=ACCESS_TOKEN_RESPONSE)
+    m.get(REFRESH_TOKEN_URL + ACCESS_TOKEN_RESPONSE["refresh_token"], json=SECOND_ACCESS_TOKEN_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/accounts", status_code=401)
+    m.get(
+        TEST_MOCK_API_SERVER + "v1/accounts",
+        json=TEST_ACCOUNTS_RESPONSE,
+        request_headers={"Authorization": "Bearer " + SECOND_ACCESS_TOKEN_RESPONSE["access_token"]},
+    )
+    qt = iq.QuestradeIQ(TEST_VALID_CONFIG, auto_refresh=False)
+    first_expiry = qt.get_access_token_expiry()
+
+    def get_accounts() -> int:
+        return len(qt.get_accounts())
+
+    with ThreadPoolExecutor(8) as executor:
+        assert list(executor.map(lambda _: get_accounts(), range(8))) == [1] * 8
+
+    assert qt.get_access_token() == SECOND_ACCESS_TOKEN_RESPONSE["access_token"]
+    assert qt.get_access_token_expiry() >= first_expiry
+    refreshes = [r for r in m.request_history if r.hostname == "login.questrade.com"]
+    assert len(refreshes) == 2
+
+    m.get(TEST_MOCK_API_SERVER + "v1/time", status_code=401)
+    m.get(REFRESH_TOKEN_URL + SECOND_ACCESS_TOKEN_RESPONSE["refresh_token"], json=ACCESS_TOKEN_RESPONSE)
+    with pytest.raises(HTTPError):
+        qt.get_time()
+
+
+def test_token_refresh_before_expiry(m: requests_mock.Mocker) -> None:
+    class FastRefreshQuestradeIQ(iq.QuestradeIQ):
+        TOKEN_REFRESH_MARGIN = 1799.8
+
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, json=ACCESS_TOKEN_RESPONSE)
+    m.get(REFRESH_TOKEN_URL + ACCESS_TOKEN_RESPONSE["refresh_token"], json=SECOND_ACCESS_TOKEN_RESPONSE)
+    with FastRefreshQuestradeIQ(TEST_VALID_CONFIG) as qt:
+        deadline = time.monotonic() + 5
+        while qt.get_access_token() != SECOND_ACCESS_TOKEN_RESPONSE["access_token"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert qt.get_access_token() == SECOND_ACCESS_TOKEN_RESPONSE["access_token"]
+
+
+def test_token_refresh_on_demand(m: requests_mock.Mocker) -> None:
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, json={**ACCESS_TOKEN_RESPONSE, "expires_in": 10})
+    m.get(REFRESH_TOKEN_URL + ACCESS_TOKEN_RESPONSE["refresh_token"], json=SECOND_ACCESS_TOKEN_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/accounts", json=TEST_ACCOUNTS_RESPONSE)
+    qt = iq.QuestradeIQ(TEST_VALID_CONFIG, auto_refresh=False)
+    qt.get_accounts()
+    assert qt.get_access_token() == SECOND_ACCESS_TOKEN_RESPONSE["access_token"]
+    assert m.request_history[-1].headers["Authorization"] == "Bearer " + SECOND_ACCESS_TOKEN_RESPONSE["access_token"]
+
+
+def test_access_token_cache(m: requests_mock.Mocker, tmp_path: Any) -> None:
+    filename = str(tmp_path / "secrets.json")
+    with open(filename, "w") as outfile:
+        json.dump(TEST_VALID_CONFIG, outfile)
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, json=ACCESS_TOKEN_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/accounts", json=TEST_ACCOUNTS_RESPONSE)
+    iq.QuestradeIQ(filename, auto_refresh=False)
+    assert m.call_count == 1
+    with open(filename, "r") as infile:
+        saved = json.load(infile)
+    assert saved["iq_refresh_token"] == ACCESS_TOKEN_RESPONSE["refresh_token"]
+    assert saved["iq_access_token"] == ACCESS_TOKEN_RESPONSE["access_token"]
+    assert saved["iq_api_server"] == TEST_MOCK_API_SERVER[:-1]
+    assert saved["iq_token_type"] == "Bearer"
+
+    reset_mock(m)
+    qt = iq.QuestradeIQ(filename, auto_refresh=False)
+    assert not m.called
+    assert qt.get_access_token() == ACCESS_TOKEN_RESPONSE["access_token"]
+    assert qt.get_api_url().hostname == "api01.iq.questrade.com"
+    qt.get_accounts()
+    assert m.call_count == 1
+
+
+def test_access_token_cache_expired(m: requests_mock.Mocker) -> None:
+    config = {
+        "iq_refresh_token": TEST_REFRESH_TOKEN_VALID,
+        "iq_access_token": "this_access_token_has_expired",
+        "iq_api_server": TEST_MOCK_API_SERVER[:-1],
+        "iq_token_type": "Bearer",
+        "iq_token_expiry": time.time() - 1,
+    }
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, json=ACCESS_TOKEN_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/accounts", json=TEST_ACCOUNTS_RESPONSE)
+    qt = iq.QuestradeIQ(config, auto_refresh=False)
+    assert not m.called
+    qt.get_accounts()
+    assert m.call_count == 2
+    assert m.request_history[1].headers["Authorization"] == "Bearer " + ACCESS_TOKEN_RESPONSE["access_token"]
+
+
+def test_coalesced_requests(m: requests_mock.Mocker) -> None:
+    def positions(request: Any, context: Any) -> dict[str, Any]:
+        # Answers once the other callers wait for this response
+        deadline = time.time() + 5
+        while qt.get_coalesced_requests() < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        return TEST_POSITIONS_RESPONSE
+
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, json=ACCESS_TOKEN_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/accounts/12345678/positions", json=positions)
+    qt = iq.QuestradeIQ(TEST_VALID_CONFIG)
+
+    reset_mock(m)
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(lambda _: qt._make_request("accounts/12345678/positions"), range(4)))
+    assert [len(result["positions"]) for result in results] == [1] * 4
+    assert m.call_count == 1
+    assert qt.get_coalesced_requests() == 3
+    # Callers share the response, not the decoded objects
+    assert len({id(result["positions"][0]) for result in results}) == 4
+
+    # Completed requests are not reused
+    m.get(TEST_MOCK_API_SERVER + "v1/accounts/12345678/positions", json=TEST_POSITIONS_RESPONSE)
+    qt.get_positions("12345678")
+    assert m.call_count == 2
+
+    m.get(TEST_MOCK_API_SERVER + "v1/accounts/12345678/positions", status_code=500)
+    with pytest.raises(HTTPError):
+        qt.get_positions("12345678")
+
+    m.get(TEST_MOCK_API_SERVER + "v1/accounts/12345678/positions", json=TEST_POSITIONS_RESPONSE)
+    qt = iq.QuestradeIQ(TEST_VALID_CONFIG, coalesce_requests=False)
+    with ThreadPoolExecutor(2) as executor:
+        list(executor.map(lambda _: qt.get_positions("12345678"), range(2)))
+    assert qt.get_coalesced_requests() == 0
+
+
 def test_get_time(m: requests_mock.Mocker) -> None:
     tz = timezone("America/New_York")
     now = datetime.now(tz)
@@ -660,6 +823,27 @@ def test_get_quote(m: requests_mock.Mocker) -> None:
         qt.get_quote([3.14159])  # type: ignore
 
 
+def test_get_quote_batched_names(m: requests_mock.Mocker) -> None:
+    msft = dict(TEST_AAPL_SYMBOL["symbols"][0], symbol="MSFT", symbolId=27426)
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, json=ACCESS_TOKEN_RESPONSE)
+    m.get(
+        TEST_MOCK_API_SERVER + "v1/symbols?names=AAPL,MSFT",
+        json={"symbols": [msft, TEST_AAPL_SYMBOL["symbols"][0]]},
+        complete_qs=True,
+    )
+    m.get(TEST_MOCK_API_SERVER + "v1/symbols?names=XXXX", json={"symbols": []}, complete_qs=True)
+    m.get(TEST_MOCK_API_SERVER + "v1/markets/quotes?ids=8049,27426,8049,1", json=TEST_AAPL_QUOTE, complete_qs=True)
+    qt = iq.QuestradeIQ(TEST_VALID_CONFIG)
+
+    reset_mock(m)
+    qt.get_quote(["AAPL", "MSFT", "aapl", 1])  # type: ignore
+    # One symbols call for all names, duplicates included once
+    assert m.call_count == 2
+
+    with pytest.raises(ValueError):
+        qt.get_quote("XXXX")
+
+
 def test_search_for_symbols(m: requests_mock.Mocker) -> None:
     m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, json=ACCESS_TOKEN_RESPONSE)
     m.get(TEST_MOCK_API_SERVER + "v1/symbols/search?prefix=BMO", json=TEST_SEARCH_RESPONSE, complete_qs=True)
@@ -730,6 +914,38 @@ def test_get_positions(m: requests_mock.Mocker) -> None:
         qt.get_positions("12345678")
 
 
+def test_get_portfolio_snapshot(m: requests_mock.Mocker) -> None:
+    def symbols(request: Any, context: Any) -> dict[str, Any]:
+        ids = request.qs["ids"][0].split(",")
+        return {"symbols": [dict(TEST_AAPL_SYMBOL["symbols"][0], symbolId=int(id)) for id in ids]}
+
+    accounts = copy.deepcopy(TEST_ACCOUNTS_RESPONSE)
+    accounts["accounts"].append(dict(accounts["accounts"][0], number="26598146"))
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, json=ACCESS_TOKEN_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/accounts", json=accounts)
+    for number in ("26598145", "26598146"):
+        m.get(TEST_MOCK_API_SERVER + f"v1/accounts/{number}/positions", json=TEST_POSITIONS_RESPONSE)
+        m.get(TEST_MOCK_API_SERVER + f"v1/accounts/{number}/balances", json=TEST_BALANCES_RESPONSE)
+        m.get(TEST_MOCK_API_SERVER + f"v1/accounts/{number}/orders", json=TEST_ORDERS_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/symbols", json=symbols)
+    qt = iq.QuestradeIQ(TEST_VALID_CONFIG)
+
+    reset_mock(m)
+    snapshot = qt.get_portfolio_snapshot()
+    assert [account.account.number for account in snapshot.accounts] == ["26598145", "26598146"]
+    assert len(snapshot.positions()) == 2
+    assert len(snapshot.open_orders()) == 2 * len(TEST_ORDERS_RESPONSE["orders"])
+    assert isinstance(snapshot.accounts[1].balances, iq.Balances)
+    order_requests = [request for request in m.request_history if request.path.endswith("/orders")]
+    assert all(request.qs["statefilter"] == ["open"] for request in order_requests)
+    # All symbols are retrieved with one request
+    assert [request.path for request in m.request_history].count("/v1/symbols") == 1
+    assert 38738 in snapshot.symbols and 8049 in snapshot.symbols
+    assert set(snapshot.timings) == {"accounts", "account_data", "symbols", "total"}
+    assert snapshot.timings["total"] >= snapshot.timings["account_data"]
+    qt.close()
+
+
 def test_get_orders_open(m: requests_mock.Mocker) -> None:
     m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, json=ACCESS_TOKEN_RESPONSE)
     m.get(
@@ -894,6 +1110,84 @@ def test_get_option_quote(m: requests_mock.Mocker) -> None:
         qt.get_option_quotes([3.14159])  # type: ignore
 
 
+def test_option_id_filter_strikes() -> None:
+    values = iq.OptionIdFilter(iq.OptionType.Call, 8049, datetime(2021, 8, 20), 2.125, 2.125).to_json()
+    assert (values["minstrikePrice"], values["maxstrikePrice"]) == ("2.12", "2.13")
+    values = iq.OptionIdFilter(iq.OptionType.Call, 8049, datetime(2021, 8, 20), 2.1, 0.1 + 0.2).to_json()
+    assert (values["minstrikePrice"], values["maxstrikePrice"]) == ("2.10", "0.30")
+
+
+def test_get_option_quotes_chunked(m: requests_mock.Mocker) -> None:
+    def option_quotes(request: Any, context: Any) -> dict[str, Any]:
+        body = request.json()
+        ids = body.get("optionIds", [])
+        for filter in body.get("filters", []):
+            # Every filter selects two options, the same ones for every filter
+            ids = ids + [int(filter["underlyingId"]), 9]
+        return {"optionQuotes": [dict(TEST_OPTIONS_QUOTE_RESPONSE["optionQuotes"][0], symbolId=id) for id in ids]}
+
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, json=ACCESS_TOKEN_RESPONSE)
+    m.post(TEST_MOCK_API_SERVER + "v1/markets/quotes/options", json=option_quotes)
+    qt = iq.QuestradeIQ(TEST_VALID_CONFIG)
+    qt.MAX_IDS_PER_REQUEST = 2
+    filters = [iq.OptionIdFilter(iq.OptionType.Put, id, datetime(2021, 8, 20), 200.0, 250.0) for id in (100, 200)]
+
+    reset_mock(m)
+    quotes = qt.get_option_quotes([5, 4, 3, 2, 1], filters=filters)
+    assert [quote.symbol_id for quote in quotes] == [5, 4, 3, 2, 1, 100, 9, 200]
+    # Three requests of ids and one of both filters
+    assert m.call_count == 4
+    assert all(len(request.json().get("optionIds", [])) <= 2 for request in m.request_history)
+    assert [len(request.json()["filters"]) for request in m.request_history if "filters" in request.json()] == [2]
+
+    reset_mock(m)
+    qt.MAX_FILTERS_PER_REQUEST = 1
+    assert sorted(qt.get_option_quotes_by_id([], filters=filters)) == [9, 100, 200]
+    assert m.call_count == 2
+
+
+def test_get_chain_quotes(m: requests_mock.Mocker) -> None:
+    chain = iq.ChainPerExpiryDate(TEST_OPTIONS_RESPONSE["optionChain"][0])
+    strikes = list(chain.chain_per_root["BMO"].chain_per_strike_price.values())
+
+    def option_quotes(request: Any, context: Any) -> dict[str, Any]:
+        ids = [
+            strike.call_symbol_id if filter["optionType"] == "Call" else strike.put_symbol_id
+            for filter in request.json()["filters"]
+            for strike in strikes
+            if float(filter["minstrikePrice"]) <= strike.strike_price <= float(filter["maxstrikePrice"])
+        ]
+        return {"optionQuotes": [dict(TEST_OPTIONS_QUOTE_RESPONSE["optionQuotes"][0], symbolId=id) for id in ids]}
+
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, json=ACCESS_TOKEN_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/symbols/9291/options", json=TEST_OPTIONS_RESPONSE)
+    m.post(TEST_MOCK_API_SERVER + "v1/markets/quotes/options", json=option_quotes)
+    qt = iq.QuestradeIQ(TEST_VALID_CONFIG)
+
+    reset_mock(m)
+    table = qt.get_chain_quotes(9291, strike_range=(61, 65))
+    # One call and one put filter for the single expiry, bounded by the listed strikes, in a single request
+    assert m.call_count == 2
+    filters = m.request_history[1].json()["filters"]
+    assert [filter["optionType"] for filter in filters] == ["Call", "Put"]
+    assert [filter["minstrikePrice"] for filter in filters] == ["62.00"] * 2
+    assert [filter["maxstrikePrice"] for filter in filters] == ["64.00"] * 2
+    assert column_to_list(table.symbol_id) == [6101994, 6102010, 6101995, 6102011]
+    assert column_to_list(table.strike) == [62, 62, 64, 64]
+    assert column_to_list(table.open_interest) == [2292] * 4
+
+    # The chain expired long ago, there are no upcoming expiries to quote
+    reset_mock(m)
+    assert len(qt.get_chain_quotes(9291, expiries=1)) == 0
+    assert m.call_count == 1
+
+    # On its expiry date the chain is quoted until the close
+    reset_mock(m)
+    before_close = timezone("America/New_York").localize(datetime(2015, 1, 17, 10)).timestamp()
+    with mock.patch("iqtrade.options.time.time", return_value=before_close):
+        assert len(qt.get_chain_quotes(9291, expiries=1)) == 2 * len(strikes)
+
+
 def test_get_strategy_quotes(m: requests_mock.Mocker) -> None:
     m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, json=ACCESS_TOKEN_RESPONSE)
     m.post(TEST_MOCK_API_SERVER + "v1/markets/quotes/strategies", json=TEST_STRATEGY_QUOTE_RESPONSE)
@@ -922,6 +1216,60 @@ def test_get_strategy_quotes(m: requests_mock.Mocker) -> None:
         qt.get_strategy_quotes([variants[0], 3.14159])  # type: ignore
 
 
+def test_batched_strategy_quotes(m: requests_mock.Mocker) -> None:
+    def strategy_quotes(request: Any, context: Any) -> dict[str, Any]:
+        quote = TEST_STRATEGY_QUOTE_RESPONSE["strategyQuotes"][0]
+        return {
+            "strategyQuotes": [
+                dict(quote, variantId=variant["variantId"], bidPrice=variant["legs"][0]["symbolId"])
+                for variant in request.json()["variants"]
+                # The API leaves out variants it cannot quote
+                if variant["legs"][0]["symbolId"] != 3
+            ]
+        }
+
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, json=ACCESS_TOKEN_RESPONSE)
+    m.post(TEST_MOCK_API_SERVER + "v1/markets/quotes/strategies", json=strategy_quotes)
+    qt = iq.QuestradeIQ(TEST_VALID_CONFIG)
+    qt.MAX_VARIANTS_PER_REQUEST = 2
+    # Variant ids are left to the client
+    variants = [
+        iq.StrategyVariantRequest(7, iq.StrategyType.VerticalCallSpread, [iq.StrategyLeg(id, iq.OrderAction.Buy, 1)])
+        for id in range(1, 6)
+    ]
+
+    reset_mock(m)
+    quotes = qt.get_strategy_quotes_by_request(variants)
+    assert [quote and quote.bid_price for quote in quotes] == [1, 2, None, 4, 5]
+    assert all(quote.variant_id == 7 for quote in quotes if quote is not None)
+    assert m.call_count == 3
+    # Requests are made concurrently, in no particular order
+    assert sorted(
+        [variant["variantId"] for variant in request.json()["variants"]] for request in m.request_history
+    ) == [[1], [1, 2], [1, 2]]
+
+    pairs = list(qt.stream_strategy_quotes(variants))
+    assert sorted((variant.legs[0].symbol_id, quote and quote.bid_price) for variant, quote in pairs) == [
+        (1, 1),
+        (2, 2),
+        (3, None),
+        (4, 4),
+        (5, 5),
+    ]
+
+    reset_mock(m)
+    assert len(qt.get_strategy_quotes(variants)) == 4
+    assert m.call_count == 3
+    assert qt.get_strategy_quotes([]) == []
+    assert qt.get_strategy_quotes_by_request([]) == []
+    with pytest.raises(TypeError):
+        qt.stream_strategy_quotes([variants[0], 3.14159])  # type: ignore
+
+    stream = qt.stream_strategy_quotes(variants)
+    next(stream)
+    stream.close()
+
+
 def test_get_candles(m: requests_mock.Mocker) -> None:
     m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, json=ACCESS_TOKEN_RESPONSE)
     m.get(TEST_MOCK_API_SERVER + "v1/symbols?names=AAPL", json=TEST_AAPL_SYMBOL, complete_qs=True)
@@ -948,6 +1296,40 @@ def test_get_candles(m: requests_mock.Mocker) -> None:
         )
 
 
+def test_get_candles_paginated(m: requests_mock.Mocker) -> None:
+    def candles_callback(request: Any, context: Any) -> dict[str, Any]:
+        # one candle at each end of the window, the one at the end is also the first of the next window
+        return {
+            "candles": [
+                {**TEST_CANDLES_RESPONSE["candles"][0], "start": request.qs["starttime"][0]},
+                {**TEST_CANDLES_RESPONSE["candles"][0], "start": request.qs["endtime"][0]},
+            ]
+        }
+
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, json=ACCESS_TOKEN_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/markets/candles/8049", json=candles_callback)
+    qt = iq.QuestradeIQ(TEST_VALID_CONFIG)
+    reset_mock(m)
+
+    # 3 days of one minute candles need 3 requests of at most 2000 candles
+    candles = qt.get_candles(8049, iq.Granularity.OneMinute, datetime(2021, 1, 1), datetime(2021, 1, 4), raw_data=True)
+    assert m.call_count == 3
+    assert [candle["start"] for candle in candles if isinstance(candle, dict)] == [
+        "2021-01-01t00:00:00",
+        "2021-01-02t09:20:00",
+        "2021-01-03t18:40:00",
+        "2021-01-04t00:00:00",
+    ]
+    windows = sorted((r.qs["starttime"][0], r.qs["endtime"][0]) for r in m.request_history)
+    assert windows[0] == ("2021-01-01t00:00:00", "2021-01-02t09:20:00")
+    assert windows[-1] == ("2021-01-03t18:40:00", "2021-01-04t00:00:00")
+
+    reset_mock(m)
+    result = qt.get_candles(8049, iq.Granularity.OneYear, datetime(2000, 1, 1), datetime(2021, 1, 1))
+    assert m.call_count == 1
+    assert isinstance(result[0], iq.Candle)
+
+
 def test_notification_streaming(m: requests_mock.Mocker) -> None:
     TEST_PORT_RESULT1 = {"streamPort": random.randrange(1025, 32768)}
     TEST_PORT_RESULT2 = {"streamPort": random.randrange(1025, 32768)}
@@ -1000,6 +1382,40 @@ def test_quote_streaming(m: requests_mock.Mocker) -> None:
     assert port2 == TEST_PORT_RESULT2["streamPort"]
 
 
+def test_chunked_requests(m: requests_mock.Mocker) -> None:
+    def quotes(request: Any, context: Any) -> dict[str, Any]:
+        ids = request.qs["ids"][0].split(",")
+        return {"quotes": [dict(TEST_AAPL_QUOTE["quotes"][0], symbolId=int(id)) for id in ids]}
+
+    def symbols(request: Any, context: Any) -> dict[str, Any]:
+        ids = request.qs["ids"][0].split(",")
+        return {"symbols": [dict(TEST_AAPL_SYMBOL["symbols"][0], symbolId=int(id)) for id in ids]}
+
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, json=ACCESS_TOKEN_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/markets/quotes", json=quotes)
+    m.get(TEST_MOCK_API_SERVER + "v1/symbols", json=symbols)
+    qt = iq.QuestradeIQ(TEST_VALID_CONFIG)
+    qt.MAX_IDS_PER_REQUEST = 3
+    ids = list(range(1, 11))
+
+    reset_mock(m)
+    assert [quote.symbol_id for quote in qt.get_quote(ids)] == ids
+    assert m.call_count == 4
+    assert all(len(request.qs["ids"][0].split(",")) <= 3 for request in m.request_history)
+
+    reset_mock(m)
+    assert [ticker.symbol_id for ticker in qt.get_tickers(ids)] == ids
+    assert m.call_count == 4
+
+    m.get(TEST_MOCK_API_SERVER + "v1/markets/quotes?stream=true", json={"streamPort": 4321})
+    reset_mock(m)
+    assert qt.setup_streaming_quotes_batched(ids, iq.SocketMode.WebSocket) == [4321] * 4
+    assert m.call_count == 4
+    with pytest.raises(ValueError):
+        qt.setup_streaming_quotes(ids, iq.SocketMode.WebSocket)
+    qt.close()
+
+
 def test_account_types(m: requests_mock.Mocker) -> None:
     assert iq.ClientAccountType.Individual == iq.ClientAccountType.from_string("Individual")
     assert iq.ClientAccountType.Joint == iq.ClientAccountType.from_string("Joint")
@@ -1012,3 +1428,52 @@ def test_account_types(m: requests_mock.Mocker) -> None:
     assert iq.ClientAccountType.Family == iq.ClientAccountType.from_string("Family")
     assert iq.ClientAccountType.JointAndInformalTrust == iq.ClientAccountType.from_string("Joint and Informal Trust")
     assert iq.ClientAccountType.Institution == iq.ClientAccountType.from_string("Institution")
+
+
+def test_models_are_slotted() -> None:
+    models = [
+        iq.AccountInfo(TEST_ACCOUNTS_RESPONSE["accounts"][0]),
+        iq.Balances(TEST_BALANCES_RESPONSE),
+        iq.AccountActivity(TEST_ACTIVITIES_RESPONSE["activities"][0]),
+        iq.Position(TEST_POSITIONS_RESPONSE["positions"][0]),
+        iq.Order(TEST_ORDERS_RESPONSE["orders"][0]),
+        iq.Execution(TEST_EXEUCTIONS_RESPONSE["executions"][0]),
+        iq.Ticker(TEST_SEARCH_RESPONSE["symbols"][0]),
+        iq.TickerDetails(TEST_AAPL_SYMBOL["symbols"][0]),
+        iq.Level1Quote(TEST_AAPL_QUOTE["quotes"][0]),
+        iq.Level1OptionData(TEST_OPTIONS_QUOTE_RESPONSE["optionQuotes"][0]),
+        iq.ChainPerExpiryDate(TEST_OPTIONS_RESPONSE["optionChain"][0]),
+        iq.StrategyVariantQuote(TEST_STRATEGY_QUOTE_RESPONSE["strategyQuotes"][0]),
+        iq.Candle(TEST_CANDLES_RESPONSE["candles"][0]),
+    ]
+    for model in models:
+        assert not hasattr(model, "__dict__"), type(model).__name__
+    with pytest.raises(AttributeError):
+        models[0].not_a_field = 1  # type: ignore
+
+
+def test_lazy_models(m: requests_mock.Mocker) -> None:
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, json=ACCESS_TOKEN_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/symbols?ids=8049", json=TEST_AAPL_SYMBOL, complete_qs=True)
+    m.get(TEST_MOCK_API_SERVER + "v1/accounts/12345678/orders", json=TEST_ORDERS_RESPONSE)
+    qt = iq.QuestradeIQ(TEST_VALID_CONFIG)
+
+    eager_ticker = qt.get_tickers(8049)[0]
+    ticker = qt.get_tickers(8049, lazy=True)[0]
+    assert ticker.is_lazy() and not eager_ticker.is_lazy()
+    eager_order = qt.get_orders("12345678")[0]
+    order = qt.get_orders("12345678", lazy=True)[0]
+
+    for eager, lazy in ((eager_ticker, ticker), (eager_order, order)):
+        assert set(type(lazy)._LAZY_FIELDS) == set(type(lazy).__slots__)
+        for name in type(lazy).__slots__:
+            decoded = getattr(lazy, name)
+            expected = getattr(eager, name)
+            if name in ("option_contract_deliverables", "min_ticks", "legs"):
+                assert type(decoded) is type(expected)
+            else:
+                assert decoded == expected, name
+            # The decoded value is kept
+            assert getattr(lazy, name) is decoded
+        with pytest.raises(AttributeError):
+            lazy.not_a_field  # type: ignore
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import json
+import time
+from typing import Any
+
+import pytest
+import requests_mock
+
+import iqtrade.api as iq
+from iqtrade.broker import FileLock, TokenBroker
+
+REFRESH_TOKEN_URL = "https://login.questrade.com/oauth2/token?grant_type=refresh_token&refresh_token="
+TEST_MOCK_API_SERVER = "https://api01.iq.questrade.com/"
+
+
+@pytest.fixture()  # type: ignore
+def m() -> Any:
+    with requests_mock.Mocker() as m:
+        yield m
+
+
+def test_file_lock(tmp_path: Any) -> None:
+    filename = str(tmp_path / "secrets.json.lock")
+    with FileLock(filename):
+        with pytest.raises(TimeoutError):
+            FileLock(filename, timeout=0.1).acquire()
+    with FileLock(filename, timeout=0.1):
+        pass
+
+
+def test_broker_load(tmp_path: Any) -> None:
+    filename = str(tmp_path / "secrets.json")
+    broker = TokenBroker(filename)
+    assert broker.lock_filename == filename + ".lock"
+    assert broker.load() == {}
+    with open(filename, "w") as outfile:
+        outfile.write("{not json")
+    assert broker.load() == {}
+
+
+def test_shared_token_is_adopted(m: requests_mock.Mocker, tmp_path: Any) -> None:
+    filename = str(tmp_path / "secrets.json")
+    with open(filename, "w") as outfile:
+        json.dump(
+            {
+                "iq_refresh_token": "first_refresh_token",
+                "iq_access_token": "first_access_token",
+                "iq_api_server": TEST_MOCK_API_SERVER,
+                "iq_token_type": "Bearer",
+                "iq_token_expiry": time.time() + 1800,
+            },
+            outfile,
+        )
+    m.get(
+        REFRESH_TOKEN_URL + "first_refresh_token",
+        json={
+            "access_token": "second_access_token",
+            "refresh_token": "second_refresh_token",
+            "token_type": "Bearer",
+            "api_server": TEST_MOCK_API_SERVER,
+            "expires_in": 1800,
+        },
+    )
+    m.get(TEST_MOCK_API_SERVER + "v1/accounts", status_code=401)
+    m.get(
+        TEST_MOCK_API_SERVER + "v1/accounts",
+        json={"accounts": []},
+        request_headers={"Authorization": "Bearer second_access_token"},
+    )
+
+    # Two "processes" start from the same config file
+    worker1 = iq.QuestradeIQ(filename, auto_refresh=False)
+    worker2 = iq.QuestradeIQ(filename, auto_refresh=False)
+    assert not m.called
+
+    # The server revokes the first token: worker1 refreshes, worker2 picks up worker1's token from the file
+    worker1.get_accounts()
+    worker2.get_accounts()
+    refreshes = [r for r in m.request_history if r.hostname == "login.questrade.com"]
+    assert len(refreshes) == 1
+    assert worker2.get_access_token() == "second_access_token"
+    with open(filename, "r") as infile:
+        assert json.load(infile)["iq_refresh_token"] == "second_refresh_token"
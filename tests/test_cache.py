@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import copy
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from unittest import mock
+
+import pytest
+import requests_mock
+from test_api import (
+    ACCESS_TOKEN_RESPONSE,
+    REFRESH_TOKEN_URL,
+    TEST_AAPL_QUOTE,
+    TEST_AAPL_SYMBOL,
+    TEST_MOCK_API_SERVER,
+    TEST_OPTIONS_QUOTE_RESPONSE,
+    TEST_OPTIONS_RESPONSE,
+    TEST_VALID_CONFIG,
+)
+
+import iqtrade.api as iq
+from iqtrade.cache import OptionChainCache, QuoteCache, SymbolCache
+from iqtrade.storage import atomic_write
+
+
+def make_symbol(symbol_id: int, name: str) -> dict[str, Any]:
+    symbol = copy.deepcopy(TEST_AAPL_SYMBOL["symbols"][0])
+    symbol["symbolId"] = symbol_id
+    symbol["symbol"] = name
+    return dict(symbol)
+
+
+@pytest.fixture()  # type: ignore
+def m() -> Any:
+    with requests_mock.Mocker() as m:
+        yield m
+
+
+def test_lookup() -> None:
+    cache = SymbolCache()
+    cache.put([make_symbol(1, "AAA"), make_symbol(2, "BBB")])
+    found, missing = cache.lookup([1, "bbb", 3, "CCC"])
+    assert list(found) == [1, "bbb"]
+    assert found["bbb"]["symbolId"] == 2
+    assert missing == [3, "CCC"]
+    assert (cache.hits, cache.misses) == (2, 2)
+    assert cache.get_symbol_id("aaa") == 1
+    assert cache.get_symbol_id("CCC") is None
+    assert len(cache) == 2
+
+
+def test_field_ttls() -> None:
+    cache = SymbolCache(ttl=60, field_ttls={"symbolId": 3600, "symbol": 3600})
+    cache.put([make_symbol(1, "AAA")], fetched=time.time() - 600)
+    # Prices are stale, but the name still resolves to the id
+    assert cache.get("AAA") is None
+    assert cache.get("AAA", ("prevDayClosePrice",)) is None
+    assert cache.get("AAA", ("symbolId",)) is not None
+    assert cache.get_symbol_id("AAA") == 1
+    cache.put([make_symbol(1, "AAA")], fetched=time.time() - 7200)
+    assert cache.get_symbol_id("AAA") is None
+
+
+def test_eviction() -> None:
+    cache = SymbolCache(max_size=2)
+    cache.put([make_symbol(1, "AAA"), make_symbol(2, "BBB")])
+    assert cache.get(1) is not None
+    cache.put([make_symbol(3, "CCC")])
+    assert len(cache) == 2
+    assert cache.get(2) is None
+    assert cache.get_symbol_id("BBB") is None
+    assert cache.get_symbol_id("AAA") == 1
+    assert cache.get_symbol_id("CCC") == 3
+
+
+def test_persistence(tmp_path: Any) -> None:
+    filename = str(tmp_path / "symbols.json")
+    cache = SymbolCache(filename=filename)
+    cache.put([make_symbol(1, "AAA"), make_symbol(2, "BBB")])
+    cache.close()
+
+    reloaded = SymbolCache(filename=filename)
+    assert len(reloaded) == 2
+    assert reloaded.get_symbol_id("BBB") == 2
+    reloaded.close()
+
+    (tmp_path / "broken.json").write_text("not json")
+    assert len(SymbolCache(filename=str(tmp_path / "broken.json"))) == 0
+
+
+def test_client_symbol_cache(m: requests_mock.Mocker) -> None:
+    m.get(REFRESH_TOKEN_URL + TEST_VALID_CONFIG["iq_refresh_token"], json=ACCESS_TOKEN_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/symbols?names=AAPL", json=TEST_AAPL_SYMBOL, complete_qs=True)
+    m.get(
+        TEST_MOCK_API_SERVER + "v1/symbols?ids=1",
+        json={"symbols": [make_symbol(1, "AAA")]},
+        complete_qs=True,
+    )
+    m.get(TEST_MOCK_API_SERVER + "v1/markets/quotes?ids=8049", json=TEST_AAPL_QUOTE, complete_qs=True)
+    qt = iq.QuestradeIQ(TEST_VALID_CONFIG, symbol_cache=True)
+    cache = qt.get_symbol_cache()
+    assert cache is not None
+
+    assert qt.get_tickers("AAPL")[0].symbol_id == 8049
+    assert m.call_count == 2
+    # Only the symbol not cached yet is requested, the result keeps the input order
+    tickers = qt.get_tickers([1, 8049])
+    assert [ticker.symbol_id for ticker in tickers] == [1, 8049]
+    assert m.call_count == 3
+    assert m.request_history[-1].qs == {"ids": ["1"]}
+    assert [ticker.symbol_id for ticker in qt.get_tickers(["aaa", "aapl"])] == [1, 8049]
+    assert m.call_count == 3
+    # Names are resolved from the cache
+    assert qt.get_quote("AAPL")[0].symbol_id == 8049
+    assert m.call_count == 4
+    assert (cache.hits, cache.misses) == (4, 2)
+
+    assert iq.QuestradeIQ(TEST_VALID_CONFIG).get_symbol_cache() is None
+    assert iq.QuestradeIQ(TEST_VALID_CONFIG, symbol_cache=cache).get_symbol_cache() is cache
+
+
+def make_quote(symbol_id: int) -> dict[str, Any]:
+    return dict(TEST_AAPL_QUOTE["quotes"][0], symbolId=symbol_id)
+
+
+def test_quote_cache() -> None:
+    cache = QuoteCache(max_size=2)
+    with mock.patch("iqtrade.cache.time.monotonic", return_value=100.0):
+        cache.put("quote", [make_quote(1), make_quote(2)])
+    with mock.patch("iqtrade.cache.time.monotonic", return_value=100.5):
+        found, missing = cache.lookup("quote", [1, 2, 3], 1.0)
+        assert list(found) == [1, 2]
+        assert missing == [3]
+        assert cache.lookup("quote", [1], 0.1) == ({}, [1])
+        assert cache.lookup("option", [1], 1.0) == ({}, [1])
+        cache.put("quote", [make_quote(3)])
+    assert len(cache) == 2
+    assert cache.lookup("quote", [1], 10.0)[1] == [1]
+    assert (cache.hits, cache.misses) == (2, 4)
+
+
+def test_client_quote_cache(m: requests_mock.Mocker) -> None:
+    def quotes(request: Any, context: Any) -> dict[str, Any]:
+        return {"quotes": [make_quote(int(id)) for id in request.qs["ids"][0].split(",")]}
+
+    def option_quotes(request: Any, context: Any) -> dict[str, Any]:
+        option_quote = TEST_OPTIONS_QUOTE_RESPONSE["optionQuotes"][0]
+        return {"optionQuotes": [dict(option_quote, symbolId=id) for id in request.json()["optionIds"]]}
+
+    m.get(REFRESH_TOKEN_URL + TEST_VALID_CONFIG["iq_refresh_token"], json=ACCESS_TOKEN_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/markets/quotes", json=quotes)
+    m.post(TEST_MOCK_API_SERVER + "v1/markets/quotes/options", json=option_quotes)
+    qt = iq.QuestradeIQ(TEST_VALID_CONFIG)
+
+    # Without a max_age nothing is cached
+    qt.get_quote([1, 2])
+    assert qt.get_quote_cache() is None
+    assert [quote.symbol_id for quote in qt.get_quote([1, 2], max_age=60)] == [1, 2]
+    assert qt.get_quote_cache() is not None
+    # Only the symbol without a fresh enough quote is requested, the result keeps the input order
+    assert [quote.symbol_id for quote in qt.get_quote([3, 1, 2], max_age=60)] == [3, 1, 2]
+    assert m.request_history[-1].qs == {"ids": ["3"]}
+    calls = m.call_count
+    assert len(qt.get_quote([1, 2, 3], max_age=60)) == 3
+    assert m.call_count == calls
+    qt.get_quote([1, 2])
+    assert m.call_count == calls + 1
+
+    assert [quote.symbol_id for quote in qt.get_option_quotes([10, 11], max_age=60)] == [10, 11]
+    assert [quote.symbol_id for quote in qt.get_option_quotes([11, 12, 10], max_age=60)] == [11, 12, 10]
+    assert m.request_history[-1].json() == {"optionIds": [12]}
+
+    cache = QuoteCache()
+    assert iq.QuestradeIQ(TEST_VALID_CONFIG, quote_cache=cache).get_quote_cache() is cache
+    qt = iq.QuestradeIQ(TEST_VALID_CONFIG, quote_cache=False)
+    assert qt.get_quote_cache() is None
+    calls = m.call_count
+    qt.get_quote([1, 2], max_age=60)
+    assert m.call_count == calls + 1
+
+
+def test_option_chain_cache(m: requests_mock.Mocker, tmp_path: Any) -> None:
+    m.get(REFRESH_TOKEN_URL + TEST_VALID_CONFIG["iq_refresh_token"], json=ACCESS_TOKEN_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/symbols/9291/options", json=TEST_OPTIONS_RESPONSE)
+    expiry = iq.ChainPerExpiryDate(TEST_OPTIONS_RESPONSE["optionChain"][0]).expiry_date
+    fetched = expiry.timestamp() - 3600
+    cache = OptionChainCache(str(tmp_path))
+    qt = iq.QuestradeIQ(TEST_VALID_CONFIG, option_chain_cache=cache)
+
+    with mock.patch("iqtrade.cache.time.time", return_value=fetched):
+        chain = qt.get_option_chain(9291)
+        assert qt.get_option_chain(9291) is chain
+        assert m.call_count == 2
+        index = cache.get_index(9291)
+        assert index is not None and index.call_ids() == [6101993, 6101994, 6101995]
+        assert cache.get_index(9291) is index
+
+        # Another process loads the chain from disk
+        loaded = OptionChainCache(str(tmp_path)).get(9291)
+        assert loaded is not None
+        assert list(loaded) == list(chain)
+        strikes = loaded[expiry].chain_per_root["BMO"].chain_per_strike_price
+        assert [(x.strike_price, x.call_symbol_id, x.put_symbol_id) for x in strikes.values()] == [
+            (x.strike_price, x.call_symbol_id, x.put_symbol_id)
+            for x in chain[expiry].chain_per_root["BMO"].chain_per_strike_price.values()
+        ]
+        assert loaded[expiry].option_exercise_type == chain[expiry].option_exercise_type
+
+    # On the next trading date the chain is stale, refresh() fetches it again
+    with mock.patch("iqtrade.cache.time.time", return_value=fetched + 86400):
+        assert cache.get(9291) is None
+        with mock.patch("iqtrade.cache.atomic_write", wraps=atomic_write) as write:
+            assert cache.refresh(qt.get_option_chain) == 1
+        # get_option_chain() put the chain, refresh() does not write it again
+        assert write.call_count == 1
+        assert m.call_count == 3
+        assert cache.refresh(qt.get_option_chain) == 0
+
+    assert not OptionChainCache.is_valid(chain, fetched, expiry.timestamp() + 2 * 86400)
+
+    # Trading dates follow New York time, in summer too, whatever the offset of the expiry dates
+    later = {datetime(2016, 1, 15, tzinfo=timezone(timedelta(hours=-5))): chain[expiry]}
+    evening = datetime(2015, 7, 1, 23, 30, tzinfo=timezone(timedelta(hours=-4))).timestamp()
+    assert OptionChainCache.is_valid(later, evening - 3600, evening)
+    assert not OptionChainCache.is_valid(later, evening, evening + 3600)
+    (tmp_path / "1.chain").write_bytes(b"garbage")
+    assert cache.get(1) is None
+
+
+def test_option_chain_cache_refresh(m: requests_mock.Mocker) -> None:
+    m.get(REFRESH_TOKEN_URL + TEST_VALID_CONFIG["iq_refresh_token"], json=ACCESS_TOKEN_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/symbols/9291/options", json=TEST_OPTIONS_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/symbols/1/options", status_code=404)
+    qt = iq.QuestradeIQ(TEST_VALID_CONFIG)
+    chain = qt.get_option_chain(9291)
+    # 2015-01-15 23:00 in New York, the chains were fetched the previous day
+    now = datetime(2015, 1, 16, 4, tzinfo=timezone.utc).timestamp()
+    cache = OptionChainCache()
+    cache.put(1, chain, fetched=now - 86400)
+    cache.put(9291, chain, fetched=now - 86400)
+
+    # A chain that cannot be fetched does not stop the others from being refreshed
+    with mock.patch("iqtrade.cache.time.time", return_value=now):
+        assert cache.refresh(qt.get_option_chain) == 1
+        assert cache.get(9291) is not None
+        assert cache.get(1) is None
+    assert cache._refresh_delay(now, 300) == 300
+
+    # Once every chain is valid, the refresh thread sleeps until midnight in New York
+    cache.put(1, chain, fetched=now)
+    assert cache._refresh_delay(now, 300) == 3600
+    assert cache._refresh_delay(now + 3600 - 0.1, 300) == 1
+
+
+def test_import_without_time_zone_database(tmp_path: Any) -> None:
+    # The exchange time zone is only looked up once an option chain cache needs it
+    environment = dict(os.environ, PYTHONTZPATH=str(tmp_path))
+    subprocess.run([sys.executable, "-c", "import iqtrade.api"], env=environment, check=True, capture_output=True)
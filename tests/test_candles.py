@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import math
+from datetime import datetime
+from typing import Any
+
+import pytest
+import requests_mock
+from test_api import (
+    ACCESS_TOKEN_RESPONSE,
+    REFRESH_TOKEN_URL,
+    TEST_CANDLES_RESPONSE,
+    TEST_MOCK_API_SERVER,
+    TEST_REFRESH_TOKEN_VALID,
+    TEST_VALID_CONFIG,
+)
+
+import iqtrade.api as iq
+from iqtrade.candles import CandleSeries, epoch_ns_to_datetime, iso_to_epoch_ns
+from iqtrade.columns import has_numpy
+
+RAW_CANDLES: list[dict[str, Any]] = [
+    {
+        "start": "2014-01-02T00:00:00.000000-05:00",
+        "end": "2014-01-03T00:00:00.000000-05:00",
+        "low": 70.3,
+        "high": 70.78,
+        "open": 70.68,
+        "close": 70.73,
+        "volume": 983609,
+        "VWAP": 70.67,
+    },
+    {
+        "start": "2014-01-03T00:00:00.000000-05:00",
+        "end": "2014-01-06T00:00:00.000000-05:00",
+        "low": 70.1,
+        "high": 71.0,
+        "open": 70.73,
+        "close": 70.9,
+        "volume": 1200000,
+    },
+    {
+        "start": "2014-01-06T00:00:00.000000-05:00",
+        "end": "2014-01-07T00:00:00.000000-05:00",
+        "low": 70.5,
+        "high": 71.2,
+        "open": 70.9,
+        "close": 71.1,
+        "volume": 800000,
+        "VWAP": 70.95,
+    },
+]
+
+
+@pytest.fixture()  # type: ignore
+def m() -> Any:
+    with requests_mock.Mocker() as m:
+        yield m
+
+
+def test_timestamps() -> None:
+    assert iso_to_epoch_ns("1970-01-01T00:00:00") == 0
+    assert iso_to_epoch_ns("1970-01-01T00:00:01.000001+00:00") == 1_000_001_000
+    assert iso_to_epoch_ns("2014-01-02T00:00:00.000000-05:00") == iso_to_epoch_ns("2014-01-02T05:00:00")
+    assert epoch_ns_to_datetime(1_000_001_000).isoformat() == "1970-01-01T00:00:01.000001+00:00"
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])  # type: ignore
+def test_candle_series(use_numpy: bool) -> None:
+    series = CandleSeries.from_raw(RAW_CANDLES, use_numpy=use_numpy)
+    assert len(series) == 3
+    assert series.is_numpy() == (use_numpy and has_numpy())
+    assert series.to_lists()["volume"] == [983609, 1200000, 800000]
+    assert series.to_lists()["close"] == [70.73, 70.9, 71.1]
+    assert math.isnan(series.vwap[1])
+
+    candle = series[0]
+    assert isinstance(candle, iq.Candle)
+    assert candle.start == "2014-01-02T05:00:00+00:00"
+    assert candle.vwap == 70.67
+    assert series[1].vwap is None
+
+    # Slices share the memory of the series
+    tail = series[1:]
+    assert isinstance(tail, CandleSeries)
+    assert len(tail) == 2
+    assert tail.to_lists()["open"] == [70.73, 70.9]
+    if series.is_numpy():
+        assert tail.start.base is series.start
+    else:
+        assert tail.start.obj is series.start.obj
+
+    round_trip = CandleSeries.from_candles(series.to_candles(), use_numpy=use_numpy)
+    assert round_trip.to_lists()["start"] == series.to_lists()["start"]
+    assert round_trip.to_lists()["volume"] == series.to_lists()["volume"]
+    assert len(CandleSeries.empty(use_numpy=use_numpy)) == 0
+
+
+def test_get_candles_as_series(m: requests_mock.Mocker) -> None:
+    m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, json=ACCESS_TOKEN_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/markets/candles/8049", json=TEST_CANDLES_RESPONSE)
+    qt = iq.QuestradeIQ(TEST_VALID_CONFIG)
+
+    series = qt.get_candles(8049, iq.Granularity.OneDay, datetime(2021, 1, 1), datetime(2021, 12, 31), as_series=True)
+    assert isinstance(series, CandleSeries)
+    assert len(series) == 1
+    assert series.to_lists()["high"] == [70.78]
+    assert series.start[0] == iso_to_epoch_ns(RAW_CANDLES[0]["start"])
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import os
+import threading
+import urllib.parse
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from unittest import mock
+
+import pytest
+import requests_mock
+from test_api import ACCESS_TOKEN_RESPONSE, REFRESH_TOKEN_URL, TEST_MOCK_API_SERVER, TEST_REFRESH_TOKEN_VALID
+
+import iqtrade.api as iq
+from iqtrade.candles import datetime_to_epoch_ns
+from iqtrade.candlestore import CandleStore
+
+TEST_CONFIG = {"iq_refresh_token": TEST_REFRESH_TOKEN_VALID}
+
+
+def daily_candles(request: Any, context: Any) -> dict[str, Any]:
+    """Returns one candle per UTC day starting in the requested range."""
+    query = urllib.parse.parse_qs(urllib.parse.urlparse(request.url).query)
+    start = datetime.fromisoformat(query["startTime"][0])
+    end = datetime.fromisoformat(query["endTime"][0])
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    if day < start:
+        day += timedelta(days=1)
+    candles = []
+    while day <= end:
+        candles.append(
+            {
+                "start": day.isoformat(),
+                "end": (day + timedelta(days=1)).isoformat(),
+                "low": 1.0,
+                "high": 3.0,
+                "open": 2.0,
+                "close": 2.5,
+                "volume": day.day,
+                "VWAP": 2.25,
+            }
+        )
+        day += timedelta(days=1)
+    return {"candles": candles}
+
+
+@pytest.fixture()  # type: ignore
+def m() -> Any:
+    with requests_mock.Mocker() as m:
+        m.get(REFRESH_TOKEN_URL + TEST_REFRESH_TOKEN_VALID, json=ACCESS_TOKEN_RESPONSE)
+        m.get(TEST_MOCK_API_SERVER + "v1/markets/candles/8049", json=daily_candles)
+        yield m
+
+
+def candle_requests(m: requests_mock.Mocker) -> list[str]:
+    return [r.qs["starttime"][0] for r in m.request_history if r.path.startswith("/v1/markets/candles")]
+
+
+def utc(year: int, month: int, day: int) -> datetime:
+    return datetime(year, month, day, tzinfo=timezone.utc)
+
+
+def test_candle_store_sync(m: requests_mock.Mocker, tmp_path: Any) -> None:
+    qt = iq.QuestradeIQ(TEST_CONFIG)
+    store = CandleStore(str(tmp_path))
+    day = iq.Granularity.OneDay
+
+    assert len(store.read(8049, day)) == 0
+    assert store.sync(qt, 8049, day, utc(2021, 1, 1), utc(2021, 1, 10)) == 10
+    assert store.coverage(8049, day) == [(utc(2021, 1, 1), utc(2021, 1, 10))]
+    series = store.read(8049, day)
+    assert series.to_lists()["volume"] == list(range(1, 11))
+
+    # Synced ranges are not fetched again, new ones are appended
+    assert store.sync(qt, 8049, day, utc(2021, 1, 2), utc(2021, 1, 5)) == 0
+    assert store.sync(qt, 8049, day, utc(2021, 1, 5), utc(2021, 1, 20)) == 10
+    assert candle_requests(m) == ["2021-01-01t00:00:00+00:00", "2021-01-10t00:00:00+00:00"]
+    assert store.missing_ranges(8049, day, utc(2020, 12, 30), utc(2021, 1, 20)) == [
+        (utc(2020, 12, 30), utc(2021, 1, 1))
+    ]
+    assert sorted(os.listdir(tmp_path / "8049"))[0] == "OneDay.0.close"
+
+    # Series read before a sync keep their content
+    assert len(series) == 10
+    assert len(store.read(8049, day)) == 20
+
+    # A backfill rewrites the columns into a new generation
+    assert store.sync(qt, 8049, day, utc(2020, 12, 20), utc(2021, 1, 3)) == 12
+    assert store.coverage(8049, day) == [(utc(2020, 12, 20), utc(2021, 1, 20))]
+    assert sorted(os.listdir(tmp_path / "8049"))[0] == "OneDay.1.close"
+    starts = store.read(8049, day).to_lists()["start"]
+    assert len(starts) == 32
+    assert starts == sorted(set(starts))
+    assert series.to_lists()["volume"] == list(range(1, 11))
+
+    window = store.read(8049, day, utc(2021, 1, 5), utc(2021, 1, 7))
+    assert window.to_lists()["start"] == [datetime_to_epoch_ns(utc(2021, 1, d)) for d in (5, 6, 7)]
+
+    # The store is reopened from disk
+    reopened = CandleStore(str(tmp_path), use_numpy=False)
+    assert not reopened.read(8049, day).is_numpy()
+    assert reopened.read(8049, day).to_lists()["start"] == starts
+
+
+def test_candle_store_open_candle(m: requests_mock.Mocker, tmp_path: Any) -> None:
+    qt = iq.QuestradeIQ(TEST_CONFIG)
+    store = CandleStore(str(tmp_path))
+    day = iq.Granularity.OneDay
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    # Today's candle has not closed yet: it is neither stored nor marked as synced
+    store.sync(qt, 8049, day, today - timedelta(days=3), today + timedelta(days=1))
+    assert len(store.read(8049, day)) == 3
+    assert store.coverage(8049, day)[0][1] < today
+    store.sync(qt, 8049, day, today - timedelta(days=3), today + timedelta(days=1))
+    assert len(store.read(8049, day)) == 3
+    assert len(candle_requests(m)) == 2
+
+
+def test_candle_store_reads_during_sync(m: requests_mock.Mocker, tmp_path: Any) -> None:
+    qt = iq.QuestradeIQ(TEST_CONFIG)
+    store = CandleStore(str(tmp_path))
+    day = iq.Granularity.OneDay
+    assert store.sync(qt, 8049, day, utc(2021, 1, 1), utc(2021, 1, 10)) == 10
+    fetching, release = threading.Event(), threading.Event()
+    get_candles = qt.get_candles
+
+    def slow_get_candles(*args: Any, **kwargs: Any) -> Any:
+        fetching.set()
+        assert release.wait(5)
+        return get_candles(*args, **kwargs)
+
+    with mock.patch.object(qt, "get_candles", side_effect=slow_get_candles):
+        thread = threading.Thread(target=store.sync, args=(qt, 8049, day, utc(2021, 1, 1), utc(2021, 1, 20)))
+        thread.start()
+        assert fetching.wait(5)
+        # The store is not locked while the candles are requested
+        assert len(store.read(8049, day)) == 10
+        assert store.missing_ranges(8049, day, utc(2021, 1, 1), utc(2021, 1, 20)) == [
+            (utc(2021, 1, 10), utc(2021, 1, 20))
+        ]
+        release.set()
+        thread.join()
+    assert len(store.read(8049, day)) == 20
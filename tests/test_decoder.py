@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+import requests_mock
+from test_api import ACCESS_TOKEN_RESPONSE, REFRESH_TOKEN_URL, TEST_MOCK_API_SERVER, TEST_VALID_CONFIG
+
+import iqtrade.api as iq
+from iqtrade.decoder import available_decoders, decode_object, get_decoder, orjson_decoder, stdlib_decoder
+
+TEST_PAYLOAD = '{"time": "2014-10-24T12:14:42.730000-04:00", "name": "café", "values": [1, 2.5, null]}'
+
+
+@pytest.fixture()  # type: ignore
+def m() -> Any:
+    with requests_mock.Mocker() as m:
+        yield m
+
+
+@pytest.mark.parametrize("name", available_decoders())  # type: ignore
+def test_decoders(name: str) -> None:
+    decoder = get_decoder(name)
+    assert decoder(TEST_PAYLOAD.encode("utf-8")) == {
+        "time": "2014-10-24T12:14:42.730000-04:00",
+        "name": "café",
+        "values": [1, 2.5, None],
+    }
+    with pytest.raises(RuntimeError):
+        decode_object(decoder, b"[]")
+
+
+def test_get_decoder() -> None:
+    assert get_decoder() is (orjson_decoder if "orjson" in available_decoders() else stdlib_decoder)
+    assert get_decoder(stdlib_decoder) is stdlib_decoder
+    assert "json" in available_decoders()
+    with pytest.raises(ValueError):
+        get_decoder("yaml")
+
+
+def test_client_json_decoder(m: requests_mock.Mocker) -> None:
+    decoded: list[bytes] = []
+
+    def decoder(data: bytes) -> Any:
+        decoded.append(data)
+        return stdlib_decoder(data)
+
+    m.get(REFRESH_TOKEN_URL + TEST_VALID_CONFIG["iq_refresh_token"], json=ACCESS_TOKEN_RESPONSE)
+    m.get(TEST_MOCK_API_SERVER + "v1/time", content=TEST_PAYLOAD.encode("utf-8"))
+    qt = iq.QuestradeIQ(TEST_VALID_CONFIG, json_decoder=decoder)
+    assert qt.get_json_decoder() is decoder
+    assert qt.get_time().year == 2014
+    assert decoded == [TEST_PAYLOAD.encode("utf-8")]
+
+    assert iq.QuestradeIQ(TEST_VALID_CONFIG, json_decoder="json").get_json_decoder() is stdlib_decoder
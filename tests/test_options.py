@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import math
+from datetime import datetime, timezone
+from typing import Any
+
+import pytest
+from test_api import TEST_OPTIONS_QUOTE_RESPONSE
+
+import iqtrade.api as iq
+from iqtrade.candles import datetime_to_epoch_ns
+from iqtrade.columns import column_to_list, has_numpy
+from iqtrade.options import OptionChainIndex, OptionQuoteTable
+
+
+def make_chain(expiry: str, roots: dict[str, list[float]]) -> dict[str, Any]:
+    return {
+        "expiryDate": expiry,
+        "description": "BANK OF MONTREAL",
+        "listingExchange": "MX",
+        "optionExerciseType": "American",
+        "chainPerRoot": [
+            {
+                "optionRoot": root,
+                "chainPerStrikePrice": [
+                    {"strikePrice": strike, "callSymbolId": int(strike * 10), "putSymbolId": -int(strike * 10)}
+                    for strike in strikes
+                ],
+                "multiplier": 100,
+            }
+            for root, strikes in roots.items()
+        ],
+    }
+
+
+JAN = datetime(2015, 1, 17, tzinfo=timezone.utc)
+FEB = datetime(2015, 2, 21, tzinfo=timezone.utc)
+CHAIN = {
+    chain.expiry_date: chain
+    for chain in [
+        iq.ChainPerExpiryDate(make_chain("2015-02-21T00:00:00.000000+00:00", {"BMO": [64, 60, 62, 66]})),
+        iq.ChainPerExpiryDate(
+            make_chain("2015-01-17T00:00:00.000000+00:00", {"BMO": [60, 62, 64], "BMO1": [61.5, 63.5]})
+        ),
+    ]
+}
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])  # type: ignore
+def test_option_chain_index(use_numpy: bool) -> None:
+    index = OptionChainIndex(CHAIN, use_numpy=use_numpy)
+    assert index.expiries == [JAN, FEB]
+    assert len(index) == 9
+    assert index.roots(JAN) == ["BMO", "BMO1"]
+    assert column_to_list(index.strikes(FEB, "BMO")) == [60, 62, 64, 66]
+
+    strikes = index.strikes_between(61, 63)
+    assert [(strike.expiry_date, strike.option_root, strike.strike_price) for strike in strikes] == [
+        (JAN, "BMO", 62),
+        (JAN, "BMO1", 61.5),
+        (FEB, "BMO", 62),
+    ]
+    assert strikes[0].call_symbol_id == 620 and strikes[0].put_symbol_id == -620
+    assert [strike.strike_price for strike in index.strikes_between(63, None, expiries=[FEB])] == [64, 66]
+    assert index.strikes_between(70, 80) == []
+
+    assert index.nearest_strike(JAN, 63.4).strike_price == 63.5
+    assert index.nearest_strike(JAN, 63.4, root="BMO").strike_price == 64
+    assert index.nearest_strike(FEB, 63).strike_price == 62
+    assert index.at_the_money(FEB, 100).strike_price == 66
+    with pytest.raises(KeyError):
+        index.nearest_strike(JAN, 63, root="XYZ")
+
+    assert index.nearest_expiry(datetime(2015, 2, 10, tzinfo=timezone.utc)) == FEB
+    assert index.nearest_expiry(datetime(2014, 1, 1, tzinfo=timezone.utc)) == JAN
+    assert index.next_expiries(1, datetime(2015, 1, 18, tzinfo=timezone.utc)) == [FEB]
+    # An expiry keeps trading until the close of its expiry date
+    assert index.next_expiries(1, datetime(2015, 1, 17, 15, tzinfo=timezone.utc)) == [JAN]
+    assert index.next_expiries(1, datetime(2015, 1, 17, 16, tzinfo=timezone.utc)) == [FEB]
+    assert index.next_expiries(3, datetime(2015, 1, 1, tzinfo=timezone.utc)) == [JAN, FEB]
+    assert index.next_expiries(3) == []
+
+    assert index.call_ids(62, 64, expiries=[JAN], root="BMO") == [620, 640]
+    assert index.put_ids(65) == [-660]
+    assert len(index.call_ids()) == 9
+
+
+def test_empty_option_chain_index() -> None:
+    index = OptionChainIndex({})
+    assert len(index) == 0
+    assert index.call_ids() == []
+    with pytest.raises(ValueError):
+        index.nearest_expiry(JAN)
+
+
+def test_quote_filters() -> None:
+    index = OptionChainIndex(CHAIN)
+    filters = index.quote_filters(1, 61, 63)
+    assert [
+        (filter.option_type, filter.expiry_date, filter.min_strike_price, filter.max_strike_price) for filter in filters
+    ] == [
+        (iq.OptionType.Call, JAN, 61.5, 62),
+        (iq.OptionType.Put, JAN, 61.5, 62),
+        (iq.OptionType.Call, FEB, 62, 62),
+        (iq.OptionType.Put, FEB, 62, 62),
+    ]
+    assert len(index.quote_filters(1, expiries=[FEB])) == 2
+    assert index.quote_filters(1, 70, 80) == []
+
+    contracts = index.contracts(61, 63, expiries=[JAN])
+    assert contracts == {
+        620: (JAN, 62, iq.OptionType.Call),
+        -620: (JAN, 62, iq.OptionType.Put),
+        615: (JAN, 61.5, iq.OptionType.Call),
+        -615: (JAN, 61.5, iq.OptionType.Put),
+    }
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])  # type: ignore
+def test_option_quote_table(use_numpy: bool) -> None:
+    def make_quote(symbol_id: int, bid: float) -> dict[str, Any]:
+        return dict(TEST_OPTIONS_QUOTE_RESPONSE["optionQuotes"][0], symbolId=symbol_id, bidPrice=bid)
+
+    quotes = [make_quote(-620, 1.0), make_quote(620, 2.0), make_quote(615, 3.0), make_quote(999, 4.0)]
+    quotes[0]["volatility"] = None
+    table = OptionQuoteTable.from_raw(quotes, OptionChainIndex(CHAIN).contracts(expiries=[JAN]), use_numpy=use_numpy)
+    assert table.is_numpy() == (use_numpy and has_numpy())
+    assert len(table) == 3
+    assert list(table.columns()) == list(OptionQuoteTable.COLUMNS)
+    values = table.to_lists()
+    assert values["symbol_id"] == [615, 620, -620]
+    assert values["strike"] == [61.5, 62, 62]
+    assert values["option_type"] == [iq.OptionType.Call.value, iq.OptionType.Call.value, iq.OptionType.Put.value]
+    assert values["expiry"] == [datetime_to_epoch_ns(JAN)] * 3
+    assert values["bid"] == [3.0, 2.0, 1.0]
+    assert values["open_interest"] == [2292] * 3
+    assert math.isnan(values["volatility"][2])
+    assert column_to_list(table.delta) == [0.06985] * 3
+
+    assert len(OptionQuoteTable.from_raw([], {}, use_numpy=use_numpy)) == 0
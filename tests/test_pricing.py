@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import pytest
+from test_api import TEST_AAPL_QUOTE, TEST_AAPL_SYMBOL, TEST_OPTIONS_QUOTE_RESPONSE
+
+import iqtrade.api as iq
+from iqtrade.columns import column_to_list, has_numpy
+from iqtrade.options import EXPIRY_TIME
+from iqtrade.pricing import (
+    GREEKS,
+    black_scholes_greeks,
+    black_scholes_price,
+    implied_volatility,
+    price_option_quotes,
+    quote_price,
+)
+
+CALL, PUT = iq.OptionType.Call, iq.OptionType.Put
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])  # type: ignore
+def test_black_scholes_price(use_numpy: bool) -> None:
+    # Hull, Options, Futures and Other Derivatives, example 15.6
+    prices = black_scholes_price([CALL, PUT], 42, 40, 0.5, 20, 0.1, use_numpy=use_numpy)
+    assert column_to_list(prices) == pytest.approx([4.76, 0.81], abs=0.005)
+
+    # Put-call parity with a dividend yield
+    call, put = column_to_list(black_scholes_price([1, 2], 100, 110, 0.75, 30, 0.04, 0.02, use_numpy=use_numpy))
+    assert call - put == pytest.approx(100 * math.exp(-0.02 * 0.75) - 110 * math.exp(-0.04 * 0.75), abs=1e-4)
+
+    invalid = black_scholes_price([iq.OptionType.Invalid, CALL, CALL], 100, 100, [1, 0, 1], [20, 20, -1])
+    assert all(math.isnan(price) for price in column_to_list(invalid))
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])  # type: ignore
+def test_black_scholes_greeks(use_numpy: bool) -> None:
+    def price(spot: float = 100, time: float = 0.5, volatility: float = 25, rate: float = 0.03) -> float:
+        return float(black_scholes_price(PUT, spot, 95, time, volatility, rate, 0.01, use_numpy=use_numpy)[0])
+
+    greeks = black_scholes_greeks(PUT, 100, 95, 0.5, 25, 0.03, 0.01, use_numpy=use_numpy)
+    assert list(greeks) == list(GREEKS)
+    values = {name: float(column[0]) for name, column in greeks.items()}
+    # Finite differences, in the units of Level1OptionData
+    assert values["delta"] == pytest.approx((price(spot=100.01) - price(spot=99.99)) / 0.02, abs=1e-4)
+    assert values["gamma"] == pytest.approx((price(spot=100.1) - 2 * price() + price(spot=99.9)) / 0.01, abs=1e-3)
+    assert values["theta"] == pytest.approx(price(time=0.5 - 1 / 365) - price(), abs=1e-3)
+    assert values["vega"] == pytest.approx(price(volatility=25.5) - price(volatility=24.5), abs=1e-3)
+    assert values["rho"] == pytest.approx(price(rate=0.035) - price(rate=0.025), abs=1e-3)
+    assert values["delta"] < 0 and values["rho"] < 0
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])  # type: ignore
+def test_implied_volatility(use_numpy: bool) -> None:
+    types = [CALL, PUT, CALL, PUT]
+    strikes = [90, 95, 100, 130]
+    times = [0.1, 0.5, 1, 2]
+    volatilities = [15, 30, 60, 120]
+    prices = black_scholes_price(types, 100, strikes, times, volatilities, 0.03, use_numpy=use_numpy)
+    solved = implied_volatility(types, prices, 100, strikes, times, 0.03, use_numpy=use_numpy)
+    assert column_to_list(solved) == pytest.approx(volatilities, abs=1e-3)
+
+    # Below the intrinsic value, above the underlying price, not positive
+    invalid = implied_volatility([PUT, CALL, CALL], [4, 101, 0], 100, [105, 100, 100], 1, use_numpy=use_numpy)
+    assert all(math.isnan(volatility) for volatility in column_to_list(invalid))
+    assert len(implied_volatility([], [], 100, [], [], use_numpy=use_numpy)) == 0
+
+
+def make_option(
+    symbol_id: int, option_type: str, strike: float, expiry: datetime, exercise_type: str = "American"
+) -> iq.TickerDetails:
+    details: dict[str, Any] = dict(TEST_AAPL_SYMBOL["symbols"][0])
+    details.update(
+        symbolId=symbol_id,
+        securityType="Option",
+        optionType=option_type,
+        optionExerciseType=exercise_type,
+        optionStrikePrice=strike,
+        optionExpiryDate=expiry.isoformat(),
+    )
+    return iq.TickerDetails(details)
+
+
+def make_quote(symbol_id: int, bid: float, ask: float, last: float) -> iq.Level1OptionData:
+    quote = dict(TEST_OPTIONS_QUOTE_RESPONSE["optionQuotes"][0])
+    quote.update(symbolId=symbol_id, bidPrice=bid, askPrice=ask, lastTradePrice=last)
+    return iq.Level1OptionData(quote)
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])  # type: ignore
+def test_price_option_quotes(use_numpy: bool) -> None:
+    now = datetime(2015, 1, 2, tzinfo=timezone.utc)
+    expiry = now + timedelta(days=182.5) - EXPIRY_TIME
+    details = [make_option(1, "Call", 100, expiry), make_option(2, "Put", 100, expiry)]
+    call, put = column_to_list(black_scholes_price([CALL, PUT], 101.85, 100, 0.5, 30))
+    quotes = [
+        make_quote(1, call - 0.05, call + 0.05, 0),
+        make_quote(2, 0, 0, put),
+        make_quote(3, 1, 2, 1.5),
+        make_quote(4, 0, 0, 0),
+    ]
+    underlying = iq.Level1Quote(TEST_AAPL_QUOTE["quotes"][0])
+    assert quote_price(underlying) == pytest.approx(101.85)
+
+    table = price_option_quotes(quotes, details, underlying, now=now, use_numpy=use_numpy)
+    assert table.is_numpy() == (use_numpy and has_numpy())
+    values = table.to_lists()
+    assert values["symbol_id"] == [1, 2, 3, 4]
+    assert values["price"][:2] == pytest.approx([call, put])
+    assert values["time"][:2] == pytest.approx([0.5, 0.5])
+    assert values["volatility"][:2] == pytest.approx([30, 30], abs=1e-3)
+    greeks = black_scholes_greeks([CALL, PUT], 101.85, 100, 0.5, 30, american=True)
+    for name in GREEKS:
+        assert values[name][:2] == pytest.approx(column_to_list(greeks[name]), abs=1e-4)
+    # Without details or without any price
+    assert all(math.isnan(value) for value in values["volatility"][2:] + values["delta"][2:])
+    assert math.isnan(values["price"][3])
+
+    by_id = price_option_quotes(quotes[:1], {1: details[0]}, 101.85, now=now, use_numpy=use_numpy)
+    assert column_to_list(by_id.volatility) == pytest.approx([30], abs=1e-3)
+
+    # American puts are worth more than European ones with interest, options of unknown exercise type are not priced
+    american = black_scholes_price(PUT, 101.85, 100, 0.5, 30, 0.05, american=True)[0]
+    details = [make_option(2, "Put", 100, expiry), make_option(5, "Put", 100, expiry, "European")]
+    details.append(make_option(6, "Put", 100, expiry, "Invalid"))
+    quotes = [make_quote(2, 0, 0, american), make_quote(5, 0, 0, american), make_quote(6, 0, 0, american)]
+    volatilities = column_to_list(
+        price_option_quotes(quotes, details, 101.85, rate=0.05, now=now, use_numpy=use_numpy).volatility
+    )
+    assert volatilities[0] == pytest.approx(30, abs=1e-3)
+    assert volatilities[1] > 30.5
+    assert math.isnan(volatilities[2])
+
+
+def binomial_price(
+    phi: int, spot: float, strike: float, time: float, volatility: float, rate: float, dividend_yield: float
+) -> float:
+    """Cox-Ross-Rubinstein price of an American option."""
+    steps = 500
+    dt = time / steps
+    up = math.exp(volatility / 100 * math.sqrt(dt))
+    probability = (math.exp((rate - dividend_yield) * dt) - 1 / up) / (up - 1 / up)
+    discount = math.exp(-rate * dt)
+    values = [max(phi * (spot * up ** (2 * j - steps) - strike), 0.0) for j in range(steps + 1)]
+    for step in range(steps - 1, -1, -1):
+        values = [
+            max(
+                discount * (probability * values[j + 1] + (1 - probability) * values[j]),
+                phi * (spot * up ** (2 * j - step) - strike),
+            )
+            for j in range(step + 1)
+        ]
+    return values[0]
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])  # type: ignore
+def test_american_options(use_numpy: bool) -> None:
+    # Puts with interest, calls with dividends, at, in and out of the money
+    types = [PUT, PUT, PUT, CALL, CALL]
+    spots = [100, 90, 110, 100, 120]
+    times = [0.5, 0.25, 1, 0.5, 0.25]
+    volatilities = [30, 20, 40, 25, 35]
+    rates = [0.05, 0.08, 0.05, 0.03, 0.08]
+    dividend_yields = [0, 0, 0.02, 0.06, 0.12]
+    prices = column_to_list(
+        black_scholes_price(types, spots, 100, times, volatilities, rates, dividend_yields, True, use_numpy=use_numpy)
+    )
+    european = column_to_list(
+        black_scholes_price(types, spots, 100, times, volatilities, rates, dividend_yields, use_numpy=use_numpy)
+    )
+    trees = [
+        binomial_price(-1 if option_type == PUT else 1, *values)
+        for option_type, values in zip(types, zip(spots, [100] * 5, times, volatilities, rates, dividend_yields))
+    ]
+    assert prices == pytest.approx(trees, rel=0.005)
+    assert all(price > value for price, value in zip(prices, european))
+
+    solved = implied_volatility(types, prices, spots, 100, times, rates, dividend_yields, True, use_numpy=use_numpy)
+    assert column_to_list(solved) == pytest.approx(volatilities, abs=1e-3)
+
+    # Deep in the money puts are exercised, their price matches no volatility
+    assert column_to_list(black_scholes_price(PUT, 60, 100, 0.5, 30, 0.08, american=True, use_numpy=use_numpy)) == [40]
+    assert math.isnan(implied_volatility(PUT, 40, 60, 100, 0.5, 0.08, american=True, use_numpy=use_numpy)[0])
+
+    # Without dividends calls are never exercised early
+    call = black_scholes_greeks(CALL, 100, 95, 0.5, 25, 0.03, american=True, use_numpy=use_numpy)
+    for name, column in black_scholes_greeks(CALL, 100, 95, 0.5, 25, 0.03, use_numpy=use_numpy).items():
+        assert float(call[name][0]) == pytest.approx(float(column[0]), rel=0.01, abs=1e-4)
+    put = black_scholes_greeks(PUT, 60, 100, 0.5, 30, 0.08, american=True, use_numpy=use_numpy)
+    assert float(put["delta"][0]) == pytest.approx(-1)
+    assert float(put["vega"][0]) == pytest.approx(0)
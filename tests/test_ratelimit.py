@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import time
+from typing import Any
+
+import pytest
+import requests_mock
+from requests.models import HTTPError
+
+import iqtrade.api as iq
+from iqtrade.ratelimit import RateLimitCategory, RateLimiter, RateLimitExceeded, TokenBucket, throttled_delay
+
+REFRESH_TOKEN_URL = "https://login.questrade.com/oauth2/token?grant_type=refresh_token&refresh_token="
+TEST_MOCK_API_SERVER = "https://api01.iq.questrade.com/"
+TEST_VALID_CONFIG = {"iq_refresh_token": "this_refresh_token_is_valid"}
+ACCESS_TOKEN_RESPONSE = {
+    "access_token": "this_access_token_is_valid",
+    "refresh_token": "this_is_your_new_refresh_token",
+    "token_type": "Bearer",
+    "api_server": TEST_MOCK_API_SERVER,
+}
+
+
+@pytest.fixture()  # type: ignore
+def m() -> Any:
+    with requests_mock.Mocker() as m:
+        m.get(REFRESH_TOKEN_URL + TEST_VALID_CONFIG["iq_refresh_token"], json=ACCESS_TOKEN_RESPONSE)
+        yield m
+
+
+def test_categories() -> None:
+    assert RateLimitCategory.from_request_path("accounts/123/positions") == RateLimitCategory.Account
+    assert RateLimitCategory.from_request_path("time") == RateLimitCategory.Account
+    assert RateLimitCategory.from_request_path("markets/quotes") == RateLimitCategory.MarketData
+    assert RateLimitCategory.from_request_path("symbols") == RateLimitCategory.MarketData
+    assert RateLimitCategory.from_request_path("symbols/8049/options") == RateLimitCategory.MarketData
+
+
+def test_token_bucket_per_second() -> None:
+    bucket = TokenBucket(per_second=10, per_hour=1000)
+    waits = [bucket.reserve() for _ in range(12)]
+    assert waits[:10] == [0.0] * 10
+    assert 0 < waits[10] <= 0.1
+    assert waits[10] < waits[11] <= 0.2
+
+
+def test_token_bucket_hourly_budget() -> None:
+    bucket = TokenBucket(per_second=10, per_hour=1000)
+    bucket.update(0, time.time() + 5)
+    assert 4 < bucket.delay() <= 5
+    bucket.update(0, time.time() - 1)
+    assert bucket.delay() == 0
+    assert bucket.status(RateLimitCategory.Account).remaining == 1000
+
+
+def test_token_bucket_paces_after_reset() -> None:
+    bucket = TokenBucket(per_second=10, per_hour=1000)
+    bucket.update(0, time.time() + 1)
+    waits = [bucket.reserve() for _ in range(15)]
+    # A full second's worth of requests is sent at the reset, the rest follow at the per-second rate
+    assert all(0.9 < wait <= 1 for wait in waits[:10])
+    for previous, wait in zip(waits[9:], waits[10:]):
+        assert wait - previous == pytest.approx(0.1, abs=0.01)
+    assert bucket.status(RateLimitCategory.Account).remaining == 985
+
+
+def test_limiter_waits_for_reset() -> None:
+    limiter = RateLimiter()
+    limiter.update("markets/quotes", 429, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(time.time() + 0.2)})
+    start = time.monotonic()
+    limiter.acquire("markets/quotes")
+    assert time.monotonic() - start >= 0.1
+
+
+def test_limiter_max_wait() -> None:
+    limiter = RateLimiter(max_wait=1)
+    limiter.update("markets/quotes", 200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(time.time() + 60)})
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire("markets/quotes")
+    # account calls have their own budget
+    limiter.acquire("accounts")
+    assert limiter.get_status(RateLimitCategory.MarketData).remaining == 0
+    assert limiter.get_status(RateLimitCategory.Account).remaining == 29999
+
+
+def test_client_tracks_headers(m: requests_mock.Mocker) -> None:
+    reset = int(time.time()) + 600
+    m.get(
+        TEST_MOCK_API_SERVER + "v1/markets/quotes?ids=8049",
+        json={"quotes": []},
+        headers={"X-RateLimit-Remaining": "1234", "X-RateLimit-Reset": str(reset)},
+    )
+    qt = iq.QuestradeIQ(TEST_VALID_CONFIG)
+    qt.get_quote(8049)
+    status = qt.get_rate_limit_status(RateLimitCategory.MarketData)
+    assert status is not None
+    assert status.remaining == 1234
+    assert status.reset.timestamp() == reset
+    assert (
+        iq.QuestradeIQ(TEST_VALID_CONFIG, rate_limiter=False).get_rate_limit_status(RateLimitCategory.Account) is None
+    )
+
+
+def test_client_waits_after_429(m: requests_mock.Mocker) -> None:
+    m.get(
+        TEST_MOCK_API_SERVER + "v1/accounts",
+        [
+            {
+                "status_code": 429,
+                "headers": {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(time.time() + 0.2)},
+            },
+            {"json": {"accounts": []}, "headers": {"X-RateLimit-Remaining": "29999"}},
+        ],
+    )
+    limiter = RateLimiter()
+    qt = iq.QuestradeIQ(TEST_VALID_CONFIG, rate_limiter=limiter)
+    assert qt.get_rate_limiter() is limiter
+    start = time.monotonic()
+    assert qt.get_accounts() == []
+    assert time.monotonic() - start >= 0.1
+    assert m.call_count == 3
+
+    m.get(TEST_MOCK_API_SERVER + "v1/accounts", status_code=429, headers={"X-RateLimit-Reset": str(time.time())})
+    with pytest.raises(HTTPError):
+        iq.QuestradeIQ(TEST_VALID_CONFIG, rate_limiter=RateLimiter(max_wait=5)).get_accounts()
+
+
+def test_client_backs_off_after_429_without_limiter(m: requests_mock.Mocker) -> None:
+    m.get(
+        TEST_MOCK_API_SERVER + "v1/accounts",
+        [
+            {"status_code": 429, "headers": {"X-RateLimit-Reset": str(time.time() + 0.2)}},
+            {"json": {"accounts": []}},
+        ],
+    )
+    start = time.monotonic()
+    assert iq.QuestradeIQ(TEST_VALID_CONFIG, rate_limiter=False).get_accounts() == []
+    assert time.monotonic() - start >= 0.1
+    assert throttled_delay({}, 0) == 1
+    assert throttled_delay({}, 2) == 4
+    assert throttled_delay({"X-RateLimit-Reset": str(time.time() - 10)}, 0) == 0
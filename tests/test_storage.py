@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from typing import Any
+from unittest import mock
+
+import pytest
+
+from iqtrade.storage import ConfigWriter, atomic_write, atomic_write_json
+
+
+def test_atomic_write(tmp_path: Any) -> None:
+    filename = str(tmp_path / "data.json")
+    atomic_write_json(filename, {"a": 1})
+    atomic_write_json(filename, {"a": 2})
+    with open(filename, "r") as infile:
+        assert json.load(infile) == {"a": 2}
+    assert os.listdir(tmp_path) == ["data.json"]
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX permissions and symlinks")  # type: ignore
+def test_atomic_write_keeps_mode_and_symlink(tmp_path: Any) -> None:
+    filename = str(tmp_path / "data.json")
+    atomic_write_json(filename, {"a": 1})
+    assert os.stat(filename).st_mode & 0o777 == 0o600
+    os.chmod(filename, 0o640)
+    link = str(tmp_path / "link.json")
+    os.symlink(filename, link)
+    atomic_write_json(link, {"a": 2})
+    assert os.path.islink(link)
+    assert os.stat(filename).st_mode & 0o777 == 0o640
+    with open(filename, "r") as infile:
+        assert json.load(infile) == {"a": 2}
+
+
+def test_atomic_write_failure_keeps_old_content(tmp_path: Any) -> None:
+    filename = str(tmp_path / "data.json")
+    atomic_write_json(filename, {"a": 1})
+    with mock.patch("os.replace", side_effect=OSError("disk full")):
+        with pytest.raises(OSError):
+            atomic_write(filename, b"{}")
+    with open(filename, "r") as infile:
+        assert json.load(infile) == {"a": 1}
+    assert os.listdir(tmp_path) == ["data.json"]
+
+
+def test_config_writer_sync(tmp_path: Any) -> None:
+    filename = str(tmp_path / "secrets.json")
+    writer = ConfigWriter(filename)
+    writer.write({"iq_refresh_token": "1"})
+    writer.write({"iq_refresh_token": "2"})
+    assert writer.writes == 2
+    with open(filename, "r") as infile:
+        assert json.load(infile) == {"iq_refresh_token": "2"}
+
+
+def test_config_writer_debounce(tmp_path: Any) -> None:
+    filename = str(tmp_path / "secrets.json")
+    writer = ConfigWriter(filename, delay=0.1)
+    config = {"iq_refresh_token": "1"}
+    writer.write(config)
+    config["iq_refresh_token"] = "2"
+    writer.write(config)
+    config["iq_refresh_token"] = "3"  # not written, the writer keeps a snapshot
+    assert not os.path.exists(filename)
+    deadline = time.monotonic() + 5
+    while writer.writes == 0 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert writer.writes == 1
+    with open(filename, "r") as infile:
+        assert json.load(infile) == {"iq_refresh_token": "2"}
+
+    writer.write({"iq_refresh_token": "4"}, sync=True)
+    assert writer.writes == 2
+    writer.write({"iq_refresh_token": "5"})
+    writer.close()
+    assert writer.writes == 3
+    with open(filename, "r") as infile:
+        assert json.load(infile) == {"iq_refresh_token": "5"}